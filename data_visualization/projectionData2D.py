@@ -1,11 +1,14 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
-data = pd.read_csv('data/projections_2D_50000.csv')
-
-data = data.sort_values(["p", "d", "n"])
-
-
+from percolation.plotting.data import load, load_long
 
+data = load("projections_2D_50000")
 
+# long format (rep,n,d,p,angle,value), completed by the angle sweeps of the python engine
+long_data = load_long("projection")
@@ -0,0 +1,408 @@
+// Draws the figures of a page from its data bundle (data/<page>.json and data/<page>.bin.gz,
+// written by python -m percolation.plotting bundle) on a canvas in place of the image #graph,
+// so that switching tabs redraws from the arrays already loaded.
+// Drag a rectangle to zoom in, scroll to zoom around the pointer, double click to reset the
+// view; the point nearest to the pointer is shown with its curve. The images that have no
+// figure in the bundle (or every image, if the bundle can not be loaded) are shown as before.
+
+var plot = (function(){
+    var page = document.currentScript.getAttribute("data-page");
+    var graph = document.getElementById("graph");
+    var canvas = document.createElement("canvas");
+    canvas.id = "canvas";
+    canvas.style.display = "none";
+    graph.parentNode.insertBefore(canvas, graph);
+    var context = canvas.getContext("2d");
+
+    var bundle = null;      // {slices, figures}
+    var values = null;      // Float32Array of the slices
+    var ready = false;      // whether the bundle was loaded (or failed to)
+    var pending = null;     // image asked for before it was
+    var figure = null;      // figure drawn
+    var view = null;        // {x0, x1, y0, y1} of the figure drawn
+    var hover = null;       // {series, index} of the point nearest to the pointer
+    var drag = null;        // {x0, y0, x1, y1} of the zoom rectangle, in pixels
+    var box = null;         // {left, top, width, height} of the axes, in pixels
+
+    function column(k){
+        var s = bundle.slices[k];
+        return values.subarray(s[0], s[0] + s[1]);
+    }
+
+    function unshuffle(planes){
+        // the bytes of the float32 values are stored plane by plane
+        var count = planes.length / 4;
+        var bytes = new Uint8Array(planes.length);
+        for(var j = 0; j < 4; j++){
+            for(var i = 0; i < count; i++){
+                bytes[4*i + j] = planes[j*count + i];
+            }
+        }
+        return new Float32Array(bytes.buffer);
+    }
+
+    function inflate(buffer){
+        var bytes = new Uint8Array(buffer);
+        if(bytes[0] != 0x1f || bytes[1] != 0x8b){
+            // already decompressed by the server
+            return Promise.resolve(bytes);
+        }
+        var stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+        return new Response(stream).arrayBuffer().then(function(b){ return new Uint8Array(b); });
+    }
+
+    function load(){
+        if(!page || !window.DecompressionStream){
+            return Promise.reject(new Error("no bundle"));
+        }
+        return Promise.all([
+            fetch("data/" + page + ".json").then(function(r){ return r.json(); }),
+            fetch("data/" + page + ".bin.gz").then(function(r){ return r.arrayBuffer(); }).then(inflate)
+        ]).then(function(r){
+            bundle = r[0];
+            values = unshuffle(r[1]);
+        });
+    }
+
+    function show(path){
+        if(!ready){
+            pending = path;
+            return;
+        }
+        var image = path.split("data_visualization/")[1];
+        if(bundle && bundle.figures[image]){
+            figure = bundle.figures[image];
+            view = home(figure);
+            hover = null;
+            graph.style.display = "none";
+            canvas.style.display = "block";
+            draw();
+        }
+        else{
+            figure = null;
+            canvas.style.display = "none";
+            graph.style.display = "";
+            graph.src = path;
+        }
+    }
+
+    function home(f){
+        var x0 = Infinity, x1 = -Infinity, y0 = Infinity, y1 = -Infinity;
+        f.series.forEach(function(s){
+            var x = column(s.x);
+            [s.y, s.low, s.high].forEach(function(k){
+                if(k === null){
+                    return;
+                }
+                var y = column(k);
+                for(var i = 0; i < y.length; i++){
+                    if(isFinite(x[i]) && isFinite(y[i])){
+                        x0 = Math.min(x0, x[i]); x1 = Math.max(x1, x[i]);
+                        y0 = Math.min(y0, y[i]); y1 = Math.max(y1, y[i]);
+                    }
+                }
+            });
+        });
+        if(!isFinite(x0)){
+            x0 = 0; x1 = 1; y0 = 0; y1 = 1;
+        }
+        var pad = (y1 - y0) * 0.05 || 0.5;
+        var v = {x0: x0, x1: x1, y0: y0 - pad, y1: y1 + pad};
+        if(f.xlim){
+            v.x0 = f.xlim[0]; v.x1 = f.xlim[1];
+        }
+        if(f.ylim){
+            v.y0 = f.ylim[0]; v.y1 = f.ylim[1];
+        }
+        if(v.x1 == v.x0){
+            v.x0 -= 0.5; v.x1 += 0.5;
+        }
+        return v;
+    }
+
+    function px(x){ return box.left + (x - view.x0) / (view.x1 - view.x0) * box.width; }
+    function py(y){ return box.top + (view.y1 - y) / (view.y1 - view.y0) * box.height; }
+    function vx(p){ return view.x0 + (p - box.left) / box.width * (view.x1 - view.x0); }
+    function vy(p){ return view.y1 - (p - box.top) / box.height * (view.y1 - view.y0); }
+
+    function ticks(a, b){
+        var raw = (b - a) / 6;
+        var power = Math.pow(10, Math.floor(Math.log10(raw)));
+        var step = [1, 2, 5, 10].map(function(m){ return m*power; }).find(function(s){ return s >= raw; });
+        var t = [];
+        for(var v = Math.ceil(a / step) * step; v <= b + step*1e-9; v += step){
+            t.push(Math.abs(v) < step*1e-9 ? 0 : v);
+        }
+        return t;
+    }
+
+    function label(v){
+        return Math.abs(v) >= 1e4 || (v != 0 && Math.abs(v) < 1e-3) ? v.toExponential(1) : +v.toPrecision(4) + "";
+    }
+
+    function draw(){
+        var ratio = window.devicePixelRatio || 1;
+        var width = canvas.clientWidth;
+        var height = Math.round(width * 4.8 / 8.4);
+        canvas.width = width * ratio;
+        canvas.height = height * ratio;
+        canvas.style.height = height + "px";
+        context.setTransform(ratio, 0, 0, ratio, 0, 0);
+        var legend = figure.legend == "outside" ? Math.min(160, width * 0.25) : 0;
+        var titles = figure.title.split("\n");
+        box = {left: 70, top: 14 + 18*titles.length, width: width - 90 - legend, height: 0};
+        box.height = height - box.top - 48;
+        context.fillStyle = "white";
+        context.fillRect(0, 0, width, height);
+        context.font = "14px sans-serif";
+        context.fillStyle = "black";
+        context.textAlign = "center";
+        titles.forEach(function(t, i){ context.fillText(t, box.left + box.width/2, 20 + 18*i); });
+
+        context.save();
+        context.beginPath();
+        context.rect(box.left, box.top, box.width, box.height);
+        context.clip();
+        figure.series.forEach(function(s){
+            var x = column(s.x);
+            if(s.low !== null){
+                band(x, column(s.low), column(s.high), s.color);
+            }
+            line(x, column(s.y), s.color);
+        });
+        context.restore();
+
+        axes();
+        if(figure.legend == "outside"){
+            legendBox(box.left + box.width + 16, box.top, legend - 16);
+        }
+        else{
+            legendBox(box.left + box.width - 130, box.top + 8, 122);
+        }
+        if(hover){
+            point();
+        }
+        if(drag){
+            context.strokeStyle = "rgba(0, 0, 0, 0.5)";
+            context.setLineDash([4, 3]);
+            context.strokeRect(drag.x0, drag.y0, drag.x1 - drag.x0, drag.y1 - drag.y0);
+            context.setLineDash([]);
+        }
+    }
+
+    function line(x, y, color){
+        context.strokeStyle = color;
+        context.fillStyle = color;
+        context.lineWidth = 1.5;
+        context.beginPath();
+        var open = false;
+        for(var i = 0; i < x.length; i++){
+            if(!isFinite(y[i])){
+                open = false;
+                continue;
+            }
+            if(open){
+                context.lineTo(px(x[i]), py(y[i]));
+            }
+            else{
+                context.moveTo(px(x[i]), py(y[i]));
+            }
+            open = true;
+        }
+        context.stroke();
+        if(figure.marker){
+            for(var j = 0; j < x.length; j++){
+                if(isFinite(y[j])){
+                    context.beginPath();
+                    context.arc(px(x[j]), py(y[j]), 3, 0, 2*Math.PI);
+                    context.fill();
+                }
+            }
+        }
+    }
+
+    function band(x, low, high, color){
+        context.fillStyle = color;
+        context.globalAlpha = 0.3;
+        var start = 0;
+        // one polygon per run of finite values
+        for(var i = 0; i <= x.length; i++){
+            if(i < x.length && isFinite(low[i]) && isFinite(high[i])){
+                continue;
+            }
+            if(i - start > 1){
+                context.beginPath();
+                for(var j = start; j < i; j++){
+                    context.lineTo(px(x[j]), py(high[j]));
+                }
+                for(var k = i - 1; k >= start; k--){
+                    context.lineTo(px(x[k]), py(low[k]));
+                }
+                context.fill();
+            }
+            start = i + 1;
+        }
+        context.globalAlpha = 1;
+    }
+
+    function axes(){
+        context.strokeStyle = "black";
+        context.fillStyle = "black";
+        context.lineWidth = 1;
+        context.strokeRect(box.left, box.top, box.width, box.height);
+        context.font = "12px sans-serif";
+        context.textAlign = "center";
+        ticks(view.x0, view.x1).forEach(function(t){
+            var p = px(t);
+            context.beginPath(); context.moveTo(p, box.top + box.height); context.lineTo(p, box.top + box.height + 5); context.stroke();
+            context.fillText(label(t), p, box.top + box.height + 18);
+        });
+        context.textAlign = "right";
+        ticks(view.y0, view.y1).forEach(function(t){
+            var p = py(t);
+            context.beginPath(); context.moveTo(box.left - 5, p); context.lineTo(box.left, p); context.stroke();
+            context.fillText(label(t), box.left - 8, p + 4);
+        });
+        context.font = "13px sans-serif";
+        context.textAlign = "center";
+        context.fillText(figure.xlabel, box.left + box.width/2, box.top + box.height + 38);
+        context.save();
+        context.translate(16, box.top + box.height/2);
+        context.rotate(-Math.PI/2);
+        context.fillText(figure.ylabel, 0, 0);
+        context.restore();
+    }
+
+    function legendBox(left, top, width){
+        var rows = Math.max(1, Math.floor(box.height / 16));
+        var shown = figure.series.slice(0, rows);
+        context.font = "12px sans-serif";
+        context.textAlign = "left";
+        if(figure.legend != "outside"){
+            context.fillStyle = "rgba(255, 255, 255, 0.8)";
+            context.fillRect(left - 4, top - 4, width, 16*shown.length + 6);
+        }
+        shown.forEach(function(s, i){
+            context.fillStyle = s.color;
+            context.fillRect(left, top + 16*i + 4, 18, 3);
+            context.fillStyle = "black";
+            context.fillText(s.label, left + 24, top + 16*i + 10);
+        });
+    }
+
+    function point(){
+        var s = figure.series[hover.series];
+        var x = column(s.x)[hover.index], y = column(s.y)[hover.index];
+        var p = px(x), q = py(y);
+        context.strokeStyle = s.color;
+        context.lineWidth = 2;
+        context.beginPath();
+        context.arc(p, q, 5, 0, 2*Math.PI);
+        context.stroke();
+        var text = s.label + ": " + label(x) + ", " + label(y);
+        if(s.low !== null){
+            text += " [" + label(column(s.low)[hover.index]) + ", " + label(column(s.high)[hover.index]) + "]";
+        }
+        context.font = "12px sans-serif";
+        var w = context.measureText(text).width + 10;
+        var left = Math.min(p + 10, box.left + box.width - w);
+        var top = q > box.top + 30 ? q - 28 : q + 10;
+        context.fillStyle = "rgba(255, 255, 255, 0.9)";
+        context.fillRect(left, top, w, 20);
+        context.strokeStyle = "gray";
+        context.lineWidth = 1;
+        context.strokeRect(left, top, w, 20);
+        context.fillStyle = "black";
+        context.textAlign = "left";
+        context.fillText(text, left + 5, top + 14);
+    }
+
+    function nearest(p, q){
+        var best = null, distance = 20*20;
+        figure.series.forEach(function(s, k){
+            var x = column(s.x), y = column(s.y);
+            for(var i = 0; i < x.length; i++){
+                if(!isFinite(y[i])){
+                    continue;
+                }
+                var dx = px(x[i]) - p, dy = py(y[i]) - q;
+                if(dx*dx + dy*dy < distance && x[i] >= view.x0 && x[i] <= view.x1){
+                    distance = dx*dx + dy*dy;
+                    best = {series: k, index: i};
+                }
+            }
+        });
+        return best;
+    }
+
+    function position(event){
+        var r = canvas.getBoundingClientRect();
+        return [event.clientX - r.left, event.clientY - r.top];
+    }
+
+    canvas.addEventListener("mousedown", function(event){
+        var p = position(event);
+        drag = {x0: p[0], y0: p[1], x1: p[0], y1: p[1]};
+    });
+    canvas.addEventListener("mousemove", function(event){
+        if(!figure){
+            return;
+        }
+        var p = position(event);
+        if(drag){
+            drag.x1 = p[0];
+            drag.y1 = p[1];
+            hover = null;
+        }
+        else{
+            hover = nearest(p[0], p[1]);
+        }
+        draw();
+    });
+    window.addEventListener("mouseup", function(){
+        if(!drag){
+            return;
+        }
+        if(Math.abs(drag.x1 - drag.x0) > 5 && Math.abs(drag.y1 - drag.y0) > 5){
+            view = {x0: vx(Math.min(drag.x0, drag.x1)), x1: vx(Math.max(drag.x0, drag.x1)),
+                    y0: vy(Math.max(drag.y0, drag.y1)), y1: vy(Math.min(drag.y0, drag.y1))};
+        }
+        drag = null;
+        draw();
+    });
+    canvas.addEventListener("wheel", function(event){
+        event.preventDefault();
+        var p = position(event);
+        var x = vx(p[0]), y = vy(p[1]);
+        var scale = event.deltaY > 0 ? 1.2 : 1/1.2;
+        view = {x0: x - (x - view.x0)*scale, x1: x + (view.x1 - x)*scale,
+                y0: y - (y - view.y0)*scale, y1: y + (view.y1 - y)*scale};
+        draw();
+    }, {passive: false});
+    canvas.addEventListener("dblclick", function(){
+        view = home(figure);
+        draw();
+    });
+    canvas.addEventListener("mouseleave", function(){
+        hover = null;
+        if(figure){
+            draw();
+        }
+    });
+    window.addEventListener("resize", function(){
+        if(figure){
+            draw();
+        }
+    });
+
+    load().catch(function(){
+        bundle = null;
+    }).then(function(){
+        ready = true;
+        if(pending){
+            show(pending);
+        }
+    });
+
+    return {show: show};
+})();
@@ -42,5 +42,7 @@ function updateGraph(){
     
     path += ".png"
     //console.log(path);
-    graph.src = path;
+    plot.show(path);
 }
+
+updateGraph();
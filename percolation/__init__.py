@@ -0,0 +1,27 @@
+"""
+Batched NumPy simulation engines for fractal percolation.
+
+The Julia scripts at the root of the repository simulate one realization at a
+time; the modules of this package work on batches of realizations stored as
+boolean arrays of shape (B, m, m), with m = n**d.
+
+The engines are imported on first use (percolation.batches, ...), so that the
+command lines that do not simulate (percolation.plotting list) do not import NumPy.
+The intersection and projection functions are in their modules of the same name.
+"""
+import importlib
+
+
+_EXPORTS = {
+    "fractal_percolation_2d": "percolation.fractal_percolation",
+    "batches": "percolation.fractal_percolation",
+    "addressed_percolation": "percolation.fractal_percolation",
+    "intersection_lengths_2d": "percolation.intersection",
+    "projection_intervals_2d": "percolation.projection",
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError("module 'percolation' has no attribute " + repr(name))
@@ -0,0 +1,211 @@
+"""
+Angle sweeps of the intersection and projection lengths.
+
+Every angle is evaluated on the same batches of realizations, and as the percolation is
+invariant in law under transposition, the angles a and 90-a have the same expected length:
+only the folded angles min(a, 90-a) are computed.
+
+Results are appended in long format (rep,n,d,p,angle,value), for example:
+
+    python -m percolation.angles intersection 2 3 --angles 0:90:0.5
+
+With --all-depths, the rows of the depths 1, ..., d are measured on the levels of the same
+realizations.
+
+With --addressed, every draw is addressed by (seed, n, d, p, dim, index of the realization,
+level, node) (see philox.py), as by crossings.py, and the lengths of the realizations are
+summed exactly (see philox.exact_totals): the values do not depend on the batches or the
+number of workers, to the last digit.
+"""
+import argparse
+import functools
+
+import numpy as np
+
+from percolation.fractal_percolation import fractal_percolation_2d, truncations, generator, batches
+from percolation.philox import addressed as addressed_rows, campaign_key, exact_totals
+from percolation.intersection import intersection_lengths_2d, intersection
+from percolation.projection import projection_intervals_2d, projection
+from percolation.engine import set_engine, add_engine_argument
+from percolation.parallel import worker_pool
+from percolation.profiling import stage, count, cell, add_trace_arguments, start_from_arguments
+from percolation.store import store_writer
+from percolation.save_utils import entitle_file, experiment_name, p_grid
+
+
+OBSERVABLES = {
+    "intersection": (intersection_lengths_2d, intersection),
+    "projection": (projection_intervals_2d, projection),
+}
+FILE_NAMES = {
+    "intersection": "data/intersections_2D_angles.csv",
+    "projection": "data/projections_2D_angles.csv",
+}
+HEADER = "rep,n,d,p,angle,value"
+
+
+def fold_angles(angles):
+    """
+    Folds the angles (in degrees, within [0, 90]) onto [0, 45] using the a <-> 90-a symmetry.
+    Returns the distinct folded angles and, for each angle, the index of its folded angle.
+
+    >>> fold_angles([0, 30, 60, 90, 45])
+    (array([ 0., 30., 45.]), array([0, 1, 1, 0, 2]))
+    """
+    angles = np.asarray(angles, dtype=float)
+    if np.any((angles < 0) | (angles > 90)):
+        raise ValueError("angles must lie within [0, 90] degrees")
+    return np.unique(np.minimum(angles, 90-angles), return_inverse=True)
+
+
+def angle_sweep(observable, n, d, p, angles, rep, rng=None):
+    """
+    Calculates the average observable ("intersection" or "projection") length for each angle
+    (in degrees) in a depth d percolation of an n*n grid with probability p, using rep experiments.
+    """
+    geometry, measure = OBSERVABLES[observable]
+    folded, inverse = fold_angles(angles)
+    rng = generator(rng)
+    shapes = [geometry(n, d, a) for a in folded]
+    total = np.zeros(len(folded))
+    for size in batches(rep, n**(2*d)):
+        count("batches")
+        P = fractal_percolation_2d(n, p, d, size, rng)
+        with stage(observable):
+            for k, shape in enumerate(shapes):
+                total[k] += measure(P, shape).sum()
+    return (total/rep)[inverse]
+
+
+def angle_totals(observable, n, d, p, angles, rep, rng=None):
+    """Calculates the total observable length for each angle over rep experiments (see angle_sweep)."""
+    return angle_sweep(observable, n, d, p, angles, rep, rng) * rep
+
+
+def coupled_angle_totals(observable, n, d, p, angles, rep, rng=None):
+    """
+    Calculates the total observable length for each depth 1, ..., d and angle (array of
+    shape (d, len(angles))) on the same rep depth d percolations, each depth k being measured
+    on the level k of the realizations.
+    """
+    geometry, measure = OBSERVABLES[observable]
+    folded, inverse = fold_angles(angles)
+    rng = generator(rng)
+    shapes = [[geometry(n, k, a) for a in folded] for k in range(1, d+1)]
+    total = np.zeros((d, len(folded)))
+    for size in batches(rep, n**(2*d)):
+        count("batches")
+        for k, P in enumerate(truncations(n, p, d, 2, size, rng)):
+            with stage(observable):
+                for a, shape in enumerate(shapes[k]):
+                    total[k, a] += measure(P, shape).sum()
+    return total[:, inverse]
+
+
+def angle_rows(observable, n, d, p, angles, rep, rng=None, all_depths=False):
+    """
+    Calculates the observable length for each angle of each of rep experiments (array of
+    shape (rep, len(angles))), or for each of their depths 1, ..., d and angle if all_depths
+    (shape (rep, d*len(angles)), see coupled_angle_totals).
+    """
+    geometry, measure = OBSERVABLES[observable]
+    folded, inverse = fold_angles(angles)
+    rng = generator(rng)
+    depths = range(1, d+1) if all_depths else [d]
+    shapes = [[geometry(n, k, a) for a in folded] for k in depths]
+    rows = np.zeros((rep, len(depths), len(folded)))
+    first = 0
+    for size in batches(rep, n**(2*d)):
+        count("batches")
+        levels = truncations(n, p, d, 2, size, rng) if all_depths else [fractal_percolation_2d(n, p, d, size, rng)]
+        for k, P in enumerate(levels):
+            with stage(observable):
+                for a, shape in enumerate(shapes[k]):
+                    rows[first:first + size, k, a] = measure(P, shape)
+        first += size
+    return rows[:, :, inverse].reshape(rep, -1)
+
+
+def save_angle_sweep(observable, n, d, angles, rep, file_name=None, ps=None, rng=None, workers=1, store=None,
+                     all_depths=False, addressed=False):
+    """
+    Appends the angle sweep of observable for each probability of ps (default p_grid())
+    to file_name (and to the results store in the directory store, if given), in long
+    format (one row per angle), simulated by workers processes. If all_depths, the rows of
+    the depths 1, ..., d are written, measured on the same realizations (see
+    coupled_angle_totals). If addressed, the draws are addressable (see
+    philox.Realizations), rng being the seed of the campaign (printed if drawn) and the
+    lengths of the realizations being summed exactly (see angle_rows).
+    """
+    file_name = file_name or FILE_NAMES[observable]
+    ps = p_grid() if ps is None else ps
+    if addressed:
+        seed = int(np.random.SeedSequence(rng).entropy) % 2**63
+        print("seed=", seed, sep="")
+    rng = np.random.default_rng(rng)
+    print("n=", n, " d=", d, " rep=", rep, sep="")
+    entitle_file(file_name, HEADER)
+    batch = batches(rep, n**(2*d))[0]
+    totals = coupled_angle_totals if all_depths else angle_totals
+    with open(file_name, "a") as f, worker_pool(workers, len(angles) * (d if all_depths else 1)) as pool, \
+            store_writer(file_name, store, "angles") as writer:
+        for p in ps:
+            with cell(experiment_name(file_name), n, d, p, rep):
+                if addressed:
+                    function = functools.partial(angle_rows, observable, n, d, p, angles, all_depths=all_depths)
+                    function = functools.partial(addressed_rows, function, campaign_key(seed, n, d, p))
+                    values = (exact_totals(function(start=0, stop=rep)) if pool is None
+                              else pool.addressed(function, rep, batch)) / rep
+                elif pool is None and not all_depths:
+                    values = angle_sweep(observable, n, d, p, angles, rep, rng)
+                elif pool is None:
+                    values = totals(observable, n, d, p, angles, rep, rng) / rep
+                else:
+                    function = functools.partial(totals, observable, n, d, p, angles)
+                    values = pool.data(function, rep, batch, rng) / rep
+                depths = range(1, d+1) if all_depths else [d]
+                with stage("write"):
+                    for depth, row in zip(depths, np.reshape(values, (-1, len(angles)))):
+                        for a, v in zip(angles, row):
+                            print(rep, n, depth, repr(float(p)), repr(float(a)), repr(float(v)), sep=",", file=f)
+                            if writer:
+                                writer(rep, n, depth, p, a, v)
+
+
+def parse_angles(text):
+    """Parses "start:stop:step" (stop included) or a comma separated list of angles."""
+    if ":" in text:
+        start, stop, step = (float(x) for x in text.split(":"))
+        return np.round(np.arange(start, stop+step/2, step), 10)
+    return np.array([float(x) for x in text.split(",")])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("observable", choices=sorted(OBSERVABLES))
+    parser.add_argument("n", type=int)
+    parser.add_argument("d", type=int)
+    parser.add_argument("--angles", type=parse_angles, default=parse_angles("0:90:2"))
+    parser.add_argument("--rep", type=int, default=50000)
+    parser.add_argument("--p-step", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--store", default=None, help="also append the results to the store in this directory")
+    parser.add_argument("--file", default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--all-depths", action="store_true",
+                        help="also write the depths 1, ..., d-1, measured on the same realizations")
+    parser.add_argument("--addressed", action="store_true",
+                        help="addressable draws: the data only depends on the seed, any realization can be regenerated")
+    add_engine_argument(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    if args.engine:
+        set_engine(args.engine)
+    start_from_arguments(args)
+    save_angle_sweep(args.observable, args.n, args.d, args.angles, args.rep,
+                     args.file, p_grid(args.p_step), args.seed, args.workers, args.store, args.all_depths,
+                     args.addressed)
+
+
+if __name__ == "__main__":
+    main()
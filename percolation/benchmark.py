@@ -0,0 +1,230 @@
+"""
+Benchmarks of the engines, as in speed_selection.jl (dense and sparse variants) and
+threads_tests.jl (engine comparisons), but recorded and reproducible.
+
+Every case is timed with every engine over a grid of (n, d, p) including a probability
+close to the critical one. Each run appends its samples/s and traced memory to a results
+file (one JSON line per run, with the format version, commit and library versions), and
+is compared to a stored baseline: cases more than --tolerance slower (or larger) are
+reported as regressions, and the exit status is 1.
+
+The traced memory is the peak of the Python objects and NumPy arrays traced by tracemalloc,
+which does not see the memory allocated inside the numba kernels: it is not comparable
+between engines, and is only checked for regressions with the engines of TRACED_ENGINES. Cases missing from the baseline (or all of
+them, when there is no baseline) are reported as not compared, and the exit status is 2 if
+there is no regression. The committed benchmarks/baseline.json describes the machine it was
+recorded on (cpus, libraries): record one on the machine comparing runs first. For example:
+
+    python -m percolation.benchmark --cases crossing,complement_tree --dim 2 --save-baseline
+    python -m percolation.benchmark --cases crossing,complement_tree --dim 2
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from percolation import engine
+from percolation.fractal_percolation import fractal_percolation, batches
+from percolation.crossings import crossing_data, crossing_probability
+from percolation.blob import blob_data
+from percolation.angles import angle_sweep
+
+
+VERSION = 2
+RESULTS = "benchmarks/results.jsonl"
+BASELINE = "benchmarks/baseline.json"
+HEADER = "case,engine,dim,n,d,p,rep,time,samples_per_s,traced_memory,ratio"
+# engines whose allocations are all traced by tracemalloc (numba allocates inside its kernels)
+TRACED_ENGINES = ("numpy",)
+# (n, d) -> probabilities, the middle one being close to where half of the realizations are
+# crossed in data/crossings_{2,3}D_50000.csv
+GRID = {
+    2: {(2, 6): (0.6, 0.86, 0.95), (3, 4): (0.6, 0.8, 0.95)},
+    3: {(2, 4): (0.5, 0.65, 0.9), (3, 2): (0.4, 0.49, 0.9)},
+}
+QUICK_GRID = {
+    2: {(2, 4): (0.6, 0.83, 0.95)},
+    3: {(2, 3): (0.5, 0.61, 0.9)},
+}
+ANGLES = np.arange(0, 91, 10)
+
+
+def _generation(n, p, d, rep, dim, rng):
+    for size in batches(rep, n**(dim*d)):
+        fractal_percolation(n, p, d, dim, size, rng)
+
+
+CASES = {
+    "generation": (_generation, (2, 3)),
+    "crossing": (lambda n, p, d, rep, dim, rng: crossing_data(n, p, d, rep, dim, rng=rng, prune=False), (2, 3)),
+    "crossing_pruned": (lambda n, p, d, rep, dim, rng: crossing_data(n, p, d, rep, dim, rng=rng), (2, 3)),
+    "semi_straight": (lambda n, p, d, rep, dim, rng: crossing_data(n, p, d, rep, dim, "semi_straight", rng=rng), (2, 3)),
+    "straight": (lambda n, p, d, rep, dim, rng: crossing_data(n, p, d, rep, dim, "straight", rng=rng), (2, 3)),
+    "complement": (lambda n, p, d, rep, dim, rng:
+                   crossing_probability(n, p, d, rep, dim, complement=True, rng=rng, tree=False), (2, 3)),
+    "complement_tree": (lambda n, p, d, rep, dim, rng:
+                        crossing_probability(n, p, d, rep, dim, complement=True, rng=rng), (2, 3)),
+    "blob": (lambda n, p, d, rep, dim, rng: blob_data(n, p, d, rep, dim, rng), (2, 3)),
+    "intersection": (lambda n, p, d, rep, dim, rng: angle_sweep("intersection", n, d, p, ANGLES, rep, rng), (2,)),
+    "projection": (lambda n, p, d, rep, dim, rng: angle_sweep("projection", n, d, p, ANGLES, rep, rng), (2,)),
+}
+
+
+def case_id(case, engine_name, dim, n, d, p):
+    """Returns the key identifying a benchmark in the results and the baseline."""
+    return case + "/" + engine_name + "/" + str(dim) + "D/n=" + str(n) + "/d=" + str(d) + "/p=" + str(p)
+
+
+def measure(case, n, p, d, rep, dim=2, repeat=3, seed=0):
+    """
+    Times case on rep realizations (best of repeat runs, after a warm-up run compiling the
+    kernels), and measures the peak memory traced by tracemalloc during a run (NumPy arrays
+    and Python objects, not the allocations of the numba kernels). Returns a dictionary of
+    the measures.
+    """
+    run, _ = CASES[case]
+    run(n, p, d, rep, dim, np.random.default_rng(seed))
+    times = []
+    for _ in range(repeat):
+        rng = np.random.default_rng(seed)
+        start = time.perf_counter()
+        run(n, p, d, rep, dim, rng)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    run(n, p, d, rep, dim, np.random.default_rng(seed))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    best = min(times)
+    return {"time": best, "samples_per_s": rep/best, "traced_memory": peak}
+
+
+def metadata():
+    """Returns the description of the environment of a benchmark run."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    versions = {"python": platform.python_version(), "numpy": np.__version__}
+    if engine.available("numba"):
+        import numba
+        versions["numba"] = numba.__version__
+    return {
+        "version": VERSION,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "libraries": versions,
+    }
+
+
+def load_baseline(file_name):
+    """Returns the results of the baseline (id -> measures), or {} if there is none."""
+    if not os.path.exists(file_name):
+        return {}
+    with open(file_name) as f:
+        baseline = json.load(f)
+    if baseline.get("version") != VERSION:
+        raise ValueError(file_name + " has format version " + str(baseline.get("version")) + ", expected " + str(VERSION))
+    return baseline["results"]
+
+
+def regressions(results, baseline, tolerance=0.2):
+    """
+    Returns the ids (see case_id) of the results slower (fewer samples/s) or larger (traced
+    memory, with the engines of TRACED_ENGINES) than their baseline by more than tolerance
+    (relative), and the ids of the results without a baseline.
+
+    >>> results = {"a/numpy/2D": {"samples_per_s": 70, "traced_memory": 10},
+    ...            "b/numpy/2D": {"samples_per_s": 1, "traced_memory": 1},
+    ...            "a/numba/2D": {"samples_per_s": 100, "traced_memory": 20}}
+    >>> regressions(results, {"a/numpy/2D": {"samples_per_s": 100, "traced_memory": 10},
+    ...                       "a/numba/2D": {"samples_per_s": 100, "traced_memory": 10}})
+    (['a/numpy/2D'], ['b/numpy/2D'])
+    """
+    slow, missing = [], []
+    for key, r in results.items():
+        if key not in baseline:
+            missing.append(key)
+            continue
+        b = baseline[key]
+        larger = key.split("/")[1] in TRACED_ENGINES and r["traced_memory"] > (1+tolerance)*b["traced_memory"]
+        if r["samples_per_s"] < (1-tolerance)*b["samples_per_s"] or larger:
+            slow.append(key)
+    return slow, missing
+
+
+def save_run(results, file_name=RESULTS):
+    """Appends a run (its metadata and results) to the results file."""
+    os.makedirs(os.path.dirname(file_name) or ".", exist_ok=True)
+    with open(file_name, "a") as f:
+        print(json.dumps(dict(metadata(), results=results), sort_keys=True), file=f)
+
+
+def save_baseline(results, file_name=BASELINE):
+    """Stores the results as the baseline, keeping the baseline results of other cases."""
+    os.makedirs(os.path.dirname(file_name) or ".", exist_ok=True)
+    merged = dict(load_baseline(file_name), **results)
+    with open(file_name, "w") as f:
+        json.dump(dict(metadata(), results=merged), f, indent=1, sort_keys=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", default=",".join(CASES), help="comma separated cases among " + ", ".join(CASES))
+    parser.add_argument("--engines", default=",".join(e for e in engine.ENGINES if engine.available(e)))
+    parser.add_argument("--dim", type=int, choices=(2, 3), action="append", default=None)
+    parser.add_argument("--rep", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="use a smaller grid of (n, d, p)")
+    parser.add_argument("--file", default=RESULTS)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    grid = QUICK_GRID if args.quick else GRID
+    baseline = load_baseline(args.baseline)
+    results = {}
+    print(HEADER)
+    for case in args.cases.split(","):
+        dims = CASES[case][1]
+        for engine_name in args.engines.split(","):
+            engine.set_engine(engine_name)
+            for dim in args.dim or dims:
+                if dim not in dims:
+                    continue
+                for (n, d), ps in grid[dim].items():
+                    for p in ps:
+                        key = case_id(case, engine_name, dim, n, d, p)
+                        r = results[key] = measure(case, n, p, d, args.rep, dim, args.repeat, args.seed)
+                        ratio = r["samples_per_s"]/baseline[key]["samples_per_s"] if key in baseline else float("nan")
+                        print(case, engine_name, dim, n, d, p, args.rep, round(r["time"], 4), round(r["samples_per_s"], 1),
+                              r["traced_memory"], round(ratio, 3), sep=",", flush=True)
+    save_run(results, args.file)
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        return
+    slow, missing = regressions(results, baseline, args.tolerance)
+    if not baseline:
+        print("warning: no baseline in", args.baseline + ", nothing was compared (see --save-baseline)", file=sys.stderr)
+    else:
+        for key in missing:
+            print("warning: not in the baseline:", key, file=sys.stderr)
+    for key in slow:
+        print("regression:", key, file=sys.stderr)
+    if slow:
+        sys.exit(1)
+    if missing:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Batched blob engine, in 2D and 3D: the blob is the connected component of the center
+of the grid (the 2^dim center squares when the side is even), as in blob2D.jl / blob3D.jl.
+
+For each realization, the blob data is (vol, area, dist, step): its number of squares,
+its number of boundary faces, the maximum distance of its squares to the center (in squares)
+and the number of steps of the breadth-first search growing it. Data is appended to the same
+files as the Julia scripts, for example:
+
+    python -m percolation.blob 3 4 --dim 3
+
+With --all-depths, the rows of the depths 1, ..., d are measured on the levels of the same
+realizations.
+
+With --addressed, every draw is addressed by (seed, n, d, p, dim, index of the realization,
+level, node) (see philox.py), as by crossings.py, and the data of the realizations is summed
+exactly (see philox.exact_totals): the data does not depend on the batches or the number of
+workers, to the last digit.
+"""
+import argparse
+import functools
+
+import numpy as np
+
+from percolation.fractal_percolation import fractal_percolation, truncations, generator, shift, batches
+from percolation.philox import addressed as addressed_rows, campaign_key, exact_totals
+from percolation.engine import compiled, set_engine, add_engine_argument
+from percolation.parallel import worker_pool
+from percolation.profiling import stage, staged, count, cell, add_trace_arguments, start_from_arguments
+from percolation.store import store_writer
+from percolation.save_utils import entitle_file, experiment_name, p_grid, parse_size
+
+
+HEADER = "rep,n,d,p,sq,interior,boundary,dist,step"
+# bytes per cell held while generating and growing the blob of a realization
+BYTES_PER_CELL = 24
+MAX_MEMORY = 2**30
+
+
+def distance_to_center(n, d, dim=2):
+    """
+    Calculates the distance to center for each square of a n^d*...*n^d grid.
+
+    >>> distance_to_center(2, 1).round(6)
+    array([[0.707107, 0.707107],
+           [0.707107, 0.707107]])
+    """
+    m = n**d
+    mid = (m-1)/2
+    axes = np.meshgrid(*[np.arange(m) - mid]*dim, indexing="ij")
+    return np.sqrt(sum(x**2 for x in axes))
+
+
+def center(m, dim=2):
+    """Returns the mask of the center squares of a m^dim grid."""
+    C = np.zeros((m,)*dim, dtype=bool)
+    mid = slice(m//2 - 1, m//2 + 1) if m % 2 == 0 else slice(m//2, m//2 + 1)
+    C[(mid,)*dim] = True
+    return C
+
+
+@staged("blob")
+def blob_info(P, D):
+    """
+    Calculates the blob data (vol, area, dist, step) of each realization of the batch P
+    (shape (B, m, m) or (B, m, m, m)), D being the distance to center of each square.
+
+    >>> P = np.array([[[1, 1, 0],
+    ...                [0, 1, 1],
+    ...                [0, 0, 1]]], dtype=bool)
+    >>> blob_info(P, distance_to_center(3, 1))
+    (array([5]), array([12]), array([1.41421356]), array([3]))
+    """
+    kernels = compiled()
+    if kernels is not None:
+        moves = kernels.steps(P.ndim-1)
+        centers = np.flatnonzero(center(P.shape[1], P.ndim-1))
+        vol, area, dist, step = kernels.blob_info(np.ascontiguousarray(P), D, centers, moves,
+                                                  kernels.offsets(moves, P.shape[1]))
+        count("bfs_steps", int(step.max(initial=0)))
+        return vol, area, dist, step
+    spatial = tuple(range(1, P.ndim))
+    front = P & center(P.shape[1], P.ndim-1)
+    seen = front.copy()
+    vol = front.sum(axis=spatial)
+    area = np.zeros(len(P), dtype=np.int64)
+    dist = np.zeros(len(P))
+    step = np.zeros(len(P), dtype=np.int64)
+    closed = [(axis, s, ~shift(P, axis, -s)) for axis in spatial for s in (1, -1)]
+    while True:
+        alive = front.any(axis=spatial)
+        if not alive.any():
+            count("bfs_steps", int(step.max(initial=0)))
+            return vol, area, dist, step
+        step += alive
+        grown = np.zeros_like(front)
+        for axis, s, blocked in closed:
+            area += (front & blocked).sum(axis=spatial)
+            grown |= shift(front, axis, s)
+        front = grown & P & ~seen
+        seen |= front
+        vol += front.sum(axis=spatial)
+        dist = np.maximum(dist, np.where(front, D, 0).max(axis=spatial))
+
+
+def blob_data(n, p, d, rep, dim=2, rng=None, max_memory=MAX_MEMORY):
+    """
+    Calculates the blob data (vol, area, dist, step, sq) summed over rep depth d percolations
+    of an n^dim grid with probability p, sq being the total number of retained squares.
+    """
+    rng = generator(rng)
+    D = distance_to_center(n, d, dim)
+    vol = area = step = sq = 0
+    dist = 0.0
+    for size in batches(rep, n**(dim*d), max_memory // BYTES_PER_CELL):
+        count("batches")
+        P = fractal_percolation(n, p, d, dim, size, rng)
+        vo, ae, di, st = blob_info(P, D)
+        with stage("count"):
+            vol += int(vo.sum())
+            area += int(ae.sum())
+            dist += float(di.sum())
+            step += int(st.sum())
+            sq += int(P.sum())
+    return vol, area, dist, step, sq
+
+
+def coupled_blob_data(n, p, d, rep, dim=2, rng=None, max_memory=MAX_MEMORY):
+    """
+    Calculates the blob data (vol, area, dist, step, sq) of the depths 1, ..., d (array of
+    shape (d, 5)) on the same rep depth d percolations of an n^dim grid with probability p,
+    each depth k being measured on the level k of the realizations.
+    """
+    rng = generator(rng)
+    Ds = [distance_to_center(n, k, dim) for k in range(1, d+1)]
+    totals = np.zeros((d, 5))
+    for size in batches(rep, n**(dim*d), max_memory // BYTES_PER_CELL):
+        count("batches")
+        for k, P in enumerate(truncations(n, p, d, dim, size, rng)):
+            vo, ae, di, st = blob_info(P, Ds[k])
+            with stage("count"):
+                totals[k] += vo.sum(), ae.sum(), di.sum(), st.sum(), P.sum()
+    return totals
+
+
+def blob_rows(n, p, d, rep, dim=2, rng=None, max_memory=MAX_MEMORY, all_depths=False):
+    """
+    Calculates the blob data (vol, area, dist, step, sq) of each of rep depth d percolations
+    of an n^dim grid with probability p (array of shape (rep, 5)), or of each of their depths
+    1, ..., d if all_depths (shape (rep, 5d), see coupled_blob_data).
+    """
+    rng = generator(rng)
+    depths = range(1, d+1) if all_depths else [d]
+    Ds = [distance_to_center(n, k, dim) for k in depths]
+    rows = np.zeros((rep, len(depths), 5))
+    first = 0
+    for size in batches(rep, n**(dim*d), max_memory // BYTES_PER_CELL):
+        count("batches")
+        levels = truncations(n, p, d, dim, size, rng) if all_depths else [fractal_percolation(n, p, d, dim, size, rng)]
+        for k, P in enumerate(levels):
+            vo, ae, di, st = blob_info(P, Ds[k])
+            with stage("count"):
+                rows[first:first + size, k] = np.stack([vo, ae, di, st, P.sum(axis=tuple(range(1, P.ndim)))], axis=1)
+        first += size
+    return rows.reshape(rep, -1)
+
+
+def save_blob_data(n, d, rep, dim=2, file_name=None, ps=None, rng=None, max_memory=MAX_MEMORY, workers=1,
+                   store=None, all_depths=False, addressed=False):
+    """
+    Appends the blob data of each probability of ps (default p_grid()) to file_name (and to
+    the results store in the directory store, if given), simulated by workers processes
+    sharing the memory budget. If all_depths, the rows of the depths 1, ..., d are written,
+    measured on the same realizations (see coupled_blob_data). If addressed, the draws are
+    addressable (see philox.Realizations), rng being the seed of the campaign (printed if
+    drawn) and the data of the realizations being summed exactly (see blob_rows).
+    """
+    file_name = file_name or "data/blob_" + str(dim) + "D_" + str(rep) + ".csv"
+    ps = p_grid() if ps is None else ps
+    if addressed:
+        seed = int(np.random.SeedSequence(rng).entropy) % 2**63
+        print("seed=", seed, sep="")
+    rng = np.random.default_rng(rng)
+    print("n=", n, " d=", d, " rep=", rep, sep="")
+    entitle_file(file_name, HEADER)
+    budget = max_memory // workers
+    batch = batches(rep, n**(dim*d), budget // BYTES_PER_CELL)[0]
+    data = coupled_blob_data if all_depths else blob_data
+    with open(file_name, "a") as f, worker_pool(workers, 5*d if all_depths else 5) as pool, \
+            store_writer(file_name, store, "blob") as writer:
+        for p in ps:
+            with cell(experiment_name(file_name), n, d, p, rep):
+                if addressed:
+                    function = functools.partial(blob_rows, n, p, d, dim=dim, max_memory=budget, all_depths=all_depths)
+                    function = functools.partial(addressed_rows, function, campaign_key(seed, n, d, p, dim))
+                    totals = exact_totals(function(start=0, stop=rep)) if pool is None else pool.addressed(function, rep, batch)
+                elif pool is None:
+                    totals = data(n, p, d, rep, dim, rng, max_memory)
+                else:
+                    function = functools.partial(data, n, p, d, dim=dim, max_memory=budget)
+                    totals = pool.data(function, rep, batch, rng)
+                depths = range(1, d+1) if all_depths else [d]
+                with stage("write"):
+                    for depth, (vol, area, dist, step, sq) in zip(depths, np.reshape(totals, (-1, 5)).tolist()):
+                        vol, area, step, sq = int(vol), int(area), int(step), int(sq)
+                        print(rep, n, depth, repr(float(p)), sq, vol, area, repr(dist), step, sep=",", file=f)
+                        if writer:
+                            writer(rep, n, depth, p, sq, vol, area, dist, step)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("n", type=int)
+    parser.add_argument("d", type=int)
+    parser.add_argument("--dim", type=int, choices=(2, 3), default=2)
+    parser.add_argument("--rep", type=int, default=50000)
+    parser.add_argument("--p-step", type=float, default=0.01)
+    parser.add_argument("--max-memory", type=parse_size, default=MAX_MEMORY)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--store", default=None, help="also append the results to the store in this directory")
+    parser.add_argument("--file", default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--all-depths", action="store_true",
+                        help="also write the depths 1, ..., d-1, measured on the same realizations")
+    parser.add_argument("--addressed", action="store_true",
+                        help="addressable draws: the data only depends on the seed, any realization can be regenerated")
+    add_engine_argument(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    if args.engine:
+        set_engine(args.engine)
+    start_from_arguments(args)
+    save_blob_data(args.n, args.d, args.rep, args.dim, args.file, p_grid(args.p_step), args.seed, args.max_memory, args.workers, args.store,
+                   args.all_depths, args.addressed)
+
+
+if __name__ == "__main__":
+    main()
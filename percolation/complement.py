@@ -0,0 +1,130 @@
+"""
+Crossings of the complement computed on the tree of the percolation.
+
+A square removed at level k leaves a fully open block of the complement, so each removed
+block is a single node of a graph whose edges join adjacent blocks; the complement is
+crossed when a connected component of this graph touches the first and the last slice
+along the crossing axis. The tree, the blocks and the components are handled as sparse
+arrays for a whole batch of realizations: the cost is proportional to the number of
+removed blocks, not to the number of squares of the grid.
+"""
+import itertools
+
+import numpy as np
+
+
+def percolation_tree(n, p, d, dim=2, size=1, rng=None):
+    """
+    Returns the tree of size depth d percolations of an n^dim grid with probability p, as
+    (blocks, retained): blocks[k-1] = (samples, coords) of the squares removed at level k
+    (coords in units of level-k squares), and retained = (samples, coords) of the squares
+    of level d.
+    """
+    rng = np.random.default_rng(rng)
+    offsets = np.array(list(itertools.product(range(n), repeat=dim)))
+    samples, coords = np.arange(size), np.zeros((size, dim), dtype=np.int64)
+    blocks = []
+    for _ in range(d):
+        samples = np.repeat(samples, n**dim)
+        coords = (coords[:, None, :]*n + offsets[None]).reshape(-1, dim)
+        keep = rng.random(len(samples), dtype=np.float32) < p
+        blocks.append((samples[~keep], coords[~keep]))
+        samples, coords = samples[keep], coords[keep]
+    return blocks, (samples, coords)
+
+
+def densify(n, d, dim, size, retained):
+    """Returns the grids of shape (size, n**d, ..., n**d) of the retained squares of a tree."""
+    samples, coords = retained
+    P = np.zeros((size,) + (n**d,)*dim, dtype=bool)
+    P[(samples,) + tuple(coords.T)] = True
+    return P
+
+
+def _keys(samples, coords, side):
+    """Returns a unique integer key for each square of side side^dim grids."""
+    key = samples.astype(np.int64)
+    for x in coords.T:
+        key = key*side + x
+    return key
+
+
+def components(count, u, v):
+    """
+    Returns the label (smallest node) of the connected component of each of count nodes
+    for the edges (u, v), by hooking roots on smaller roots and pointer jumping.
+    """
+    L = np.arange(count)
+    while True:
+        lu, lv = L[u], L[v]
+        differ = lu != lv
+        if not differ.any():
+            return L
+        np.minimum.at(L, np.maximum(lu, lv)[differ], np.minimum(lu, lv)[differ])
+        while True:
+            jumped = L[L]
+            if (jumped == L).all():
+                break
+            L = jumped
+
+
+def block_edges(n, dim, blocks, connectivity="face"):
+    """
+    Returns the edges (u, v) between adjacent removed blocks, numbered in the order of blocks.
+    Each block of level k looks for the block containing each of its neighbouring level-k
+    squares, among the blocks of levels 1..k (an open square lies in a single block), skipping
+    the levels where the neighbour shares its ancestor with the block.
+    """
+    if connectivity == "full":
+        steps = [s for s in itertools.product((-1, 0, 1), repeat=dim) if any(s)]
+    else:
+        steps = [tuple(s if a == b else 0 for b in range(dim)) for a in range(dim) for s in (1, -1)]
+    steps = np.array(steps)
+    start = np.cumsum([0] + [len(s) for s, _ in blocks])
+    index = []
+    for k, (samples, coords) in enumerate(blocks, 1):
+        keys = _keys(samples, coords, n**k)
+        order = np.argsort(keys)
+        index.append((keys[order], order + start[k-1]))
+    u, v = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+    for k, (samples, coords) in enumerate(blocks, 1):
+        ids = np.arange(start[k-1], start[k])
+        for step in steps:
+            neighbour = coords + step
+            candidates = np.flatnonzero(((neighbour >= 0) & (neighbour < n**k)).all(axis=1))
+            for j in range(k, 0, -1):
+                if j < k:
+                    # the level-j ancestors shared with the block are retained
+                    shared = coords[candidates] // n**(k-j) == neighbour[candidates] // n**(k-j)
+                    candidates = candidates[~shared.all(axis=1)]
+                keys, nodes = index[j-1]
+                if not len(candidates):
+                    break
+                if not len(keys):
+                    continue
+                key = _keys(samples[candidates], neighbour[candidates] // n**(k-j), n**j)
+                pos = np.minimum(np.searchsorted(keys, key), len(keys)-1)
+                found = keys[pos] == key
+                u.append(ids[candidates[found]])
+                v.append(nodes[pos[found]])
+    return np.concatenate(u), np.concatenate(v)
+
+
+def complement_crossed(n, d, dim, size, blocks, connectivity="face"):
+    """
+    Tells which of the size realizations with removed blocks blocks (see percolation_tree)
+    have a crossing of the complement along the first axis.
+
+    >>> blocks = [(np.array([0]), np.array([[0, 1]])),
+    ...           (np.array([0, 0]), np.array([[2, 2], [3, 1]]))]
+    >>> complement_crossed(2, 2, 2, 1, blocks), complement_crossed(2, 2, 2, 1, blocks, "full")
+    (array([False]), array([ True]))
+    """
+    samples = np.concatenate([s for s, _ in blocks])
+    first = np.concatenate([c[:, 0] == 0 for _, c in blocks])
+    last = np.concatenate([c[:, 0] == n**k - 1 for k, (_, c) in enumerate(blocks, 1)])
+    L = components(len(samples), *block_edges(n, dim, blocks, connectivity))
+    crossing = np.intersect1d(L[first], L[last])
+    crossed = np.zeros(size, dtype=bool)
+    crossed[samples[crossing]] = True
+    return crossed
@@ -0,0 +1,102 @@
+"""
+Consolidation of the data files: the probabilities are put on the decimal grid of the
+store (see store.py), the rows of the same (n, d, p) (and angle) are merged, and the rows
+are written sorted, with a compact binary twin (NumPy structured array, .npy) of each file.
+
+Merged rows add their numbers of experiments (rep) and their totals (crossings, lengths,
+squares, blob data...); the intersection/projection averages are averaged, weighted by rep.
+For example:
+
+    python -m percolation.consolidate data/crossings_2D_50000.csv --output consolidated
+    python -m percolation.consolidate data/*.csv --in-place
+"""
+import argparse
+import os
+
+import numpy as np
+
+from percolation.store import SCHEMAS, header, csv_line, parse_csv_line, schema_name
+from percolation.save_utils import experiment_name
+
+
+# fields holding averages over the experiments of a row (the others are totals)
+AVERAGES = ("value", "values")
+
+
+def read_csv(file_name, schema=None):
+    """Returns the rows of a CSV data file, with the schema of its experiment."""
+    dtype = SCHEMAS[schema or schema_name(experiment_name(file_name))]
+    with open(file_name) as f:
+        next(f)
+        return np.array([parse_csv_line(line, dtype) for line in f if line.strip()], dtype=dtype)
+
+
+def consolidate(rows):
+    """
+    Returns the rows merged by (n, d, p_key) (and angle), sorted.
+
+    >>> rows = np.array([(10, 2, 1, 300000, 1, 2, 30), (10, 2, 1, 100000, 0, 0, 9),
+    ...                  (5, 2, 1, 300000, 2, 4, 14)], dtype=SCHEMAS["crossings"])
+    >>> consolidate(rows)[["rep", "p_key", "nc", "lc", "sq"]].tolist()
+    [(10, 100000, 0, 0, 9), (15, 300000, 3, 6, 44)]
+    """
+    keys = [f for f in ("n", "d", "p_key", "angle") if f in rows.dtype.names]
+    unique, inverse = np.unique(rows[keys], return_inverse=True)
+    merged = np.zeros(len(unique), dtype=rows.dtype)
+    for f in keys:
+        merged[f] = unique[f]
+    np.add.at(merged["rep"], inverse, rows["rep"])
+    for f in rows.dtype.names:
+        if f in keys or f == "rep":
+            continue
+        if f in AVERAGES:
+            weight = rows["rep"].reshape((-1,) + (1,)*(rows[f].ndim-1))
+            np.add.at(merged[f], inverse, rows[f]*weight)
+            merged[f] /= np.maximum(merged["rep"], 1).reshape((-1,) + (1,)*(rows[f].ndim-1))
+        else:
+            np.add.at(merged[f], inverse, rows[f])
+    return merged
+
+
+def write_csv(file_name, rows, schema):
+    """Writes rows to the CSV file file_name (atomically, through a temporary file)."""
+    tmp = file_name + ".tmp"
+    with open(tmp, "w") as f:
+        print(header(schema), file=f)
+        for row in rows:
+            print(csv_line(row), file=f)
+    os.replace(tmp, file_name)
+
+
+def consolidate_file(file_name, output, schema=None):
+    """
+    Consolidates a CSV data file into output (a CSV file), and writes its binary twin
+    (output with the extension .npy). Returns the numbers of rows before and after.
+    """
+    schema = schema or schema_name(experiment_name(file_name))
+    rows = read_csv(file_name, schema)
+    merged = consolidate(rows)
+    write_csv(output, merged, schema)
+    np.save(os.path.splitext(output)[0] + ".npy", merged)
+    return len(rows), len(merged)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--output", default=None, help="directory of the consolidated files")
+    parser.add_argument("--in-place", action="store_true", help="replace the files by their consolidated version")
+    parser.add_argument("--schema", choices=sorted(SCHEMAS), default=None)
+    args = parser.parse_args()
+    if not args.in_place and args.output is None:
+        parser.error("give --output or --in-place")
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+    for file_name in args.files:
+        output = file_name if args.in_place else os.path.join(args.output, os.path.basename(file_name))
+        before, after = consolidate_file(file_name, output, args.schema)
+        print(file_name, "->", output, before, "rows,", before-after, "merged")
+
+
+if __name__ == "__main__":
+    main()
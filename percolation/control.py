@@ -0,0 +1,313 @@
+"""
+Control variates of the crossing and blob sweeps.
+
+The number Z_k of retained squares of the level k of a realization has the known mean
+(n^dim p)^k (each square of a level has n^dim sub-squares, each kept with probability p),
+and is correlated with the crossings and the blob. The mean of each observable y is adjusted
+by regression on the controls Z_1, ..., Z_d:
+
+    adjusted = mean(y) - beta . (mean(Z) - E[Z]),    beta = Cov(Z)^-1 Cov(Z, y),
+
+whose variance is the variance of the residual of the regression: the variance reduction
+factor of y is Var(y) / Var(y - beta . Z). The estimator only needs the totals of the
+observables, of the controls and of their products, which add up over batches and workers
+(the controls are divided by their means in the products, which would reach 2^53 otherwise).
+
+The intersection and projection lengths of the angle sweeps (2D) are adjusted the same way,
+each angle being an observable (the controls are the squares of the same realizations).
+
+The sweeps run rounds of realizations until the adjusted standard error of the first
+observable (the crossing probability, the average interior of the blob, or the length of
+the first angle) is at most target_error, or max_rep realizations are simulated. As rounds without any crossing (or
+with crossings only) have a standard error of 0, their error is taken as that of a
+proportion given one more success and one more failure. The raw totals are appended to the data
+file as by crossings.py, blob.py and angles.py, the means (raw and adjusted) and the factors
+to the table of the experiment in the directory control/ of the data file, for example:
+
+    python -m percolation.control crossings 3 5 --target-error 0.002 --max-rep 50000
+    python -m percolation.control projection 3 4 --angles 0:45:15
+"""
+import argparse
+import functools
+import os
+
+import numpy as np
+
+from percolation.fractal_percolation import refine, grow_counts, truncations, batches
+from percolation.crossings import crossing, coarse_blocked, data_file_name, KINDS, CONNECTIVITIES, \
+    HEADER as CROSSING_HEADER, BYTES_PER_CELL as CROSSING_BYTES_PER_CELL
+from percolation.blob import blob_info, distance_to_center, HEADER as BLOB_HEADER, \
+    BYTES_PER_CELL as BLOB_BYTES_PER_CELL
+from percolation.angles import OBSERVABLES as ANGLE_OBSERVABLES, FILE_NAMES as ANGLE_FILE_NAMES, \
+    HEADER as ANGLE_HEADER, fold_angles, parse_angles
+from percolation.engine import set_engine, add_engine_argument
+from percolation.parallel import worker_pool
+from percolation.profiling import stage, count, cell, add_trace_arguments, start_from_arguments
+from percolation.save_utils import entitle_file, experiment_name, p_grid, parse_size
+
+
+EXPERIMENTS = ("crossings", "blob")
+# observables of the realizations of each experiment (the first one sets the stopping rule;
+# the angle sweeps have one observable per angle)
+OBSERVABLES = {"crossings": ("crossed", "length"), "blob": ("interior", "boundary", "dist", "step")}
+# bytes per cell of each experiment (the angle sweeps hold their grids as the crossings do)
+BYTES_PER_CELL = {"crossings": CROSSING_BYTES_PER_CELL, "blob": BLOB_BYTES_PER_CELL,
+                  "intersection": CROSSING_BYTES_PER_CELL, "projection": CROSSING_BYTES_PER_CELL}
+HEADER = "rep,n,d,p,observable,mean,se,adjusted,adjusted_se,factor"
+MAX_MEMORY = 2**30
+
+
+def crossing_samples(n, p, d, size, dim=2, kind="crossing", complement=False, connectivity="face", rng=None,
+                     top=None):
+    """
+    Returns the observables (crossed, length) (shape (size, 2)) and the numbers of retained
+    squares of each level (shape (size, d)) of size depth d percolations of an n^dim grid with
+    probability p. Realizations that can not be crossed are dropped at a coarse level (not the
+    complement), the numbers of squares of their deeper levels being drawn. If top is given
+    (shape (size, n, ..., n)), it is the level 1 of the realizations.
+    """
+    rng = np.random.default_rng(rng)
+    Z = np.zeros((size, d), dtype=np.int64)
+    lengths = np.zeros(size, dtype=np.int64)
+    index = np.arange(size)
+    dropped, counts = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    spatial = tuple(range(1, dim+1))
+    P = np.ones((size,) + (1,)*dim, dtype=bool)
+    for k in range(d):
+        P = refine(P, n, p, rng) if k or top is None else top
+        with stage("count"):
+            Z[index, k] = P.sum(axis=spatial)
+            counts = grow_counts(counts, n**dim, p, 1, rng) if k else counts
+            Z[dropped, k] = counts
+        if k < d-1 and not complement:
+            with stage("pruning"):
+                done = coarse_blocked(P, kind)
+                if done.any():
+                    dropped, counts = np.r_[dropped, index[done]], np.r_[counts, Z[index[done], k]]
+                    P, index = P[~done], index[~done]
+    lengths[index] = crossing(P, kind, complement, connectivity)
+    return np.stack([lengths != 0, lengths], -1), Z
+
+
+def blob_samples(n, p, d, size, dim=2, rng=None, top=None):
+    """
+    Returns the blob data (vol, area, dist, step) (shape (size, 4)) and the numbers of retained
+    squares of each level (shape (size, d)) of size depth d percolations of an n^dim grid with
+    probability p (whose level 1 is top, if given).
+    """
+    Z = np.zeros((size, d), dtype=np.int64)
+    for k, P in enumerate(truncations(n, p, d, dim, size, rng, top)):
+        with stage("count"):
+            Z[:, k] = P.sum(axis=tuple(range(1, dim+1)))
+    return np.stack(blob_info(P, distance_to_center(n, d, dim)), -1), Z
+
+
+def angle_samples(observable, n, p, d, size, angles, rng=None, top=None):
+    """
+    Returns the observable ("intersection" or "projection") lengths of each angle (shape
+    (size, len(angles))) and the numbers of retained squares of each level (shape (size, d))
+    of size depth d percolations of an n*n grid with probability p (whose level 1 is top, if
+    given).
+    """
+    geometry, measure = ANGLE_OBSERVABLES[observable]
+    folded, inverse = fold_angles(angles)
+    Z = np.zeros((size, d), dtype=np.int64)
+    for k, P in enumerate(truncations(n, p, d, 2, size, rng, top)):
+        with stage("count"):
+            Z[:, k] = P.sum(axis=(1, 2))
+    with stage(observable):
+        Y = np.stack([measure(P, geometry(n, d, a)) for a in folded], -1)
+    return Y[:, inverse], Z
+
+
+def control_means(n, p, d, dim=2):
+    """Returns the means (n^dim p)^k of the controls Z_1, ..., Z_d."""
+    return np.array([(n**dim * p)**k for k in range(1, d+1)], dtype=np.float64)
+
+
+def scales(means):
+    """Returns the scales of the controls of means in the products (their means, or 1 if 0)."""
+    means = np.asarray(means, dtype=np.float64)
+    return np.where(means > 0, means, 1)
+
+
+def moments(Y, Z, means=None):
+    """
+    Returns the totals of the observables Y (shape (N, m)) and the controls Z (shape (N, K))
+    of known means: N, the sums of Y, Z, Y^2, of the products Y Z and Z Z, as a flat array,
+    the controls being divided by their scales (see scales) in the products.
+    """
+    Y, Z = np.asarray(Y, dtype=np.float64), np.asarray(Z, dtype=np.float64)
+    S = Z / scales(np.zeros(Z.shape[1]) if means is None else means)
+    return np.concatenate([[len(Y)], Y.sum(0), Z.sum(0), (Y**2).sum(0), (Y.T @ S).ravel(), (S.T @ S).ravel()])
+
+
+def width(m, K):
+    """Returns the length of the totals of moments for m observables and K controls."""
+    return 1 + 2*m + K + m*K + K*K
+
+
+def adjusted(totals, m, means):
+    """
+    Returns (mean, se, adjusted, adjusted_se, factor) of each of the m observables of the
+    totals (see moments), the controls having the known means.
+
+    >>> rng = np.random.default_rng(0)
+    >>> Z = rng.normal(size=(10000, 1))
+    >>> Y = 2*Z + rng.normal(scale=0.1, size=(10000, 1))
+    >>> mean, se, adjusted_mean, adjusted_se, factor = adjusted(moments(Y, Z), 1, [0.0])
+    >>> bool(abs(adjusted_mean[0]) < 0.003), bool(300 < factor[0] < 500)
+    (True, True)
+    >>> W = 1e6 * (1 + Z)
+    >>> bool(np.allclose(adjusted(moments(Y, W, [1e6]), 1, [1e6]), adjusted(moments(Y, Z), 1, [0.0])))
+    True
+    """
+    means = np.asarray(means, dtype=np.float64)
+    K = len(means)
+    N = totals[0]
+    sy, sz, syy, syz, szz = np.split(totals[1:], np.cumsum([m, K, m, m*K]))
+    # the products hold the controls divided by their scales
+    scale = scales(means)
+    y, z = sy / N, sz / N / scale
+    variance = syy / N - y**2
+    cyz = syz.reshape(m, K) / N - np.outer(y, z)
+    czz = szz.reshape(K, K) / N - np.outer(z, z)
+    beta = np.linalg.pinv(czz, rcond=1e-10, hermitian=True) @ cyz.T
+    mean_adjusted = y - beta.T @ (z - means / scale)
+    residual = np.maximum(variance - (beta * cyz.T).sum(0), 0) * N / max(N - K - 1, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = np.maximum(variance, 0) / residual
+    return y, np.sqrt(np.maximum(variance, 0) / N), mean_adjusted, np.sqrt(residual / N), factor
+
+
+def control_totals(experiment, n, p, d, rep, dim=2, kind="crossing", complement=False, connectivity="face",
+                   rng=None, max_memory=MAX_MEMORY, angles=None):
+    """Returns the moments of the observables and controls of rep realizations of experiment."""
+    rng = np.random.default_rng(rng)
+    means = control_means(n, p, d, dim)
+    totals = 0
+    for size in batches(rep, n**(dim*d), max_memory // BYTES_PER_CELL[experiment]):
+        count("batches")
+        if experiment == "crossings":
+            Y, Z = crossing_samples(n, p, d, size, dim, kind, complement, connectivity, rng)
+        elif experiment == "blob":
+            Y, Z = blob_samples(n, p, d, size, dim, rng)
+        else:
+            Y, Z = angle_samples(experiment, n, p, d, size, angles, rng)
+        totals = totals + moments(Y, Z, means)
+    return totals
+
+
+def control_sweep(experiment, n, d, target_error, dim=2, kind="crossing", complement=False, connectivity="face",
+                  file_name=None, ps=None, rng=None, step=1000, max_rep=50000, max_memory=MAX_MEMORY, workers=1,
+                  angles=None):
+    """
+    Appends the data of experiment ("crossings", "blob", or the angle sweep "intersection" or
+    "projection" of angles) for each probability of ps (default p_grid()) to file_name,
+    simulating rounds of step realizations until the adjusted standard error of the first
+    observable (relative to the size of the grid for the blob, to the length of the diagonal
+    of the first angle for the angle sweeps) is at most target_error or max_rep realizations
+    are simulated, and the adjusted means to the control table of the experiment.
+    """
+    if experiment == "crossings":
+        file_name = file_name or data_file_name(kind, complement, dim, max_rep)
+        header = CROSSING_HEADER
+    elif experiment == "blob":
+        file_name = file_name or "data/blob_" + str(dim) + "D_" + str(max_rep) + ".csv"
+        header = BLOB_HEADER
+    else:
+        if dim != 2 or angles is None:
+            raise ValueError("the angle sweeps are 2D, and need their angles")
+        file_name = file_name or ANGLE_FILE_NAMES[experiment]
+        header = ANGLE_HEADER
+    control_file = os.path.join(os.path.dirname(file_name), "control", experiment_name(file_name) + ".csv")
+    os.makedirs(os.path.dirname(control_file), exist_ok=True)
+    ps = p_grid() if ps is None else ps
+    rng = np.random.default_rng(rng)
+    print("n=", n, " d=", d, " target error=", target_error, sep="")
+    entitle_file(file_name, header)
+    entitle_file(control_file, HEADER)
+    if experiment in OBSERVABLES:
+        names = OBSERVABLES[experiment]
+        unit = 1 if experiment == "crossings" else n**(dim*d)
+    else:
+        names = tuple("angle_{:g}".format(a) for a in angles)
+        # the lengths are at most the diagonal of their angle
+        unit = 1 / np.cos(np.radians(min(angles[0], 90 - angles[0])))
+    m, K = len(names), d
+    budget = max_memory // workers
+    batch = batches(step, n**(dim*d), budget // BYTES_PER_CELL[experiment])[0]
+    with open(file_name, "a") as f, open(control_file, "a") as g, worker_pool(workers, width(m, K)) as pool:
+        for p in ps:
+            means = control_means(n, p, d, dim)
+            function = functools.partial(control_totals, experiment, n, p, d, dim=dim, kind=kind,
+                                         complement=complement, connectivity=connectivity, angles=angles)
+            totals = np.zeros(width(m, K))
+            with cell(experiment_name(file_name), n, d, p, max_rep):
+                while True:
+                    size = min(step, max_rep - int(totals[0]))
+                    if pool is None:
+                        totals += function(size, rng=rng, max_memory=max_memory)
+                    else:
+                        totals += pool.data(functools.partial(function, max_memory=budget), size, batch, rng)
+                    mean, se, mean_adjusted, se_adjusted, factor = adjusted(totals, m, means)
+                    error = se_adjusted[0] / unit
+                    if se[0] == 0:
+                        q = (mean[0] / unit * totals[0] + 1) / (totals[0] + 2)
+                        error = np.sqrt(q * (1 - q) / totals[0])
+                    if error <= target_error or totals[0] >= max_rep:
+                        break
+                rep = int(totals[0])
+                sums = np.rint(totals[1:1+m]).astype(np.int64).tolist()
+                sq = int(round(totals[m+K]))
+                with stage("write"):
+                    if experiment == "crossings":
+                        print(rep, n, d, repr(float(p)), sums[0], sums[1], sq, sep=",", file=f)
+                    elif experiment not in OBSERVABLES:
+                        for a, value in zip(angles, mean):
+                            print(rep, n, d, repr(float(p)), repr(float(a)), repr(float(value)), sep=",", file=f)
+                    else:
+                        print(rep, n, d, repr(float(p)), sq, sums[0], sums[1], repr(float(totals[3])), sums[3],
+                              sep=",", file=f)
+                    for k, name in enumerate(names):
+                        print(rep, n, d, repr(float(p)), name, *(repr(float(x[k])) for x in
+                              (mean, se, mean_adjusted, se_adjusted, factor)), sep=",", file=g)
+            print("  p={:.4f}: {} realizations, {} = {:.6f} +- {:.6f} (factor {:.3g})".format(
+                p, rep, names[0], mean_adjusted[0] / unit, se_adjusted[0] / unit, factor[0]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("experiment", choices=EXPERIMENTS + tuple(sorted(ANGLE_OBSERVABLES)))
+    parser.add_argument("n", type=int)
+    parser.add_argument("d", type=int)
+    parser.add_argument("--target-error", type=float, default=0.002,
+                        help="adjusted standard error of the crossing probability (or average interior) to reach")
+    parser.add_argument("--max-rep", type=int, default=50000)
+    parser.add_argument("--step", type=int, default=1000, help="realizations of each round")
+    parser.add_argument("--dim", type=int, choices=(2, 3), default=2)
+    parser.add_argument("--kind", choices=KINDS, default="crossing")
+    parser.add_argument("--complement", action="store_true")
+    parser.add_argument("--connectivity", choices=CONNECTIVITIES, default="face")
+    parser.add_argument("--angles", type=parse_angles, default=parse_angles("0:90:2"),
+                        help="angles of the intersection and projection sweeps")
+    parser.add_argument("--p-step", type=float, default=0.01)
+    parser.add_argument("--max-memory", type=parse_size, default=MAX_MEMORY)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--file", default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    add_engine_argument(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    if args.experiment in ANGLE_OBSERVABLES and args.dim != 2:
+        parser.error("the angle sweeps are 2D")
+    if args.engine:
+        set_engine(args.engine)
+    start_from_arguments(args)
+    control_sweep(args.experiment, args.n, args.d, args.target_error, args.dim, args.kind, args.complement,
+                  args.connectivity, args.file, p_grid(args.p_step), args.seed, args.step, args.max_rep,
+                  args.max_memory, args.workers, args.angles)
+
+
+if __name__ == "__main__":
+    main()
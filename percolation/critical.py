@@ -0,0 +1,195 @@
+"""
+Critical points of the crossing data: for each (n, d) of a crossing data file, a logistic or
+probit curve cp(p) = F((p - pc) / w) is fitted to the crossings (nc successes out of rep at
+each p, binomial likelihood), all the (n, d) at once (Fisher scoring, each group with its own
+2x2 system). The critical point pc, the width of the transition (p at cp = 0.9 minus p at
+cp = 0.1) and their 95% intervals (from the inverse Fisher information, delta method) are
+written to data/critical/<experiment>.csv, read by the figures of pc against d.
+
+The intervals assume the model is exact: they measure the noise of the data, not the misfit
+of a logistic (or probit) curve to the transition.
+
+The bracket of the transition is used by the crossing sweeps to only simulate around it:
+
+    python -m percolation.critical data/crossings_2D_50000.csv --model probit
+    python -m percolation.crossings 2 9 --p-step 0.002 --bracket data/critical/crossings_2D_50000.csv
+"""
+import argparse
+import math
+import os
+
+import numpy as np
+
+from percolation.consolidate import read_csv, consolidate
+from percolation.save_utils import experiment_name
+from percolation.store import P_DIGITS
+
+
+ROOT = os.path.join("data", "critical")
+MODELS = ("logistic", "probit")
+# two-sided 95% normal quantile
+Z = 1.959963984540054
+HEADER = "n,d,model,rows,converged,pc,pc_low,pc_high,width,width_low,width_high"
+
+_erf = np.frompyfunc(math.erf, 1, 1)
+
+
+def _cdf(model, x):
+    """Returns F(x) and its density f(x)."""
+    if model == "logistic":
+        F = 1 / (1 + np.exp(-x))
+        return F, F * (1 - F)
+    F = 0.5 * (1 + np.asarray(_erf(x / np.sqrt(2)), dtype=float))
+    return F, np.exp(-x**2 / 2) / np.sqrt(2*np.pi)
+
+
+def _quantile(model, q):
+    if model == "logistic":
+        return np.log(q / (1 - q))
+    # the normal quantile of q by bisection (F is increasing)
+    low, high = -10.0, 10.0
+    for _ in range(100):
+        middle = (low + high) / 2
+        low, high = (middle, high) if _cdf(model, np.array(middle))[0] < q else (low, middle)
+    return (low + high) / 2
+
+
+def fit(p, successes, trials, groups, model="logistic", iterations=100, tolerance=1e-10):
+    """
+    Fits F(a + b p) to successes/trials at p, for each group (integer labels 0..G-1), and
+    returns (a, b, covariance of (a, b) of shape (G, 2, 2), converged).
+
+    >>> p = np.linspace(0, 1, 101)
+    >>> trials = np.full(101, 10**6)
+    >>> successes = np.round(trials / (1 + np.exp(-(p - 0.6) / 0.05)))
+    >>> a, b, covariance, converged = fit(p, successes, trials, np.zeros(101, dtype=int))
+    >>> (-a / b).round(4), (1 / b).round(4), converged
+    (array([0.6]), array([0.05]), array([ True]))
+    """
+    p = np.asarray(p, dtype=float)
+    y = np.asarray(successes, dtype=float) / trials
+    count = groups.max() + 1
+    total = lambda x: np.bincount(groups, weights=x, minlength=count)
+    # start from the p closest to cp = 1/2 of each group, with a width of 0.1, increasing or
+    # decreasing (crossings of the complement) as the data
+    order = np.lexsort((np.abs(y - 0.5), groups))
+    first = order[np.r_[True, groups[order][1:] != groups[order][:-1]]]
+    size = np.bincount(groups, minlength=count)
+    mean_p = total(p) / size
+    b = 10.0 * np.where(total((p - mean_p[groups]) * y) < 0, -1, 1)
+    a = -b * p[first]
+    converged = np.zeros(count, dtype=bool)
+    for _ in range(iterations):
+        eta = np.clip(a[groups] + b[groups] * p, -30, 30)
+        mu, density = _cdf(model, eta)
+        mu = np.clip(mu, 1e-12, 1 - 1e-12)
+        density = np.maximum(density, 1e-300)
+        w = trials * density**2 / (mu * (1 - mu))
+        z = eta + (y - mu) / density
+        # weighted least squares of z on (1, p), by group
+        s0, s1, s2 = total(w), total(w * p), total(w * p**2)
+        t0, t1 = total(w * z), total(w * p * z)
+        det = s0 * s2 - s1**2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            new_a = (s2 * t0 - s1 * t1) / det
+            new_b = (s0 * t1 - s1 * t0) / det
+        step = np.maximum(np.abs(new_a - a), np.abs(new_b - b))
+        a, b = new_a, new_b
+        converged = step < tolerance * np.maximum(1, np.abs(b))
+        if converged.all():
+            break
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = np.stack([np.stack([s2, -s1], -1), np.stack([-s1, s0], -1)], -2) / det[:, None, None]
+    return a, b, covariance, converged & np.isfinite(det) & (det > 0)
+
+
+def critical_points(rows, model="logistic"):
+    """
+    Returns the critical points of the crossing rows (schema "crossings" of the store, see
+    consolidate.py), as a structured array of the fields of HEADER, by (n, d).
+    """
+    rows = consolidate(rows)
+    rows = rows[rows["rep"] > 0]
+    keys, groups = np.unique(rows[["n", "d"]], return_inverse=True)
+    groups = groups.ravel()
+    p = rows["p_key"] / 10**P_DIGITS
+    a, b, covariance, converged = fit(p, rows["nc"], rows["rep"], groups, model)
+    spread = _quantile(model, 0.9) - _quantile(model, 0.1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pc = -a / b
+        width = spread / np.abs(b)
+        # gradients of pc and width with respect to (a, b)
+        gradient_pc = np.stack([-1/b, a/b**2], -1)
+        gradient_width = np.stack([np.zeros_like(b), -spread/b**2], -1) * np.sign(b)[:, None]
+    se_pc = np.sqrt(np.einsum("gi,gij,gj->g", gradient_pc, covariance, gradient_pc))
+    se_width = np.sqrt(np.einsum("gi,gij,gj->g", gradient_width, covariance, gradient_width))
+    table = np.zeros(len(keys), dtype=[("n", "i8"), ("d", "i8"), ("model", "U8"), ("rows", "i8"),
+                                       ("converged", "?")] +
+                                      [(f, "f8") for f in HEADER.split(",")[5:]])
+    table["n"], table["d"], table["model"] = keys["n"], keys["d"], model
+    table["rows"] = np.bincount(groups, minlength=len(keys))
+    table["converged"] = converged
+    table["pc"], table["pc_low"], table["pc_high"] = pc, pc - Z*se_pc, pc + Z*se_pc
+    table["width"], table["width_low"], table["width_high"] = width, width - Z*se_width, width + Z*se_width
+    # no transition within the probabilities of the data (crossings only at p = 1, say)
+    for f in HEADER.split(",")[5:]:
+        table[f][~converged] = np.nan
+    return table
+
+
+def output_file(file_name, root=ROOT):
+    """Returns the file of the critical points of the crossing data file file_name."""
+    return os.path.join(root, experiment_name(file_name) + ".csv")
+
+
+def write_table(file_name, table):
+    os.makedirs(os.path.dirname(file_name) or ".", exist_ok=True)
+    tmp = file_name + ".tmp"
+    with open(tmp, "w") as f:
+        print(HEADER, file=f)
+        for row in table:
+            print(",".join(repr(float(x)) if isinstance(x, np.floating) else str(x) for x in row.tolist()), file=f)
+    os.replace(tmp, file_name)
+
+
+def read_table(file_name):
+    """Returns the critical points written to file_name, as {(n, d): row dict}."""
+    with open(file_name) as f:
+        names = next(f).strip().split(",")
+        rows = [dict(zip(names, line.strip().split(","))) for line in f if line.strip()]
+    return {(int(r["n"]), int(r["d"])): r for r in rows}
+
+
+def bracket(table, n, d, widths=2.0):
+    """
+    Returns the interval of p (in [0, 1]) within widths transition widths of the critical
+    point of (n, d) in table (as returned by read_table), or None if it was not fitted.
+    """
+    row = table.get((n, d))
+    if row is None or row["converged"] != "True":
+        return None
+    pc, width = float(row["pc"]), float(row["width"])
+    if not (np.isfinite(pc) and np.isfinite(width)):
+        return None
+    return max(0.0, pc - widths*width), min(1.0, pc + widths*width)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="crossing data files")
+    parser.add_argument("--model", choices=MODELS, default="logistic")
+    parser.add_argument("--root", default=ROOT, help="directory of the tables of critical points")
+    args = parser.parse_args()
+    for file_name in args.files:
+        table = critical_points(read_csv(file_name, "crossings"), args.model)
+        output = output_file(file_name, args.root)
+        write_table(output, table)
+        print(file_name, "->", output)
+        for row in table:
+            print("  n={} d={}: pc={:.4f} [{:.4f}, {:.4f}], width={:.4f}{}".format(
+                row["n"], row["d"], row["pc"], row["pc_low"], row["pc_high"], row["width"],
+                "" if row["converged"] else " (not converged)"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+"""
+Batched crossing engines, in 2D and 3D, for the percolation and its complement.
+
+A crossing goes from the first to the last slice along the first axis of the grid
+(up/down in 2D). Its length is the number of squares of the shortest such path, as
+returned by `crossing` in crossings2D.jl / crossings3D.jl:
+
+- "crossing": moves to the face neighbours (4 in 2D, 6 in 3D),
+- "semi_straight": the same moves except stepping back along the crossing axis
+  (swept row by row in 2D, see semi_straight.py),
+- "straight": a single line of squares along the crossing axis.
+
+The complement is crossed with the same face connectivity by default (as the Julia
+scripts do); connectivity="full" lets it also move to the corner neighbours
+(8 in 2D, 26 in 3D), which is the dual connectivity of face crossings. The probability
+of crossing the complement is computed on the tree of removed blocks (see complement.py).
+
+Realizations are refined level by level, and those that can not be crossed at a coarse
+level are rejected before their finer levels are built.
+
+With --addressed, every draw is addressed by (seed, n, d, p, dim, index of the realization,
+level, node) (see philox.py): the data does not depend on the batches or the number of
+workers, and any realization of the sweep is regenerated alone by addressed_percolation.
+
+With --symmetric, each realization is also crossed along its other axes (on its transposes:
+the crossings along every axis have the same law; reflections leave crossings unchanged,
+so they add nothing). The crossings of the transposes of a realization are correlated, so
+the rows are not written to the data file (whose rep realizations are independent trials
+for the intervals, the critical fits and the consolidation) but to the table of the
+experiment in the directory symmetry/ of the data file: rep realizations, their numbers and
+total length of crossings along the dim axes (nc, lc), their retained squares (sq), the sum
+of their squared numbers of crossings (pairs), the correlation of the crossings of a
+realization and the effective number of realizations (see symmetry).
+
+With --all-depths, the depths 1, ..., d are measured on the same realizations (the level k
+of a depth d realization being a depth k realization): one sweep writes the rows of every
+depth, for the cost of the deepest one.
+
+The batch of realizations is split so that it fits in a memory budget, for example:
+
+    python -m percolation.crossings 3 5 --dim 3 --kind semi_straight --complement --max-memory 4G
+"""
+import argparse
+import functools
+import os
+
+import numpy as np
+
+from percolation.fractal_percolation import fractal_percolation, generator, shift, refine, grow_counts, batches
+from percolation.philox import Realizations, campaign_key, exact_totals
+from percolation.engine import compiled, set_engine, add_engine_argument
+from percolation.parallel import worker_pool
+from percolation.profiling import stage, staged, count, cell, add_trace_arguments, start_from_arguments
+from percolation.complement import percolation_tree, complement_crossed
+from percolation.semi_straight import semi_straight_crossed_2d, semi_straight_lengths_2d
+from percolation.store import store_writer
+from percolation.critical import read_table, bracket
+from percolation.save_utils import entitle_file, experiment_name, p_grid, parse_size
+
+
+KINDS = ("crossing", "semi_straight", "straight")
+CONNECTIVITIES = ("face", "full")
+HEADER = "rep,n,d,p,nc,lc,sq"
+# bytes per cell held while generating and crossing a realization
+BYTES_PER_CELL = 8
+# bytes per cell of the last level of the tree of a realization (sample, coordinates, draw)
+TREE_BYTES_PER_CELL = 48
+MAX_MEMORY = 2**30
+SYMMETRY_HEADER = "rep,n,d,p,variants,nc,lc,sq,pairs,correlation,effective"
+
+
+def dilate(A, semi=False, connectivity="face"):
+    """
+    Returns the squares neighbouring the squares of the batch A (including A),
+    without stepping back along axis 1 if semi.
+    """
+    steps = lambda axis: (1,) if semi and axis == 1 else (1, -1)
+    if connectivity == "full":
+        for axis in range(1, A.ndim):
+            B = A.copy()
+            for step in steps(axis):
+                B |= shift(A, axis, step)
+            A = B
+        return A
+    B = A.copy()
+    for axis in range(1, A.ndim):
+        for step in steps(axis):
+            B |= shift(A, axis, step)
+    return B
+
+
+@staged("crossing")
+def crossing(P, kind="crossing", complement=False, connectivity="face"):
+    """
+    Calculates the length of the shortest crossing of each realization of the batch P
+    (shape (B, m, m) or (B, m, m, m)), or 0 when there is none. P is not modified.
+
+    >>> P = np.array([[[0, 1, 0, 1, 1],
+    ...                [1, 1, 0, 0, 0],
+    ...                [0, 0, 1, 1, 0],
+    ...                [1, 1, 1, 0, 1],
+    ...                [1, 1, 1, 1, 1]]], dtype=bool)
+    >>> crossing(P), crossing(P, complement=True)
+    (array([0]), array([0]))
+    >>> Q = ~np.eye(4, dtype=bool)[None]
+    >>> crossing(Q, complement=True), crossing(Q, complement=True, connectivity="full")
+    (array([0]), array([4]))
+    """
+    open_ = ~P if complement else P
+    m = P.shape[1]
+    spatial = tuple(range(1, P.ndim))
+    if kind == "straight":
+        return np.where(open_.all(axis=1).any(axis=spatial[:-1]), m, 0)
+    kernels = compiled()
+    if kernels is not None:
+        moves = kernels.steps(P.ndim-1, kind == "semi_straight", connectivity)
+        lengths, steps = kernels.crossing_lengths(np.ascontiguousarray(open_), moves, kernels.offsets(moves, m))
+        count("bfs_steps", int(steps.max(initial=0)))
+        return lengths
+    lengths = np.zeros(len(P), dtype=np.int64)
+    if kind == "semi_straight" and P.ndim == 3 and connectivity == "face":
+        crossed = semi_straight_crossed_2d(open_)
+        lengths[crossed] = semi_straight_lengths_2d(open_[crossed])
+        return lengths
+    active = np.arange(len(P))
+    front = np.zeros_like(open_)
+    front[:, 0] = open_[:, 0]
+    free = open_ & ~front
+    c = 1
+    while len(active):
+        done = front[:, -1].any(axis=spatial[:-1])
+        lengths[active[done]] = c
+        alive = front.any(axis=spatial) & ~done
+        if not alive.all():
+            active, front, free = active[alive], front[alive], free[alive]
+        front = dilate(front, kind == "semi_straight", connectivity) & free
+        free &= ~front
+        c += 1
+    count("bfs_steps", c-1)
+    return lengths
+
+
+def coarse_blocked(M, kind="crossing"):
+    """
+    Tells which realizations of the batch M of level-k squares can not be crossed at any
+    deeper level: a slice of squares across the crossing axis is empty (no straight line
+    of squares for straight crossings).
+    """
+    spatial = tuple(range(1, M.ndim))
+    if kind == "straight":
+        return ~M.all(axis=1).any(axis=spatial[:-1])
+    return ~M.any(axis=spatial[1:]).all(axis=1)
+
+
+def variants(P, symmetric=False):
+    """
+    Returns the batch P and, if symmetric, its transposes swapping the crossing axis with each
+    other axis (views): their crossings are the crossings of P along each axis.
+    """
+    return [P] + ([P.swapaxes(1, axis) for axis in range(2, P.ndim)] if symmetric else [])
+
+
+def coarse_certified(M, kind="crossing", connectivity="face"):
+    """
+    Tells which realizations of the batch M of level-k squares have a crossing of the complement
+    at every deeper level: removed squares stay fully open, so a crossing of the coarse complement
+    is refined into a crossing of the fine complement.
+    """
+    return crossing(M, kind, True, connectivity) != 0
+
+
+def pruned_crossing(n, p, d, dim=2, size=1, kind="crossing", complement=False, connectivity="face",
+                    certify=False, rng=None, stats=None, symmetric=False):
+    """
+    Calculates the crossing lengths and numbers of retained squares of size depth d percolations
+    of an n^dim grid with probability p, refining the realizations level by level. If symmetric,
+    the lengths (shape (size, dim)) are those of the crossings along each axis.
+
+    Realizations whose coarse levels can not be crossed are rejected before building their finer
+    levels (their number of retained squares is drawn directly). If certify, realizations with
+    a crossing of the complement at a coarse level are accepted with length -1 (unknown).
+    The number of realizations rejected or certified at each level is added to stats.
+    """
+    rng = np.random.default_rng(rng)
+    lengths = np.zeros((size, dim) if symmetric else size, dtype=np.int64)
+    sq = np.zeros(size, dtype=np.int64)
+    index = np.arange(size)
+    spatial = tuple(range(1, dim+1))
+    P = np.ones((size,) + (1,)*dim, dtype=bool)
+    for k in range(1, d+1):
+        P = refine(P, n, p, rng)
+        if k == d or not len(P):
+            break
+        with stage("pruning"):
+            if complement and certify:
+                done = np.all([coarse_certified(Q, kind, connectivity) for Q in variants(P, symmetric)], axis=0)
+                lengths[index[done]] = -1
+            elif complement:
+                done = np.zeros(len(P), dtype=bool)
+            else:
+                done = np.all([coarse_blocked(Q, kind) for Q in variants(P, symmetric)], axis=0)
+            if done.any():
+                retained = P[done].sum(axis=spatial)
+                sq[index[done]] = grow_counts(retained, n**dim, p, d-k, rng)
+                P, index = P[~done], index[~done]
+        if stats is not None:
+            stats.setdefault("certified" if complement else "rejected", np.zeros(d, dtype=np.int64))[k] += np.count_nonzero(done)
+    if stats is not None:
+        stats["fine"] = stats.get("fine", 0) + len(P)
+    with stage("count"):
+        sq[index] = P.sum(axis=spatial)
+    lengths[index] = np.stack([crossing(Q, kind, complement, connectivity) for Q in variants(P, symmetric)], -1) \
+        if symmetric else crossing(P, kind, complement, connectivity)
+    return lengths, sq
+
+
+def tree_complement_crossing(n, p, d, dim=2, size=1, connectivity="face", rng=None):
+    """
+    Tells which of size depth d percolations of an n^dim grid with probability p have a
+    crossing of the complement, and calculates their numbers of retained squares, from their
+    trees: no grid is built, the crossings being found on the graph of removed blocks
+    (see complement.py).
+    """
+    with stage("tree"):
+        blocks, retained = percolation_tree(n, p, d, dim, size, rng)
+        sq = np.bincount(retained[0], minlength=size)
+    with stage("components"):
+        return complement_crossed(n, d, dim, size, blocks, connectivity), sq
+
+
+def crossing_data(n, p, d, rep, dim=2, kind="crossing", complement=False, connectivity="face",
+                  rng=None, max_memory=MAX_MEMORY, prune=True, stats=None, symmetric=False):
+    """
+    Calculates (lc, nc, sq): the total length of crossings, the number of crossings and the
+    total number of retained squares in rep depth d percolations of an n^dim grid with
+    probability p. Realizations are simulated in batches of at most max_memory bytes, and
+    realizations that can not be crossed are rejected at a coarse level if prune.
+
+    If symmetric, the crossings along the dim axes of each realization are counted, and
+    (lc, nc, sq, pairs) is returned, pairs being the sum of the squared numbers of crossings
+    of the realizations (see symmetry).
+    """
+    rng = generator(rng)
+    lc = nc = sq = pairs = 0
+    for size in batches(rep, n**(dim*d), max_memory // BYTES_PER_CELL):
+        count("batches")
+        if prune:
+            lengths, s = pruned_crossing(n, p, d, dim, size, kind, complement, connectivity, False, rng, stats,
+                                         symmetric)
+            sq += int(s.sum())
+        else:
+            P = fractal_percolation(n, p, d, dim, size, rng)
+            with stage("count"):
+                sq += int(P.sum())
+            lengths = np.stack([crossing(Q, kind, complement, connectivity) for Q in variants(P, symmetric)], -1)
+        nc += int(np.count_nonzero(lengths))
+        lc += int(lengths.sum())
+        if symmetric:
+            pairs += int((np.count_nonzero(lengths.reshape(size, -1), axis=1)**2).sum())
+    return (lc, nc, sq, pairs) if symmetric else (lc, nc, sq)
+
+
+def symmetry(rep, nc, pairs, variants):
+    """
+    Returns (correlation, effective): the correlation of the crossings of the variants of a
+    realization, and the number of independent realizations giving the same variance of the
+    crossing probability as the rep realizations with their variants, from the number of
+    crossings nc and the sum of the squared numbers of crossings of the realizations pairs.
+
+    >>> symmetry(1000, 1000, 2000, 2)
+    (1.0, 1000.0)
+    """
+    cp = np.float64(nc) / (rep * variants)
+    variance = cp * (1 - cp)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # variance of the proportion of crossed variants of a realization
+        mean_variance = pairs / (rep * variants**2) - cp**2
+        correlation = (variants * mean_variance / variance - 1) / (variants - 1)
+        effective = rep * variance / mean_variance
+    return float(correlation), float(effective)
+
+
+def addressed_crossing_data(n, p, d, start, stop, dim=2, kind="crossing", complement=False, connectivity="face",
+                            seed=0, max_memory=MAX_MEMORY):
+    """
+    Calculates (lc, nc, sq) over the realizations start..stop-1 of the campaign seed, with
+    addressable draws (see addressed_percolation). Realizations are not pruned (the numbers
+    of squares of the rejected ones would be drawn from another stream).
+    """
+    return crossing_data(n, p, d, stop - start, dim, kind, complement, connectivity,
+                         Realizations(campaign_key(seed, n, d, p, dim), start), max_memory, prune=False)
+
+
+def coupled_crossing_data(n, p, d, rep, dim=2, kind="crossing", complement=False, connectivity="face",
+                          rng=None, max_memory=MAX_MEMORY):
+    """
+    Calculates the crossing data (lc, nc, sq) of the depths 1, ..., d (array of shape (d, 3))
+    on the same rep depth d percolations of an n^dim grid with probability p, each depth k
+    being measured on the level k of the realizations. Realizations that can not be crossed
+    at a level can not be crossed at deeper levels either: they are dropped, their numbers of
+    retained squares being drawn level by level.
+    """
+    rng = np.random.default_rng(rng)
+    totals = np.zeros((d, 3), dtype=np.int64)
+    spatial = tuple(range(1, dim+1))
+    for size in batches(rep, n**(dim*d), max_memory // BYTES_PER_CELL):
+        count("batches")
+        P = np.ones((size,) + (1,)*dim, dtype=bool)
+        dropped = np.zeros(0, dtype=np.int64)
+        for k in range(d):
+            P = refine(P, n, p, rng)
+            with stage("count"):
+                dropped = grow_counts(dropped, n**dim, p, 1, rng) if k else dropped
+                totals[k, 2] += int(P.sum()) + int(dropped.sum())
+            if not complement:
+                with stage("pruning"):
+                    done = coarse_blocked(P, kind)
+                    if done.any():
+                        dropped = np.r_[dropped, P[done].sum(axis=spatial)]
+                        P = P[~done]
+            lengths = crossing(P, kind, complement, connectivity)
+            totals[k, 0] += int(lengths.sum())
+            totals[k, 1] += int(np.count_nonzero(lengths))
+    return totals
+
+
+def crossing_probability(n, p, d, rep, dim=2, kind="crossing", complement=False, connectivity="face",
+                         rng=None, max_memory=MAX_MEMORY, stats=None, tree=True, prune=True):
+    """
+    Calculates an approximate probability to have a crossing in a depth d percolation
+    of an n^dim grid with probability p (or its complement), using rep experiments.
+    Crossings of the complement are found on the tree if tree, otherwise realizations
+    are rejected or certified at coarse levels whenever possible if prune.
+    """
+    rng = np.random.default_rng(rng)
+    nc = 0
+    tree = tree and prune and complement and kind == "crossing"
+    for size in batches(rep, n**(dim*d), max_memory // (TREE_BYTES_PER_CELL if tree else BYTES_PER_CELL)):
+        count("batches")
+        if tree:
+            lengths, _ = tree_complement_crossing(n, p, d, dim, size, connectivity, rng)
+        elif prune:
+            lengths, _ = pruned_crossing(n, p, d, dim, size, kind, complement, connectivity, True, rng, stats)
+        else:
+            lengths = crossing(fractal_percolation(n, p, d, dim, size, rng), kind, complement, connectivity)
+        nc += np.count_nonzero(lengths)
+    return nc/rep
+
+
+def data_file_name(kind="crossing", complement=False, dim=2, rep=50000):
+    """Returns the data file name used by the Julia scripts for this experiment."""
+    name = "complement_crossings" if complement else "crossings"
+    if kind != "crossing":
+        name += "_" + kind
+    return "data/" + name + "_" + str(dim) + "D_" + str(rep) + ".csv"
+
+
+def save_crossing_data(n, d, rep, dim=2, kind="crossing", complement=False, connectivity="face",
+                       file_name=None, ps=None, rng=None, max_memory=MAX_MEMORY, workers=1, store=None,
+                       all_depths=False, addressed=False, symmetric=False):
+    """
+    Appends the crossing data of each probability of ps (default p_grid()) to file_name
+    (and to the results store in the directory store, if given), simulated by workers
+    processes sharing the memory budget. If all_depths, the rows of the depths 1, ..., d
+    are written, measured on the same realizations (see coupled_crossing_data). If
+    addressed, the draws are addressable (see addressed_crossing_data), rng being the seed
+    of the campaign (printed if drawn). If symmetric, the crossings along every axis are
+    counted, and the rows are written to the symmetry table of the experiment (in the
+    directory symmetry/ of file_name) instead of file_name.
+    """
+    if addressed and all_depths:
+        raise ValueError("addressable draws can not be used with all_depths")
+    if symmetric and (addressed or all_depths):
+        raise ValueError("symmetric crossings can not be used with addressed draws or all_depths")
+    if symmetric and store:
+        raise ValueError("symmetric crossings are not written to the store")
+    file_name = file_name or data_file_name(kind, complement, dim, rep)
+    ps = p_grid() if ps is None else ps
+    if addressed:
+        seed = int(np.random.SeedSequence(rng).entropy) % 2**63
+        print("seed=", seed, sep="")
+    rng = np.random.default_rng(rng)
+    print("n=", n, " d=", d, " rep=", rep, sep="")
+    budget = max_memory // workers
+    batch = batches(rep, n**(dim*d), budget // BYTES_PER_CELL)[0]
+    data = coupled_crossing_data if all_depths else crossing_data
+    table = file_name
+    if symmetric:
+        data = functools.partial(crossing_data, symmetric=True)
+        table = os.path.join(os.path.dirname(file_name), "symmetry", experiment_name(file_name) + ".csv")
+        os.makedirs(os.path.dirname(table), exist_ok=True)
+    entitle_file(table, SYMMETRY_HEADER if symmetric else HEADER)
+    with open(table, "a") as f, worker_pool(workers, 3*d if all_depths else 4 if symmetric else 3) as pool, \
+            store_writer(file_name, store, "crossings") as writer:
+        for p in ps:
+            with cell(experiment_name(file_name), n, d, p, rep):
+                if addressed:
+                    function = functools.partial(addressed_crossing_data, n, p, d, dim=dim, kind=kind,
+                                                 complement=complement, connectivity=connectivity, seed=seed,
+                                                 max_memory=budget)
+                    totals = exact_totals(function(start=0, stop=rep)) if pool is None else pool.addressed(function, rep, batch)
+                elif pool is None:
+                    totals = data(n, p, d, rep, dim, kind, complement, connectivity, rng, max_memory)
+                else:
+                    function = functools.partial(data, n, p, d, dim=dim, kind=kind, complement=complement,
+                                                 connectivity=connectivity, max_memory=budget)
+                    totals = pool.data(function, rep, batch, rng)
+                if symmetric:
+                    lc, nc, sq, pairs = (int(x) for x in totals)
+                    correlation, effective = symmetry(rep, nc, pairs, dim)
+                    with stage("write"):
+                        print(rep, n, d, repr(float(p)), dim, nc, lc, sq, pairs, repr(correlation), repr(effective),
+                              sep=",", file=f)
+                    continue
+                rows = np.reshape(totals, (-1, 3)).astype(np.int64)
+                depths = range(1, d+1) if all_depths else [d]
+                with stage("write"):
+                    for depth, (lc, nc, sq) in zip(depths, rows.tolist()):
+                        print(rep, n, depth, repr(float(p)), nc, lc, sq, sep=",", file=f)
+                        if writer:
+                            writer(rep, n, depth, p, nc, lc, sq)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("n", type=int)
+    parser.add_argument("d", type=int)
+    parser.add_argument("--dim", type=int, choices=(2, 3), default=2)
+    parser.add_argument("--kind", choices=KINDS, default="crossing")
+    parser.add_argument("--complement", action="store_true")
+    parser.add_argument("--connectivity", choices=CONNECTIVITIES, default="face")
+    parser.add_argument("--rep", type=int, default=50000)
+    parser.add_argument("--p-step", type=float, default=0.01)
+    parser.add_argument("--max-memory", type=parse_size, default=MAX_MEMORY)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--store", default=None, help="also append the results to the store in this directory")
+    parser.add_argument("--file", default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--bracket", default=None,
+                        help="table of critical points (see critical.py): only simulate the p around the transition")
+    parser.add_argument("--widths", type=float, default=2.0, help="half-width of the bracket, in transition widths")
+    parser.add_argument("--all-depths", action="store_true",
+                        help="also write the depths 1, ..., d-1, measured on the same realizations")
+    parser.add_argument("--symmetric", action="store_true",
+                        help="also count the crossings along the other axes of each realization")
+    parser.add_argument("--addressed", action="store_true",
+                        help="addressable draws: the data only depends on the seed, any realization can be regenerated")
+    add_engine_argument(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    if args.addressed and args.all_depths:
+        parser.error("--addressed can not be used with --all-depths")
+    if args.symmetric and (args.addressed or args.all_depths):
+        parser.error("--symmetric can not be used with --addressed or --all-depths")
+    if args.symmetric and args.store:
+        parser.error("--symmetric rows are not written to the store")
+    if args.engine:
+        set_engine(args.engine)
+    start_from_arguments(args)
+    ps = p_grid(args.p_step)
+    if args.bracket:
+        interval = bracket(read_table(args.bracket), args.n, args.d, args.widths)
+        if interval is None:
+            parser.error("no critical point of n=" + str(args.n) + " d=" + str(args.d) + " in " + args.bracket)
+        ps = ps[(ps >= interval[0]) & (ps <= interval[1])]
+    save_crossing_data(args.n, args.d, args.rep, args.dim, args.kind, args.complement, args.connectivity,
+                       args.file, ps, args.seed, args.max_memory, args.workers, args.store, args.all_depths,
+                       args.addressed, args.symmetric)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Selection of the engine running the hot loops of the simulations:
+
+- "numpy": batched array operations (the reference implementation),
+- "numba": compiled kernels (see kernels.py) looping over the realizations of a batch
+  in parallel, compiled once and cached on disk.
+
+Both engines consume the same random draws, so a seeded run gives the same data with
+either of them. The engine defaults to numba when it is installed; it is chosen with the
+PERCOLATION_ENGINE environment variable, set_engine, or the --engine option of the
+command lines.
+"""
+import importlib.util
+import os
+
+
+ENGINES = ("numpy", "numba")
+
+
+def available(name):
+    """Tells whether the engine name can be used."""
+    return name == "numpy" or (name == "numba" and importlib.util.find_spec("numba") is not None)
+
+
+def set_engine(name):
+    """Selects the engine name for the following simulations."""
+    global _engine
+    if name not in ENGINES:
+        raise ValueError("unknown engine " + repr(name) + ", expected one of " + ", ".join(ENGINES))
+    if not available(name):
+        raise ImportError("the " + name + " engine is not installed")
+    _engine = name
+
+
+def get_engine():
+    """Returns the name of the selected engine."""
+    return _engine
+
+
+def compiled():
+    """Returns the module of compiled kernels if the numba engine is selected, None otherwise."""
+    if _engine != "numba":
+        return None
+    from percolation import kernels
+    return kernels
+
+
+def add_engine_argument(parser):
+    """Adds the --engine option to the parser of a command line."""
+    parser.add_argument("--engine", choices=ENGINES, default=None,
+                        help="engine running the simulations (default: " + get_engine() + ")")
+
+
+_engine = "numba" if available("numba") else "numpy"
+set_engine(os.environ.get("PERCOLATION_ENGINE", _engine))
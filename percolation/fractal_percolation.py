@@ -0,0 +1,136 @@
+import numpy as np
+
+from percolation.engine import compiled
+from percolation.philox import Draws, Realizations, campaign_key
+from percolation.profiling import staged
+
+
+# maximum number of cells held by one batch of realizations
+MAX_BATCH_CELLS = 2**24
+
+
+def generator(rng, size=None):
+    """
+    Returns the source of the draws of rng: the draws of its next size realizations if it is
+    addressed (see philox.Realizations; rng itself if size is None), otherwise
+    np.random.default_rng(rng).
+    """
+    if isinstance(rng, Realizations):
+        return rng if size is None else rng.batch(size)
+    return np.random.default_rng(rng)
+
+
+def fractal_percolation(n, p, d, dim=2, size=1, rng=None):
+    """
+    Returns size independent depth d percolations of an n^dim grid with probability p,
+    as a boolean array of shape (size, n**d, ..., n**d).
+
+    Each level keeps every surviving square of the previous level, refines it into
+    n^dim sub-squares, and keeps each of them with probability p.
+    """
+    rng = generator(rng, size)
+    P = np.ones((size,) + (1,)*dim, dtype=bool)
+    for _ in range(d):
+        P = refine(P, n, p, rng)
+    return P
+
+
+def truncations(n, p, d, dim=2, size=1, rng=None, top=None):
+    """
+    Yields the levels 1, ..., d of size independent depth d percolations of an n^dim grid
+    with probability p: the level k is the depth k truncation of the realizations (the
+    first k levels of their trees), so that every depth is measured on the same trees.
+    The last level is the percolation returned by fractal_percolation for the same rng.
+    If top is given (shape (size, n, ..., n)), it is the level 1 of the realizations.
+    """
+    rng = generator(rng, size)
+    P = np.ones((size,) + (1,)*dim, dtype=bool)
+    for k in range(d):
+        P = refine(P, n, p, rng) if k or top is None else top
+        yield P
+
+
+def addressed_percolation(n, p, d, dim=2, samples=(0,), seed=0):
+    """
+    Returns the realizations of indices samples of the campaign seed (depth d percolations of
+    an n^dim grid with probability p), their draws being addressed by (seed, n, d, p, dim,
+    index, level, node) (see philox.py): any realization of a sweep with addressable draws is
+    regenerated alone from its index.
+    """
+    draws = Draws(campaign_key(seed, n, d, p, dim), samples)
+    P = np.ones((len(draws.samples),) + (1,)*dim, dtype=bool)
+    for _ in range(d):
+        P = refine(P, n, p, draws)
+    return P
+
+
+@staged("generation")
+def refine(P, n, p, rng):
+    """
+    Returns the next level of the batch of percolations P: each retained square is
+    split into n^dim sub-squares, each kept with probability p.
+    """
+    shape = P.shape[:1] + tuple(k*n for k in P.shape[1:])
+    kernels = compiled()
+    if kernels is not None:
+        return kernels.refine(np.ascontiguousarray(P), rng.random(shape, dtype=np.float32) < p, n)
+    for axis in range(1, P.ndim):
+        P = P.repeat(n, axis=axis)
+    P &= rng.random(shape, dtype=np.float32) < p
+    return P
+
+
+def grow_counts(Z, children, p, levels, rng):
+    """
+    Returns the number of retained squares levels levels below Z retained squares, each
+    having children sub-squares kept with probability p, without building the grids.
+    """
+    Z = np.asarray(Z, dtype=np.int64)
+    for _ in range(levels):
+        Z = rng.binomial(children*Z, p)
+    return Z
+
+
+def fractal_percolation_2d(n, p, d, size=1, rng=None):
+    """
+    Returns size independent depth d percolations of an n*n grid with probability p,
+    as a boolean array of shape (size, n**d, n**d).
+
+    >>> fractal_percolation_2d(2, 0.7, 2, rng=np.random.default_rng(0)).astype(int)
+    array([[[0, 0, 1, 1],
+            [0, 0, 1, 0],
+            [1, 1, 0, 0],
+            [1, 1, 1, 0]]])
+    """
+    return fractal_percolation(n, p, d, 2, size, rng)
+
+
+def fractal_percolation_3d(n, p, d, size=1, rng=None):
+    """
+    Returns size independent depth d percolations of an n*n*n grid with probability p,
+    as a boolean array of shape (size, n**d, n**d, n**d).
+    """
+    return fractal_percolation(n, p, d, 3, size, rng)
+
+
+def shift(A, axis, step):
+    """Returns A shifted by step (+1 or -1) along axis, filled with False."""
+    B = np.zeros_like(A)
+    src = [slice(None)]*A.ndim
+    dst = [slice(None)]*A.ndim
+    if step > 0:
+        src[axis], dst[axis] = slice(None, -1), slice(1, None)
+    else:
+        src[axis], dst[axis] = slice(1, None), slice(None, -1)
+    B[tuple(dst)] = A[tuple(src)]
+    return B
+
+
+def batches(rep, cells, max_cells=MAX_BATCH_CELLS):
+    """
+    Splits rep experiments on grids of cells cells into batch sizes
+    holding at most max_cells cells each (and at least one experiment).
+    """
+    size = max(1, min(rep, max_cells // cells))
+    full, last = divmod(rep, size)
+    return [size]*full + ([last] if last else [])
@@ -0,0 +1,250 @@
+"""
+Importance sampling of rare crossings: crossings below the threshold of large grids, or
+crossings of the complement near p = 1, are seen a few times in 50000 realizations.
+
+The realizations are drawn with tilted probabilities t_k (one for each level k) instead of
+p, and reweighted by the likelihood ratio of their tree: each square of the level k-1 is split
+into n^dim squares, each kept with probability t_k, so a realization with K_k kept squares out
+of N_k drawn squares at each level has the likelihood ratio
+
+    L = prod_k (p / t_k)^K_k ((1 - p) / (1 - t_k))^(N_k - K_k),
+
+and the crossing probability is the mean of W I (W being its weight, see below, and I telling
+whether it is crossed), with a normal confidence interval from the variance of W I. The tilts
+are chosen by the cross-entropy method: they start at p, the coarsest level that can still
+move is moved towards 1 (towards 0 for the complement) while less than a fraction rho of the
+pilot realizations are crossed, then they are updated to the weighted proportions of kept
+squares of the crossed realizations (sum W I K_k / sum W I N_k) until they settle. Tilts whose
+crossed realizations have their weight carried by a few of them are moved back halfway to the
+last good ones.
+
+The coarse levels have few squares, so tilting them costs little variance: rare crossings of
+the complement near p = 1, decided by the first levels, are found down to 1e-8 and below.
+Crossings below the threshold need the deep levels as well, whose weights spread over many
+orders of magnitude, and the tilts may miss most of the crossings: when the effective number
+of realizations of the weights (written with the estimates) is below MIN_EFFECTIVE, the tail
+was not sampled, and the bounds of the interval are written as NaN (the estimate and its
+standard error are kept, but are not to be trusted).
+
+A fraction DEFENSIVE of the realizations is drawn with p itself and every realization is
+weighted against the mixture, W = 1 / (DEFENSIVE + (1 - DEFENSIVE) / L), L being the likelihood
+ratio above, so that the weights are at most 1 / DEFENSIVE (W = L without the mixture).
+
+Results are appended to the table of the experiment in the directory importance/ of its data
+file (the tilted realizations are not realizations of p, so the data file is left as is):
+
+    python -m percolation.importance 2 8 0.97 0.99 --complement --rep 20000
+"""
+import argparse
+import functools
+import math
+import os
+
+import numpy as np
+
+from percolation.fractal_percolation import refine, batches
+from percolation.crossings import crossing, coarse_blocked, data_file_name, KINDS, CONNECTIVITIES, BYTES_PER_CELL
+from percolation.engine import set_engine, add_engine_argument
+from percolation.parallel import worker_pool
+from percolation.profiling import stage, count, cell, add_trace_arguments, start_from_arguments
+from percolation.save_utils import entitle_file, experiment_name, parse_size
+
+
+HEADER = "rep,n,d,p,tilts,crossed,cp,se,cp_low,cp_high,effective"
+MAX_MEMORY = 2**30
+# fraction of the realizations drawn with p
+DEFENSIVE = 0.1
+# effective number of realizations below which the interval is not written
+MIN_EFFECTIVE = 100
+# two-sided 95% normal quantile
+Z = 1.959963984540054
+
+
+def tilted_crossings(n, t, d, size, dim=2, kind="crossing", complement=False, connectivity="face", rng=None):
+    """
+    Returns (crossed, kept, drawn) of size depth d percolations of an n^dim grid with the
+    probabilities t of the levels: whether each is crossed, and its numbers of kept and drawn
+    squares of each level (shape (size, d), left at 0 below the level where a realization is
+    rejected, as it is not crossed).
+    """
+    rng = np.random.default_rng(rng)
+    kept = np.zeros((size, d), dtype=np.int64)
+    drawn = np.zeros((size, d), dtype=np.int64)
+    crossed = np.zeros(size, dtype=bool)
+    index = np.arange(size)
+    spatial = tuple(range(1, dim+1))
+    P = np.ones((size,) + (1,)*dim, dtype=bool)
+    for k in range(d):
+        drawn[index, k] = n**dim * P.sum(axis=spatial)
+        P = refine(P, n, t[k], rng)
+        kept[index, k] = P.sum(axis=spatial)
+        if k < d-1 and not complement:
+            with stage("pruning"):
+                done = coarse_blocked(P, kind)
+                P, index = P[~done], index[~done]
+    crossed[index] = crossing(P, kind, complement, connectivity) != 0
+    return crossed, kept, drawn
+
+
+def weights(p, t, kept, drawn, defensive=DEFENSIVE):
+    """
+    Returns the weights of realizations of the mixture of p (a fraction defensive of them)
+    and of the tilts t (see the module), from their kept and drawn squares of each level.
+
+    >>> weights(0.5, np.array([0.5]), np.array([[3]]), np.array([[4]])).tolist()
+    [1.0]
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log = np.where(kept > 0, kept * np.log(p / t), 0) + \
+              np.where(drawn > kept, (drawn - kept) * np.log((1 - p) / (1 - t)), 0)
+    # the ratio of the density of the tilts to that of p, bounded to avoid overflows
+    inverse = np.exp(np.minimum(-log.sum(axis=1), 700))
+    return 1 / (defensive + (1 - defensive) * inverse)
+
+
+def mixed_crossings(n, p, t, d, size, dim=2, kind="crossing", complement=False, connectivity="face", rng=None,
+                    defensive=DEFENSIVE):
+    """
+    Returns (crossed, kept, drawn, w) of size realizations (see tilted_crossings), a fraction
+    defensive of them drawn with p and the others with the tilts t, w being their weights if
+    they are crossed and 0 otherwise.
+    """
+    rng = np.random.default_rng(rng)
+    plain = int(round(defensive * size))
+    crossed, kept, drawn = (np.concatenate(x) for x in zip(
+        tilted_crossings(n, np.full(d, p), d, plain, dim, kind, complement, connectivity, rng),
+        tilted_crossings(n, t, d, size - plain, dim, kind, complement, connectivity, rng)))
+    return crossed, kept, drawn, weights(p, t, kept, drawn, defensive) * crossed
+
+
+def cross_entropy_tilt(n, p, d, dim=2, kind="crossing", complement=False, connectivity="face", rng=None,
+                       pilot=1000, rho=0.1, iterations=30, tolerance=1e-3, bound=0.01):
+    """
+    Returns the tilts of the levels of the crossings of depth d percolations of an n^dim grid
+    with probability p (see the module), kept within [bound, 1 - bound] (or up to p).
+    """
+    rng = np.random.default_rng(rng)
+    t = accepted = np.full(d, float(p))
+    for _ in range(iterations):
+        crossed, kept, drawn, w = mixed_crossings(n, p, t, d, pilot, dim, kind, complement, connectivity, rng)
+        if w.any() and w.sum()**2 < rho * crossed.sum() * (w**2).sum():
+            # a few crossed realizations carry the weight: the tilts went too far
+            t = (accepted + t) / 2
+            continue
+        if crossed.sum() < rho * pilot:
+            # move the coarsest level that can still move
+            t = t.copy()
+            if complement:
+                k = int(np.argmax(t > bound))
+                t[k] = max(t[k] / 2, bound)
+            else:
+                k = int(np.argmax(t < 1 - bound))
+                t[k] = min((1 + t[k]) / 2, 1 - bound)
+            continue
+        accepted = t
+        with np.errstate(divide="ignore", invalid="ignore"):
+            update = np.clip((w @ kept) / (w @ drawn), min(bound, p), max(1 - bound, p))
+        update = np.where(np.isfinite(update), update, t)
+        if np.abs(update - t).max() < tolerance:
+            return update
+        t = update
+    return t
+
+
+def importance_totals(n, p, t, d, rep, dim=2, kind="crossing", complement=False, connectivity="face", rng=None,
+                      max_memory=MAX_MEMORY):
+    """
+    Returns the totals (crossed, sum W I, sum (W I)^2) of rep realizations of the mixture of p
+    and of the tilts t (see the module).
+    """
+    rng = np.random.default_rng(rng)
+    totals = np.zeros(3)
+    for size in batches(rep, n**(dim*d), max_memory // BYTES_PER_CELL):
+        count("batches")
+        crossed, _, _, w = mixed_crossings(n, p, t, d, size, dim, kind, complement, connectivity, rng)
+        totals += crossed.sum(), w.sum(), (w**2).sum()
+    return totals
+
+
+def estimate(totals, rep, min_effective=MIN_EFFECTIVE):
+    """
+    Returns (cp, se, low, high, effective) of the totals of importance_totals: the crossing
+    probability, its standard error, its 95% interval (NaN if the effective number of
+    realizations is below min_effective) and the effective number of realizations of the
+    weights (Kish).
+
+    >>> estimate(np.array([10, 5.0, 2.5]), 10, min_effective=10)
+    (0.5, 0.0, 0.5, 0.5, 10.0)
+    >>> estimate(np.array([10, 5.0, 2.5]), 10)
+    (0.5, 0.0, nan, nan, 10.0)
+    """
+    _, s, s2 = totals
+    cp = float(s / rep)
+    se = math.sqrt(max(s2 / rep - cp**2, 0) / (rep - 1)) if rep > 1 else math.nan
+    effective = float(s**2 / s2) if s2 > 0 else 0.0
+    if effective < min_effective:
+        return cp, se, math.nan, math.nan, effective
+    return cp, se, max(0.0, cp - Z*se), min(1.0, cp + Z*se), effective
+
+
+def save_importance(n, d, ps, rep, dim=2, kind="crossing", complement=False, connectivity="face", file_name=None,
+                    rng=None, pilot=1000, max_memory=MAX_MEMORY, workers=1):
+    """
+    Appends the importance sampling estimates of the crossing probability of each p of ps to
+    the importance table of the crossing data file_name (default the file of the experiment).
+    """
+    file_name = file_name or data_file_name(kind, complement, dim, rep)
+    table = os.path.join(os.path.dirname(file_name), "importance", experiment_name(file_name) + ".csv")
+    os.makedirs(os.path.dirname(table), exist_ok=True)
+    entitle_file(table, HEADER)
+    rng = np.random.default_rng(rng)
+    print("n=", n, " d=", d, " rep=", rep, sep="")
+    budget = max_memory // workers
+    batch = batches(rep, n**(dim*d), budget // BYTES_PER_CELL)[0]
+    with open(table, "a") as f, worker_pool(workers, 3) as pool:
+        for p in ps:
+            with cell(experiment_name(table), n, d, p, rep):
+                with stage("tilt"):
+                    t = cross_entropy_tilt(n, p, d, dim, kind, complement, connectivity, rng, pilot)
+                if pool is None:
+                    totals = importance_totals(n, p, t, d, rep, dim, kind, complement, connectivity, rng, max_memory)
+                else:
+                    function = functools.partial(importance_totals, n, p, t, d, dim=dim, kind=kind,
+                                                 complement=complement, connectivity=connectivity, max_memory=budget)
+                    totals = pool.data(function, rep, batch, rng)
+                cp, se, low, high, effective = estimate(totals, rep)
+                with stage("write"):
+                    print(rep, n, d, repr(float(p)), " ".join("{:.6f}".format(x) for x in t), int(totals[0]), repr(cp), repr(se), repr(low),
+                          repr(high), repr(effective), sep=",", file=f)
+            print("  p={}: tilts {}, cp={:.4g} [{:.4g}, {:.4g}] ({} crossed, {:.0f} effective{})".format(
+                p, np.round(t, 3).tolist(), cp, low, high, int(totals[0]), effective,
+                ", the tail was not sampled" if math.isnan(low) else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("n", type=int)
+    parser.add_argument("d", type=int)
+    parser.add_argument("p", type=float, nargs="+")
+    parser.add_argument("--dim", type=int, choices=(2, 3), default=2)
+    parser.add_argument("--kind", choices=KINDS, default="crossing")
+    parser.add_argument("--complement", action="store_true")
+    parser.add_argument("--connectivity", choices=CONNECTIVITIES, default="face")
+    parser.add_argument("--rep", type=int, default=50000)
+    parser.add_argument("--pilot", type=int, default=1000, help="realizations of each step of the choice of the tilt")
+    parser.add_argument("--max-memory", type=parse_size, default=MAX_MEMORY)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--file", default=None, help="crossing data file, next to which the table is written")
+    parser.add_argument("--seed", type=int, default=None)
+    add_engine_argument(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    if args.engine:
+        set_engine(args.engine)
+    start_from_arguments(args)
+    save_importance(args.n, args.d, args.p, args.rep, args.dim, args.kind, args.complement, args.connectivity,
+                    args.file, args.seed, args.pilot, args.max_memory, args.workers)
+
+
+if __name__ == "__main__":
+    main()
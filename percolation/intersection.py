@@ -0,0 +1,38 @@
+import numpy as np
+
+
+def intersection_lengths_2d(n, d, a):
+    """
+    Calculates the length of intervals corresponding to intersections of the line going through
+    the origin with angle a (in degrees) to horizontal with each square of a n^d*n^d grid on the
+    unit square. Square [i, j] covers x in [i/m, (i+1)/m] and y in [j/m, (j+1)/m], with m = n**d.
+
+    Returns the sparse form (flat square indices, lengths) of the intersection length matrix.
+
+    >>> idx, L = intersection_lengths_2d(2, 1, 45)
+    >>> idx, L.round(6)
+    (array([0, 3]), array([0.707107, 0.707107]))
+    """
+    m = n**d
+    if a == 0:
+        return np.arange(m)*m, np.full(m, 1/m)
+    if a == 90:
+        return np.arange(m), np.full(m, 1/m)
+    t = np.tan(np.radians(a))
+    i = np.arange(m)[:, None]
+    j = np.arange(m)[None, :]
+    # x range of the line inside row j of squares, clipped to column i
+    x1 = np.maximum(i/m, j/(m*t))
+    x2 = np.minimum((i+1)/m, (j+1)/(m*t))
+    L = np.maximum(x2-x1, 0) / np.cos(np.radians(a))
+    idx = np.flatnonzero(L > 1e-12)
+    return idx, L.ravel()[idx]
+
+
+def intersection(P, lengths):
+    """
+    Calculates the intersection length of each realization of the batch P (shape (B, m, m))
+    using the sparse intersection lengths returned by intersection_lengths_2d.
+    """
+    idx, L = lengths
+    return P.reshape(len(P), -1)[:, idx] @ L
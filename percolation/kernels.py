@@ -0,0 +1,241 @@
+"""
+Compiled kernels of the numba engine (see engine.py).
+
+Each kernel loops over the realizations of a batch in parallel and works on one
+realization at a time, with grids flattened in C order: breadth-first searches use a
+queue of square indices instead of dilating the whole batch at each step. The random
+draws are made by NumPy before calling the kernels, so the results are the same as
+with the NumPy engine.
+"""
+import itertools
+
+import numpy as np
+from numba import njit, prange
+
+
+def steps(dim, semi=False, connectivity="face"):
+    """
+    Returns the moves (shape (K, dim)) to the neighbours of a square, without stepping
+    back along the first axis if semi.
+    """
+    if connectivity == "full":
+        moves = [s for s in itertools.product((-1, 0, 1), repeat=dim) if any(s)]
+    else:
+        moves = [tuple(s if a == b else 0 for b in range(dim)) for a in range(dim) for s in (1, -1)]
+    if semi:
+        moves = [s for s in moves if s[0] >= 0]
+    return np.array(moves, dtype=np.int64)
+
+
+@njit(cache=True, parallel=True)
+def refine_2d(P, keep, n):
+    """
+    Returns keep & P refined by n along each axis: the next level of the batch P
+    (shape (B, m, m)), keep holding the draws of the next level (modified in place).
+    """
+    B, m = keep.shape[0], keep.shape[1]
+    up = np.arange(m) // n
+    for b in prange(B):
+        for i in range(m):
+            for j in range(m):
+                keep[b, i, j] &= P[b, up[i], up[j]]
+    return keep
+
+
+@njit(cache=True, parallel=True)
+def refine_3d(P, keep, n):
+    """Same as refine_2d for a batch P of shape (B, m, m, m)."""
+    B, m = keep.shape[0], keep.shape[1]
+    up = np.arange(m) // n
+    for b in prange(B):
+        for i in range(m):
+            for j in range(m):
+                for k in range(m):
+                    keep[b, i, j, k] &= P[b, up[i], up[j], up[k]]
+    return keep
+
+
+def refine(P, keep, n):
+    """Dispatches to refine_2d or refine_3d (other dimensions are refined by NumPy)."""
+    if P.ndim == 3:
+        return refine_2d(P, keep, n)
+    if P.ndim == 4:
+        return refine_3d(P, keep, n)
+    for axis in range(1, P.ndim):
+        P = P.repeat(n, axis=axis)
+    return keep & P
+
+
+def offsets(moves, m):
+    """Returns the flat offsets of the moves in a m^dim grid (C order)."""
+    return moves @ m**np.arange(moves.shape[1]-1, -1, -1)
+
+
+@njit(cache=True)
+def _coordinates(x, m, c):
+    """Writes the coordinates of the flat index x of a m^dim grid into c."""
+    for a in range(len(c)-1, -1, -1):
+        c[a] = x % m
+        x //= m
+
+
+@njit(cache=True)
+def _inside(c, move, m):
+    """Tells whether the square of coordinates c moved by move lies in the m^dim grid."""
+    for a in range(len(c)):
+        if not 0 <= c[a] + move[a] < m:
+            return False
+    return True
+
+
+@njit(cache=True, parallel=True)
+def crossing_lengths(open_, moves, shifts):
+    """
+    Calculates the length of the shortest crossing along the first axis of the open squares of
+    each realization of the batch open_ (shape (B, m, ..., m)) with the moves (of flat offsets shifts),
+    or 0 when there is none, and the number of levels of its breadth-first search.
+    """
+    B, m = open_.shape[0], open_.shape[1]
+    cells = m**(open_.ndim-1)
+    flat = open_.reshape(B, cells)
+    layer = cells // m
+    lengths = np.zeros(B, dtype=np.int64)
+    steps = np.zeros(B, dtype=np.int64)
+    for b in prange(B):
+        dist = np.zeros(cells, dtype=np.int64)
+        queue = np.empty(cells, dtype=np.int64)
+        c = np.empty(open_.ndim-1, dtype=np.int64)
+        head = tail = 0
+        for x in range(layer):
+            if flat[b, x]:
+                dist[x] = 1
+                queue[tail] = x
+                tail += 1
+        if m == 1 and tail:
+            lengths[b] = 1
+        while head < tail and lengths[b] == 0:
+            x = queue[head]
+            head += 1
+            steps[b] = dist[x]
+            _coordinates(x, m, c)
+            for k in range(len(moves)):
+                y = x + shifts[k]
+                if _inside(c, moves[k], m) and flat[b, y] and dist[y] == 0:
+                    dist[y] = dist[x] + 1
+                    if y >= cells - layer:
+                        lengths[b] = steps[b] = dist[y]
+                        break
+                    queue[tail] = y
+                    tail += 1
+    return lengths, steps
+
+
+@njit(cache=True, parallel=True)
+def blob_info(P, D, centers, moves, shifts):
+    """
+    Calculates the blob data (vol, area, dist, step) of each realization of the batch P
+    (shape (B, m, ..., m)), grown from the flat indices centers with the moves (of flat
+    offsets shifts), D being the distance to center of each square.
+    """
+    B, m = P.shape[0], P.shape[1]
+    cells = m**(P.ndim-1)
+    flat = P.reshape(B, cells)
+    D = D.ravel()
+    vol = np.zeros(B, dtype=np.int64)
+    area = np.zeros(B, dtype=np.int64)
+    dist = np.zeros(B)
+    step = np.zeros(B, dtype=np.int64)
+    for b in prange(B):
+        level = np.full(cells, -1, dtype=np.int64)
+        queue = np.empty(cells, dtype=np.int64)
+        c = np.empty(P.ndim-1, dtype=np.int64)
+        head = tail = 0
+        for x in centers:
+            if flat[b, x]:
+                level[x] = 0
+                queue[tail] = x
+                tail += 1
+        while head < tail:
+            x = queue[head]
+            head += 1
+            step[b] = level[x] + 1
+            _coordinates(x, m, c)
+            for k in range(len(moves)):
+                y = x + shifts[k]
+                if not _inside(c, moves[k], m) or not flat[b, y]:
+                    area[b] += 1
+                elif level[y] < 0:
+                    level[y] = level[x] + 1
+                    dist[b] = max(dist[b], D[y])
+                    queue[tail] = y
+                    tail += 1
+        vol[b] = tail
+    return vol, area, dist, step
+
+
+@njit(cache=True, parallel=True)
+def projection(M, left, width):
+    """
+    Calculates the length of the union of the intervals [left, left+width] of the retained
+    squares of each row of M, the squares being sorted by left end (see projection.py).
+    """
+    B, cells = M.shape
+    lengths = np.zeros(B)
+    for b in prange(B):
+        previous = -1
+        total = 0.0
+        for k in range(cells):
+            if M[b, k]:
+                total += width if previous < 0 else min(left[k] - left[previous], width)
+                previous = k
+        lengths[b] = total
+    return lengths
+
+
+@njit(cache=True)
+def _find(parent, x):
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+@njit(cache=True)
+def merge_row(previous, top, row):
+    """
+    Hoshen-Kopelman step of a streamed crossing (see streaming.py): returns the labels of the
+    open squares of row (-1 for the closed ones) and whether each label is connected to the
+    first row, previous being the labels of the previous row and top their flags.
+    """
+    m = len(row)
+    count = len(top)
+    parent = np.arange(count + m)
+    runs = np.full(m, -1, dtype=np.int64)
+    r = count - 1
+    for c in range(m):
+        if row[c]:
+            if c == 0 or not row[c-1]:
+                r += 1
+            runs[c] = r
+            if previous[c] >= 0:
+                a = _find(parent, previous[c])
+                b = _find(parent, r)
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+    flags = np.zeros(r + 1, dtype=np.bool_)
+    for label in range(count):
+        if top[label]:
+            flags[_find(parent, label)] = True
+    compact = np.full(r + 1, -1, dtype=np.int64)
+    labels = np.full(m, -1, dtype=np.int64)
+    connected = np.zeros(m, dtype=np.bool_)
+    k = 0
+    for c in range(m):
+        if runs[c] >= 0:
+            root = _find(parent, runs[c])
+            if compact[root] < 0:
+                compact[root] = k
+                connected[k] = flags[root]
+                k += 1
+            labels[c] = compact[root]
+    return labels, connected[:k]
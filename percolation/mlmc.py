@@ -0,0 +1,161 @@
+"""
+Multilevel Monte Carlo estimates of deep percolations (d -> infinity figures).
+
+The expected observable at depth d is the telescoping sum
+
+    E[X_d] = E[X_1] + E[X_2 - X_1] + ... + E[X_d - X_{d-1}],
+
+each difference being measured on the levels k and k-1 of the same depth k realizations,
+so that its variance is small (it vanishes when the observable converges with depth). The
+shallow terms, cheap and noisy, get many samples and the deep ones few: after a pilot run
+of each level, the numbers of samples minimizing the cost of an estimate of standard error
+error are N_k ~ sqrt(V_k / C_k), V_k being the variance of the k-th term and C_k the cost
+of a sample (its number of cells, so that the estimates only depend on the seed).
+
+The observables are the crossing probability cp, the density of the retained squares and
+the average distance avg_dist of the blob of the center (as derived for the figures):
+
+    python -m percolation.mlmc cp 2 10 --error 0.005 --p-step 0.05
+
+Crossings of the level k being crossings of the level k-1, only the crossed realizations of
+the level k-1 are refined; the density is drawn without any grid (see grow_counts).
+"""
+import argparse
+import math
+
+import numpy as np
+
+from percolation.fractal_percolation import fractal_percolation, refine, grow_counts, batches
+from percolation.crossings import crossing, KINDS, BYTES_PER_CELL as CROSSING_BYTES_PER_CELL
+from percolation.blob import blob_info, distance_to_center, BYTES_PER_CELL as BLOB_BYTES_PER_CELL
+from percolation.engine import set_engine, add_engine_argument
+from percolation.profiling import stage, cell, add_trace_arguments, start_from_arguments
+from percolation.save_utils import entitle_file, experiment_name, p_grid, parse_size
+
+
+OBSERVABLES = ("cp", "density", "avg_dist")
+HEADER = "n,d,p,error,estimate,se,samples,cost"
+MAX_MEMORY = 2**30
+BYTES_PER_CELL = {"cp": CROSSING_BYTES_PER_CELL, "density": 1, "avg_dist": BLOB_BYTES_PER_CELL}
+
+
+def avg_dist(P, n, k):
+    """
+    Returns the distance of the blob of the center to the center, relative to the half
+    diagonal, of each realization of the batch P of depth k (avg_dist of the blob figures).
+    """
+    half_diagonal = np.sqrt(P.ndim-1)/2
+    dist = blob_info(P, distance_to_center(n, k, P.ndim-1))[2]
+    return half_diagonal / (half_diagonal - half_diagonal/n**k) * dist / n**k
+
+
+def level_samples(observable, n, p, k, size, dim=2, kind="crossing", rng=None):
+    """
+    Returns the values (fine, coarse) of observable at the depths k and k-1 of the levels of
+    size depth k percolations of an n^dim grid with probability p (coarse being 0 if k = 1).
+    """
+    rng = np.random.default_rng(rng)
+    coarse = np.zeros(size)
+    if observable == "density":
+        Z = grow_counts(np.ones(size, dtype=np.int64), n**dim, p, k-1, rng)
+        if k > 1:
+            coarse = Z / n**(dim*(k-1))
+        return grow_counts(Z, n**dim, p, 1, rng) / n**(dim*k), coarse
+    P = fractal_percolation(n, p, k-1, dim, size, rng)
+    if observable == "avg_dist":
+        if k > 1:
+            coarse = avg_dist(P, n, k-1)
+        return avg_dist(refine(P, n, p, rng), n, k), coarse
+    crossed = crossing(P, kind) != 0
+    if k > 1:
+        coarse = crossed.astype(float)
+    fine = np.zeros(size)
+    fine[crossed] = crossing(refine(P[crossed], n, p, rng), kind) != 0
+    return fine, coarse
+
+
+def cost(observable, n, k, dim=2):
+    """Returns the cost of a sample of the level k: its number of cells (its depth for the density)."""
+    return k if observable == "density" else n**(dim*k) + n**(dim*(k-1))
+
+
+def mlmc(observable, n, p, d, error, dim=2, kind="crossing", pilot=100, rng=None, max_memory=MAX_MEMORY):
+    """
+    Estimates the expected observable ("cp", "density" or "avg_dist") of a depth d percolation
+    of an n^dim grid with probability p, with a standard error of about error. Returns
+    (estimate, standard error, levels), levels being a structured array of the level k, its
+    number of samples, the mean and variance of its term and the cost of a sample. The
+    estimate (a sum of noisy differences) is clipped to [0, 1], the range of the observables.
+    """
+    rng = np.random.default_rng(rng)
+    levels = np.zeros(d, dtype=[("k", "i8"), ("samples", "i8"), ("mean", "f8"), ("variance", "f8"), ("cost", "f8")])
+    levels["k"] = np.arange(1, d+1)
+    levels["cost"] = [cost(observable, n, k, dim) for k in levels["k"]]
+    sums = np.zeros((d, 2))
+    todo = np.full(d, pilot)
+    while todo.any():
+        for k in np.flatnonzero(todo):
+            for size in batches(int(todo[k]), n**(dim*(k+1)), max_memory // BYTES_PER_CELL[observable]):
+                fine, coarse = level_samples(observable, n, p, k+1, size, dim, kind, rng)
+                sums[k] += (fine - coarse).sum(), ((fine - coarse)**2).sum()
+        levels["samples"] += todo
+        levels["mean"] = sums[:, 0] / levels["samples"]
+        levels["variance"] = np.maximum(sums[:, 1] / levels["samples"] - levels["mean"]**2, 0)
+        # numbers of samples of least cost for a variance error^2 of the estimate
+        spread = np.sqrt(levels["variance"] * levels["cost"]).sum()
+        target = np.ceil(np.sqrt(levels["variance"] / levels["cost"]) * spread / error**2)
+        todo = np.maximum(target.astype(np.int64) - levels["samples"], 0)
+    se = math.sqrt((levels["variance"] / levels["samples"]).sum())
+    return float(np.clip(levels["mean"].sum(), 0, 1)), se, levels
+
+
+def save_mlmc(observable, n, d, error, dim=2, kind="crossing", file_name=None, ps=None, pilot=100, rng=None,
+              max_memory=MAX_MEMORY):
+    """
+    Appends the multilevel estimate of observable for each probability of ps (default p_grid())
+    to file_name, with its standard error, its total number of samples and its cost (cells).
+    """
+    name = observable if observable != "cp" or kind == "crossing" else observable + "_" + kind
+    file_name = file_name or "data/mlmc_" + name + "_" + str(dim) + "D.csv"
+    ps = p_grid() if ps is None else ps
+    rng = np.random.default_rng(rng)
+    print("n=", n, " d=", d, " error=", error, sep="")
+    entitle_file(file_name, HEADER)
+    with open(file_name, "a") as f:
+        for p in ps:
+            with cell(experiment_name(file_name), n, d, p, 0):
+                estimate, se, levels = mlmc(observable, n, p, d, error, dim, kind, pilot, rng, max_memory)
+                samples = int(levels["samples"].sum())
+                total = float((levels["samples"] * levels["cost"]).sum())
+                with stage("write"):
+                    print(n, d, repr(float(p)), repr(float(error)), repr(estimate), repr(se), samples, repr(total),
+                          sep=",", file=f)
+            print("  p={:.4f}: {:.6f} +- {:.6f}, samples by level {}".format(
+                p, estimate, se, levels["samples"].tolist()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("observable", choices=OBSERVABLES)
+    parser.add_argument("n", type=int)
+    parser.add_argument("d", type=int)
+    parser.add_argument("--error", type=float, default=0.005, help="standard error of the estimates")
+    parser.add_argument("--dim", type=int, choices=(2, 3), default=2)
+    parser.add_argument("--kind", choices=KINDS, default="crossing", help="kind of the crossings of cp")
+    parser.add_argument("--pilot", type=int, default=100, help="samples of each level of the pilot run")
+    parser.add_argument("--p-step", type=float, default=0.01)
+    parser.add_argument("--max-memory", type=parse_size, default=MAX_MEMORY)
+    parser.add_argument("--file", default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    add_engine_argument(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    if args.engine:
+        set_engine(args.engine)
+    start_from_arguments(args)
+    save_mlmc(args.observable, args.n, args.d, args.error, args.dim, args.kind, args.file, p_grid(args.p_step),
+              args.pilot, args.seed, args.max_memory)
+
+
+if __name__ == "__main__":
+    main()
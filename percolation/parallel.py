@@ -0,0 +1,157 @@
+"""
+Parallel engine: the realizations of each (n, d, p) are split into chunks simulated by a
+pool of worker processes.
+
+Each worker owns one row of an accumulator array in shared memory and adds the totals of
+each of its chunks to it with a single vector add (all the angles of a sweep at once):
+nothing is sent back per realization, and the rows are reduced once all chunks are done.
+Chunk k always uses the k-th random stream spawned from the seed, so the totals do not
+depend on which worker runs which chunk. With addressable draws (see philox.py), chunks are
+ranges of realizations instead, returning the values of their realizations (or their totals
+of integers) to be summed exactly: the totals do not depend on the chunks either.
+
+When a trace is started (see profiling.py), each worker traces the chunks it runs and
+returns their stages and counters, merged into the cell of the parent once the chunks are
+done.
+"""
+import contextlib
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from percolation import engine, profiling
+from percolation.philox import exact_totals
+
+
+# chunks per worker for each (n, d, p), to balance the load between workers
+CHUNKS_PER_WORKER = 4
+
+_memory = None
+_accumulators = None
+_row = None
+_started = None
+
+
+def _initialize(name, shape, counter, engine_name, started, trace):
+    """Attaches a worker to the shared accumulators, gives it its row and starts its trace."""
+    global _accumulators, _row, _memory, _started
+    _memory = shared_memory.SharedMemory(name=name)
+    _accumulators = np.ndarray(shape, dtype=np.float64, buffer=_memory.buf)
+    with counter.get_lock():
+        _row = counter.value
+        counter.value += 1
+    _started = started
+    engine.set_engine(engine_name)
+    if engine_name == "numba":
+        import numba
+        numba.set_num_threads(1)
+    if trace is None:
+        profiling.stop()
+    else:
+        profiling.start(*trace)
+
+
+def _queued(chunks):
+    """Returns the number of chunks still waiting to be run when the worker starts one of chunks."""
+    with _started.get_lock():
+        _started.value += 1
+        return chunks - _started.value
+
+
+def _run(function, size, seed, chunks):
+    """
+    Simulates a chunk of size realizations and adds its totals to the row of the worker,
+    returning its profile (see profiling.chunk).
+    """
+    with profiling.chunk(_queued(chunks)) as part:
+        totals = np.asarray(function(rep=size, rng=np.random.default_rng(seed)), dtype=np.float64)
+        _accumulators[_row, :totals.size] += totals.ravel()
+    return part
+
+
+def _run_range(function, start, stop, chunks):
+    """
+    Simulates the realizations start..stop-1, returning (rows, profile): their rows to be
+    summed exactly (see philox.exact_totals) and the profile of the chunk (see profiling.chunk).
+    """
+    with profiling.chunk(_queued(chunks)) as part:
+        rows = np.asarray(function(start=start, stop=stop), dtype=np.float64)
+    return rows, part
+
+
+class WorkerPool:
+    """
+    A pool of workers, each with a row of width accumulators in shared memory, used as:
+
+        with WorkerPool(4, 3) as pool:
+            lc, nc, sq = pool.totals(functools.partial(crossing_data, n, p, d), rep, chunk, seed)
+
+    Functions run in the pool must be defined at module level (to be pickled).
+    """
+
+    def __init__(self, workers, width):
+        self.workers = workers
+        self.width = width
+        self.memory = shared_memory.SharedMemory(create=True, size=8*workers*width)
+        self.accumulators = np.ndarray((workers, width), dtype=np.float64, buffer=self.memory.buf)
+        counter = multiprocessing.Value("i", 0)
+        self.started = multiprocessing.Value("i", 0)
+        self.pool = multiprocessing.Pool(workers, _initialize, (self.memory.name, (workers, width), counter,
+                                                                engine.get_engine(), self.started, profiling.settings()))
+
+    def totals(self, function, rep, chunk, seed=None):
+        """
+        Returns the totals (array of at most width values) of function(rep=size, rng=rng)
+        summed over chunks of at most chunk realizations, seed being the seed of the random
+        streams of the chunks.
+        """
+        self.accumulators[:] = 0
+        full, last = divmod(rep, chunk)
+        sizes = [chunk]*full + ([last] if last else [])
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        self.started.value = 0
+        profiling.merge(self.pool.starmap(_run, [(function, size, s, len(sizes)) for size, s in zip(sizes, seeds)],
+                                          chunksize=1))
+        return self.accumulators.sum(axis=0)
+
+    def data(self, function, rep, batch, rng):
+        """
+        Returns the totals of function over rep realizations, in chunks of at most batch
+        realizations, the seed of their random streams being drawn from rng.
+        """
+        chunk = max(1, min(batch, -(-rep // (CHUNKS_PER_WORKER*self.workers))))
+        return self.totals(function, rep, chunk, int(rng.integers(2**63)))
+
+    def addressed(self, function, rep, batch):
+        """
+        Returns the exact totals (see philox.exact_totals) of the rows of
+        function(start=start, stop=stop) over the realizations 0..rep-1, in ranges of at most
+        batch realizations: they do not depend on the ranges.
+        """
+        chunk = max(1, min(batch, -(-rep // (CHUNKS_PER_WORKER*self.workers))))
+        starts = range(0, rep, chunk)
+        self.started.value = 0
+        results = self.pool.starmap(_run_range, [(function, start, min(start + chunk, rep), len(starts))
+                                                 for start in starts], chunksize=1)
+        profiling.merge([part for _, part in results])
+        return exact_totals(np.concatenate([rows.reshape(-1, rows.shape[-1]) for rows, _ in results]))
+
+    def close(self):
+        """Stops the workers and frees the shared memory."""
+        self.pool.close()
+        self.pool.join()
+        del self.accumulators
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def worker_pool(workers, width):
+    """Returns a WorkerPool if workers > 1, otherwise a context giving None (serial engine)."""
+    return WorkerPool(workers, width) if workers > 1 else contextlib.nullcontext()
@@ -0,0 +1,122 @@
+"""
+Addressable random draws: every draw of a realization is a function of (campaign seed, n, d,
+p, dim), the index of the realization in the campaign, the level and the node of the tree,
+so that any realization is regenerated alone from its index, and the totals of a sweep do not
+depend on how its realizations are split into batches, chunks or workers.
+
+The draws are made by the counter-based generator Philox4x32-10 (the Philox of Random123, as
+NumPy's Philox but with 32-bit words), computed for a whole batch at once: the counter of a
+node is (node // 4, level, index of the realization (two words)) and its key is drawn from the
+campaign; each block of the generator gives the uniforms of 4 nodes, made as NumPy makes its
+float32 uniforms (the 24 high bits of a 32-bit word). A sweep is given its realizations as
+a Realizations object instead of a numpy Generator: fractal_percolation and truncations take
+the draws of the next realizations of it for each batch.
+
+Sums of floats depend on the order of their terms, so the addressed sweeps return the values
+of their realizations (or totals of integers) and sum them exactly (see exact_totals).
+
+>>> [hex(x) for x in philox4x32([[0, 0, 0, 0]], (0, 0))[0]]
+['0x6627e8d5', '0xe169c58d', '0xbc57ac4c', '0x9b00dbd8']
+"""
+import math
+
+import numpy as np
+
+from percolation.store import P_DIGITS
+
+
+MULTIPLIERS = (0xD2511F53, 0xCD9E8D57)
+WEYL = (0x9E3779B9, 0xBB67AE85)
+ROUNDS = 10
+MASK = np.uint64(0xFFFFFFFF)
+
+
+def philox4x32(counters, key):
+    """
+    Returns the blocks (shape (N, 4), uint32 values as uint64) of the Philox4x32-10 generator
+    for the counters (shape (N, 4)) and the key (two 32-bit words).
+
+    >>> pi = [[0x243f6a88, 0x85a308d3, 0x13198a2e, 0x03707344]]
+    >>> [hex(x) for x in philox4x32(pi, (0xa4093822, 0x299f31d0))[0]]
+    ['0xd16cfe09', '0x94fdcceb', '0x5001e420', '0x24126ea1']
+    """
+    c = np.asarray(counters, dtype=np.uint64)
+    c0, c1, c2, c3 = (c[:, i] & MASK for i in range(4))
+    k0, k1 = (int(x) & 0xFFFFFFFF for x in key)
+    for r in range(ROUNDS):
+        if r:
+            k0, k1 = (k0 + WEYL[0]) & 0xFFFFFFFF, (k1 + WEYL[1]) & 0xFFFFFFFF
+        product0 = np.uint64(MULTIPLIERS[0]) * c0
+        product1 = np.uint64(MULTIPLIERS[1]) * c2
+        c0, c1, c2, c3 = ((product1 >> np.uint64(32)) ^ c1 ^ np.uint64(k0), product1 & MASK,
+                          (product0 >> np.uint64(32)) ^ c3 ^ np.uint64(k1), product0 & MASK)
+    return np.stack([c0, c1, c2, c3], axis=-1)
+
+
+def campaign_key(seed, n, d, p, dim=2):
+    """Returns the key (two 32-bit words) of the draws of the (n, d, p, dim) realizations of the campaign seed."""
+    words = [int(seed), n, d, int(round(p * 10**P_DIGITS)), dim]
+    return tuple(int(x) for x in np.random.SeedSequence(words).generate_state(2, np.uint32))
+
+
+class Draws:
+    """
+    The uniforms of the realizations samples (their indices in the campaign) of the key,
+    drawn level by level by refine (see fractal_percolation.py) through random, as those of
+    a numpy Generator.
+    """
+
+    def __init__(self, key, samples):
+        self.key = key
+        self.samples = np.asarray(samples, dtype=np.uint64)
+        self.level = 0
+
+    def random(self, shape, dtype=np.float32):
+        """Returns the uniforms of the nodes of the next level (shape (len(samples), m, ..., m))."""
+        nodes = int(np.prod(shape[1:]))
+        blocks = -(-nodes // 4)
+        counters = np.zeros((len(self.samples), blocks, 4), dtype=np.uint64)
+        counters[..., 0] = np.arange(blocks, dtype=np.uint64)
+        counters[..., 1] = self.level
+        counters[..., 2] = (self.samples & MASK)[:, None]
+        counters[..., 3] = (self.samples >> np.uint64(32))[:, None]
+        self.level += 1
+        words = philox4x32(counters.reshape(-1, 4), self.key).reshape(len(self.samples), 4*blocks)[:, :nodes]
+        uniforms = (words >> np.uint64(8)).astype(np.float32) * np.float32(1/16777216)
+        return uniforms.astype(dtype).reshape(shape)
+
+
+class Realizations:
+    """
+    The realizations start, start+1, ... of the key, drawn batch by batch: each batch taken
+    (see batch) is made of the next realizations. Passed as the rng of a sweep, they make its
+    draws addressable (see fractal_percolation.generator).
+    """
+
+    def __init__(self, key, start=0):
+        self.key = key
+        self.start = start
+
+    def batch(self, size):
+        """Returns the draws of the next size realizations."""
+        draws = Draws(self.key, np.arange(self.start, self.start + size))
+        self.start += size
+        return draws
+
+
+def addressed(function, key, start, stop):
+    """Returns function(rep=stop-start, rng=...) on the realizations start..stop-1 of the key."""
+    return function(rep=stop - start, rng=Realizations(key, start))
+
+
+def exact_totals(rows):
+    """
+    Returns the sums of the columns of rows (values of realizations, or totals of chunks),
+    correctly rounded (math.fsum): they do not depend on the order or the grouping of the rows.
+
+    >>> exact_totals([[0.1, 1], [0.2, 2], [0.3, 3]]).tolist()
+    [0.6, 6.0]
+    """
+    rows = np.asarray(rows, dtype=np.float64)
+    rows = rows.reshape(-1, rows.shape[-1])
+    return np.array([math.fsum(column) for column in rows.T])
@@ -0,0 +1,8 @@
+"""
+The figures of data_visualization/: their specs (figures.py, registry.py), the targets and
+incremental renders (targets.py, listed without importing pandas or matplotlib), and the
+loaders of their data (data.py).
+
+    python -m percolation.plotting list
+    python -m percolation.plotting render crossings_2D_density blob2D_avg_dist --workers 4
+"""
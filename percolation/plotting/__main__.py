@@ -0,0 +1,64 @@
+"""
+Lists, renders or shows the figures of data_visualization/, or bundles their data for the pages
+of docs/ (run from the root of the repository):
+
+    python -m percolation.plotting list --verbose
+    python -m percolation.plotting render crossings_2D_density blob2D_avg_dist --workers 4
+    python -m percolation.plotting render --workers 8
+    python -m percolation.plotting show crossings_2D_avg_steps
+    python -m percolation.plotting bundle
+
+render only redraws the figures whose spec or data changed since they were last rendered
+(see targets.py), unless --force. bundle writes the data of the figures of the pages (all of
+them by default) to docs/data/ (see bundles.py).
+"""
+import argparse
+
+from percolation.plotting.targets import targets, units, inputs, key, render_all, show
+from percolation.plotting.bundles import PAGES, bundle, image_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    listed = commands.add_parser("list", help="list the targets")
+    listed.add_argument("--verbose", action="store_true", help="also list the images and data files of each target")
+    rendered = commands.add_parser("render", help="render targets (all of them by default)")
+    rendered.add_argument("targets", nargs="*")
+    rendered.add_argument("--workers", type=int, default=1)
+    rendered.add_argument("--force", action="store_true", help="render the figures even if they are up to date")
+    shown = commands.add_parser("show", help="show the figures of a target")
+    shown.add_argument("target")
+    bundled = commands.add_parser("bundle", help="write the data bundles of the pages of docs/ (all of them by default)")
+    bundled.add_argument("pages", nargs="*", choices=[[]] + sorted(PAGES), metavar="page")
+    args = parser.parse_args()
+    if args.command == "bundle":
+        for page in args.pages or sorted(PAGES):
+            figures, size = bundle(page)
+            images = image_bytes(page)
+            print("{}: {} figures, {} bytes ({:.0f}x smaller than their images)".format(
+                page, figures, size, images / size if size else 0))
+        return
+    if args.command == "list":
+        for name in targets():
+            print(name)
+            if args.verbose:
+                for unit in units([name]):
+                    print("   ", key(unit), "<-", ", ".join(inputs(unit)) or "-")
+        return
+    names = args.targets or targets() if args.command == "render" else [args.target]
+    unknown = sorted(set(names) - set(targets()))
+    if unknown:
+        parser.error("unknown targets: " + ", ".join(unknown))
+    if args.command == "show":
+        show(args.target)
+        return
+    rendered = 0
+    for (name, k), seconds in render_all(names, args.workers, args.force):
+        print(name if k is None else name + "[" + str(k) + "]", "{:.2f}s".format(seconds))
+        rendered += 1
+    print(rendered, "rendered,", len(units(names)) - rendered, "up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Data bundles of the pages of the results site (docs/): the curves of the figures of a page are
+written to docs/data/<page>.bin.gz and described by docs/data/<page>.json, so that docs/plot.js
+draws them in the browser (with zoom and hover) instead of fetching the images of
+data_visualization/.
+
+The values are sliced per curve: the columns x, the metric and its interval (if the figure has
+bands) of the rows (n, d) (and angle) of an experiment are float32 slices, each stored once
+however many curves use it (the p grids are shared by most of them). The values are rounded to
+16 significant bits (a relative error of at most 2^-16, far below the errors of the estimates),
+stored little-endian byte plane by byte plane (the first bytes of all the values, then the
+second bytes...) and compressed with gzip: the first plane is then all zeros. The description
+of a page lists its slices (offset and length in values) and its figures by image (relative to
+data_visualization/, as the pages name them): their titles, labels, limits, legend and series
+(label, colour and slices of x, y, low and high).
+
+The images of a page without a figure in the registry (the theoretical curves of the plotting
+scripts) are not bundled, and the pages still show them: percolation.html only shows such
+images, so it has no bundle.
+
+    python -m percolation.plotting bundle crossings blob
+"""
+import gzip
+import json
+import os
+import re
+
+from percolation.plotting.registry import FIGURES
+
+
+DOCS = "docs"
+IMAGES = "data_visualization/"
+# page of docs/ -> pattern of the images it shows (relative to data_visualization/)
+PAGES = {
+    "blob": r"blob_[23]D/",
+    "crossings": r"crossing_[23]D/(?!complement_)",
+    "complement_crossings": r"crossing_[23]D/complement_",
+    "intersection": r"intersection_2D/",
+    "projection": r"projection_2D/",
+}
+# low bits of the mantissas of the float32 values rounded off
+ROUNDED_BITS = 8
+# matplotlib's default colour cycle, for the series without a colour
+CYCLE = ("#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+         "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf")
+
+
+def page_figures(page):
+    """Returns the figures shown by page, by image (relative to data_visualization/)."""
+    pattern = re.compile(PAGES[page])
+    return {figure.output[len(IMAGES):]: figure for name in sorted(FIGURES) for figure in FIGURES[name]
+            if figure.output and pattern.match(figure.output[len(IMAGES):])
+            and all(os.path.exists(f) for f in figure.inputs())}
+
+
+def colour(color, k):
+    """
+    Returns the CSS colour of a series (an (r, g, b) tuple in [0, 1], or the k-th colour of the cycle if None).
+
+    >>> colour((1, 0.5, 0), 0), colour(None, 11)
+    ('#ff8000', '#ff7f0e')
+    """
+    if color is None:
+        return CYCLE[k % len(CYCLE)]
+    return "#" + "".join("{:02x}".format(int(round(255 * min(max(c, 0), 1)))) for c in color)
+
+
+def rounded(values, bits=ROUNDED_BITS):
+    """
+    Returns the float32 values rounded to their bits lowest mantissa bits cleared (to nearest).
+
+    >>> rounded([1 + 2**-10, 1 + 2**-20, float("inf")]).tolist()
+    [1.0009765625, 1.0, inf]
+    """
+    import numpy as np
+    values = np.array(values, dtype="<f4")
+    finite = np.isfinite(values)
+    words = values.view(np.uint32)
+    words[finite] = (words[finite] + np.uint32(1 << (bits - 1))) & np.uint32(~((1 << bits) - 1) & 0xFFFFFFFF)
+    return values
+
+
+def bundle(page, directory=None):
+    """
+    Writes the bundle of page to directory (default docs/data), and returns the number of
+    figures and the size in bytes of the bundle as served (the description gzipped, as web
+    servers do).
+    """
+    import numpy as np
+    from percolation.plotting.figures import curves
+    directory = directory or os.path.join(DOCS, "data")
+    os.makedirs(directory, exist_ok=True)
+    slices = {}
+
+    def add(column):
+        values = rounded(column)
+        return slices.setdefault(values.tobytes(), len(slices))
+
+    figures = {}
+    for image, figure in sorted(page_figures(page).items()):
+        series = []
+        for k, (s, x, y, low, high) in enumerate(curves(figure)):
+            series.append({"label": s.legend(), "color": colour(s.color, k), "x": add(x), "y": add(y),
+                           "low": None if low is None else add(low), "high": None if high is None else add(high)})
+        figures[image] = {
+            "title": figure.title, "xlabel": figure.xlabel, "ylabel": figure.ylabel,
+            "xlim": figure.xlim, "ylim": figure.ylim, "legend": figure.legend, "marker": figure.marker,
+            "series": series,
+        }
+    lengths = [len(values) // 4 for values in slices]
+    offsets = np.cumsum([0] + lengths[:-1]).tolist()
+    description = {"slices": [[o, n] for o, n in zip(offsets, lengths)], "figures": figures}
+    data = np.frombuffer(b"".join(slices), dtype=np.uint8)
+    # the float32 values are stored byte plane by byte plane (their exponents compress well)
+    shuffled = data.reshape(-1, 4).T.tobytes()
+    with open(os.path.join(directory, page + ".bin.gz"), "wb") as f:
+        f.write(gzip.compress(shuffled, 9, mtime=0))
+    text = json.dumps(description, separators=(",", ":"), allow_nan=False)
+    with open(os.path.join(directory, page + ".json"), "w") as f:
+        f.write(text)
+    return len(figures), os.path.getsize(os.path.join(directory, page + ".bin.gz")) + len(gzip.compress(text.encode()))
+
+
+def image_bytes(page):
+    """Returns the size in bytes of the images of data_visualization/ bundled for page."""
+    return sum(os.path.getsize(IMAGES + image) for image in page_figures(page) if os.path.exists(IMAGES + image))
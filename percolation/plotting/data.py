@@ -0,0 +1,120 @@
+"""
+Loaders of the data files for the figures: each experiment is read and its derived columns
+(crossing probability, density, average lengths...) are computed on first use only, and
+kept for the following figures of the process.
+
+pandas and NumPy are imported by the loaders, not by this module.
+"""
+import functools
+import os
+
+
+DATA = "data"
+
+
+def _crossings(data, dim, np):
+    data["cp"] = data["nc"] / data["rep"]
+    data["max"] = data["rep"] * ((data["n"]**dim)**data["d"])
+    data["density"] = data["sq"] / data['max']
+    data["al"] = data["lc"] / data["nc"]
+    data["ral"] = data["al"] / data["n"]**data["d"]
+
+
+def _complement_crossings(data, dim, np):
+    data["cp"] = data["nc"] / data["rep"]
+    data["max"] = data["rep"] * ((data["n"]**dim)**data["d"])
+    data["density"] = (data['max'] - data["sq"]) / data['max']
+    data["al"] = data["lc"] / data["nc"]
+    data["ral"] = data["al"] / data["n"]**data["d"]
+
+
+def _restricted_crossings(exponent, dimension):
+    # semi-straight and straight crossings (the loaders of the 3D semi-straight crossings use
+    # the 2D maximum, kept as such for the figures)
+    def derive(data, dim, np):
+        data["cp"] = data["nc"] / data["rep"]
+        data["max"] = data["rep"] * ((data["n"]**(data["d"]))**exponent)
+        data["density"] = data["sq"] / data['max']
+        data["dim"] = dimension(data, np)
+        data["al"] = data["lc"] / data["nc"]
+        data["ral"] = data["al"] / data["n"]**data["d"]
+    return derive
+
+
+def _blob(data, dim, np):
+    data["side"] = data["n"]**(data["d"])
+    data["max"] = data["rep"] * (data["side"]**dim)
+    data["avg_interior"] = (data["interior"] / data["rep"]) / ((data["n"]**data["d"])**dim)
+    data["avg_boundary"] = data["boundary"] / data["rep"] / ((data["n"]**data["d"])**(dim-1))
+    half_diagonal = np.sqrt(dim)/2
+    data["rescale_dist"] = (half_diagonal / (half_diagonal - (half_diagonal/(data["n"]**data["d"]))))
+    data["avg_dist"] = data["rescale_dist"] * (data["dist"] / data["rep"] / (data["n"]**data["d"]))
+    data["avg_step"] = data["step"] / data["rep"] / (data["n"]**data["d"])
+
+
+def _wide(data, dim, np):
+    pass
+
+
+_open_dimension = lambda data, np: np.log(data["sq"]) / np.log(data["max"])
+_closed_dimension = lambda data, np: (np.log(data["max"]) - np.log(data["sq"])) / np.log(data["max"])
+
+# experiment -> (dimension, derived columns)
+EXPERIMENTS = {
+    "crossings_2D_50000": (2, _crossings),
+    "crossings_3D_50000": (3, _crossings),
+    "complement_crossings_2D_50000": (2, _complement_crossings),
+    "complement_crossings_3D_50000": (3, _complement_crossings),
+    "crossings_semi_straight_2D_50000": (2, _restricted_crossings(2, _open_dimension)),
+    "crossings_semi_straight_3D_50000": (3, _restricted_crossings(2, _open_dimension)),
+    "complement_crossings_semi_straight_2D_50000": (2, _restricted_crossings(2, _open_dimension)),
+    "complement_crossings_semi_straight_3D_50000": (3, _restricted_crossings(2, _open_dimension)),
+    "crossings_straight_2D_50000": (2, _restricted_crossings(2, _open_dimension)),
+    "crossings_straight_3D_50000": (3, _restricted_crossings(3, _open_dimension)),
+    "complement_crossings_straight_2D_50000": (2, _restricted_crossings(2, _closed_dimension)),
+    "complement_crossings_straight_3D_50000": (3, _restricted_crossings(3, _closed_dimension)),
+    "blob_2D_50000": (2, _blob),
+    "blob_3D_50000": (3, _blob),
+    "intersections_2D_50000": (2, _wide),
+    "projections_2D_50000": (2, _wide),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def load(experiment):
+    """
+    Returns the data of experiment (a file name of data/ without extension) sorted by
+    (p, d, n), with its derived columns and their intervals (see metrics.py). The table is
+    shared: figures must not modify it. The critical points of an experiment (see
+    percolation/critical.py) are the experiment critical/<experiment>, sorted by (n, d).
+    """
+    import numpy as np
+    import pandas as pd
+    from percolation.plotting.metrics import intervals
+    data = pd.read_csv(os.path.join(DATA, experiment + ".csv"))
+    if experiment.startswith("critical/"):
+        return data.sort_values(["n", "d"])
+    dim, derive = EXPERIMENTS[experiment]
+    data = data.sort_values(["p", "d", "n"])
+    derive(data, dim, np)
+    intervals(data, dim)
+    return data
+
+
+@functools.lru_cache(maxsize=None)
+def load_long(observable):
+    """
+    Returns the intersection or projection data in long format (rep,n,d,p,angle,value),
+    completed by the angle sweeps of the python engine, sorted by (p, d, n, angle), with the
+    values relative to their maximum (the length of the diagonal of the angle) as relative.
+    """
+    import numpy as np
+    import pandas as pd
+    data = load(observable + "s_2D_50000")
+    long_data = data.melt(id_vars=["rep", "n", "d", "p"], var_name="angle", value_name="value")
+    long_data["angle"] = long_data["angle"].str[2:].astype(float)
+    sweeps = os.path.join(DATA, observable + "s_2D_angles.csv")
+    if os.path.exists(sweeps):
+        long_data = pd.concat([long_data, pd.read_csv(sweeps)])
+    long_data["relative"] = long_data["value"] / (1/np.cos(long_data["angle"]*np.pi/180))
+    return long_data.sort_values(["p", "d", "n", "angle"])
@@ -0,0 +1,133 @@
+"""
+Specs of the figures: a Figure is the experiment it reads, the plotted column, its curves
+(one Series per (n, d), or per angle), its axes and its output file. The figures themselves
+are listed in registry.py, and drawn by draw (which imports matplotlib) from their curves.
+
+The curves of the former plotting scripts are built with depths (the curves n^1 ... n^max_d
+of a size n, darker as d grows), sizes (the curves of several sizes at a depth, in the
+colours of matplotlib) and single.
+"""
+import os
+from dataclasses import dataclass
+
+
+DATA = "data"
+
+
+@dataclass(frozen=True)
+class Series:
+    """
+    A curve: the rows (n, d) (and angle, in a long table) of the data of its figure (all the
+    depths of n if d is None).
+    """
+    n: int
+    d: int
+    color: tuple = None
+    column: str = None
+    angle: float = None
+    label: str = None
+
+    def legend(self):
+        if self.label:
+            return self.label
+        return "n=" + str(self.n) if self.d is None else "n^d=" + str(self.n) + "^" + str(self.d)
+
+
+@dataclass(frozen=True)
+class Figure:
+    """
+    A figure: the column metric of experiment (a file name of data/ without extension, or an
+    observable of load_long if long) as a function of the column x, for each of its series. The legend
+    is either outside (right of the axes) or inside. The intervals of the metric (see
+    metrics.py), if any, are drawn as bands. Figures without output are only shown.
+    """
+    experiment: str
+    metric: str = None
+    series: tuple = ()
+    title: str = ""
+    xlabel: str = "p"
+    ylabel: str = ""
+    x: str = "p"
+    xlim: tuple = (0, 1)
+    ylim: tuple = None
+    legend: str = "outside"
+    figsize: tuple = (8.4, 4.8)
+    output: str = None
+    long: bool = False
+    bands: bool = True
+    marker: str = None
+
+    def inputs(self):
+        """Returns the data files the figure is drawn from."""
+        if self.long:
+            files = [self.experiment + "s_2D_50000.csv", self.experiment + "s_2D_angles.csv"]
+            return [os.path.join(DATA, f) for f in files if os.path.exists(os.path.join(DATA, f))]
+        return [os.path.join(DATA, self.experiment + ".csv")]
+
+    def data(self):
+        """Returns the table of the figure."""
+        from percolation.plotting.data import load, load_long
+        return load_long(self.experiment) if self.long else load(self.experiment)
+
+
+def depths(n, max_d, r, g, b):
+    """The curves n^1 ... n^max_d, from white to the colour (1-r, 1-g, 1-b)."""
+    return tuple(Series(n, d, (1-r*d/max_d, 1-g*d/max_d, 1-b*d/max_d)) for d in range(1, max_d+1))
+
+
+def sizes(ns, d):
+    """The curves n^d of the sizes ns."""
+    return tuple(Series(n, d) for n in ns)
+
+
+def single(n, d, r, g, b):
+    """The curve n^d, in the colour (1-r, 1-g, 1-b)."""
+    return (Series(n, d, (1-r, 1-g, 1-b)),)
+
+
+def curves(figure):
+    """
+    Yields (series, x, y, low, high) for the series of figure: the columns x and metric of the
+    rows of the series, and the interval of the metric (None if the figure has no band).
+    """
+    import numpy as np
+    data = figure.data()
+    for s in figure.series:
+        rows = data[data["n"] == s.n]
+        if s.d is not None:
+            rows = rows[rows["d"] == s.d]
+        if s.angle is not None:
+            rows = rows[np.isclose(rows["angle"], s.angle)].drop_duplicates("p")
+        column = s.column or figure.metric
+        if figure.bands and column + "_low" in rows:
+            yield s, rows[figure.x], rows[column], rows[column + "_low"], rows[column + "_high"]
+        else:
+            yield s, rows[figure.x], rows[column], None, None
+
+
+def draw(figure):
+    """Draws figure, and saves it to its output if any (the figure stays open)."""
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=list(figure.figsize)) if figure.figsize else plt.figure()
+    for s, x, y, low, high in curves(figure):
+        style = {} if s.color is None else {"c": s.color}
+        if figure.marker:
+            style["marker"] = figure.marker
+        line, = plt.plot(x, y, label=s.legend(), **style)
+        if low is not None:
+            plt.fill_between(x, low, high, color=line.get_color(), alpha=0.3, linewidth=0)
+    plt.title(figure.title)
+    plt.xlabel(figure.xlabel)
+    plt.ylabel(figure.ylabel)
+    if figure.legend == "outside":
+        plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+        plt.subplots_adjust(left=0.1, right=0.75, top=0.9, bottom=0.1)
+    else:
+        plt.legend()
+    if figure.xlim:
+        plt.xlim(*figure.xlim)
+    if figure.ylim:
+        plt.ylim(*figure.ylim)
+    if figure.output:
+        os.makedirs(os.path.dirname(figure.output), exist_ok=True)
+        plt.savefig(figure.output, dpi=300)
@@ -0,0 +1,76 @@
+"""
+Confidence intervals of the derived columns of the data, computed for a whole table at once
+(each interval is a pair of columns <metric>_low and <metric>_high, drawn as bands).
+
+The data files only keep the totals of each (n, d, p) (no second moments), so:
+
+- the crossing probability cp = nc/rep is a binomial proportion: Wilson interval,
+- the means of per-realization quantities that are bounded (density, avg_interior in [0, 1],
+  avg_dist in [0, sqrt(dim)/2]) use the largest variance of a quantity of that range and
+  mean (Bhatia-Davis bound: (high - mean) * (mean - low)), a conservative interval (the
+  densities of the semi-straight 3D tables, relative to the 2D maximum, are at most n^d),
+- the dimension log(sq)/log(max) is a function of the density: delta method,
+- the averages of the crossing lengths, areas and steps have no interval (their ranges grow
+  with n^d, the bound would be meaningless).
+
+>>> low, high = wilson(np.array([0, 5, 10]), np.array([10, 10, 10]))
+>>> low.round(3), high.round(3)
+(array([0.   , 0.237, 0.722]), array([0.278, 0.763, 1.   ]))
+"""
+import numpy as np
+
+
+# two-sided 95% normal quantile
+Z = 1.959963984540054
+
+
+def wilson(successes, trials, z=Z):
+    """Returns the Wilson intervals (low, high) of the proportions successes/trials."""
+    successes = np.asarray(successes, dtype=float)
+    trials = np.asarray(trials, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = successes / trials
+        center = (p + z**2/(2*trials)) / (1 + z**2/trials)
+        half = z * np.sqrt(p*(1-p)/trials + z**2/(4*trials**2)) / (1 + z**2/trials)
+    return np.clip(center - half, 0, 1), np.clip(center + half, 0, 1)
+
+
+def bounded_standard_error(mean, count, low=0.0, high=1.0):
+    """
+    Returns the largest standard error of the means of count values in [low, high] with the
+    given means (Bhatia-Davis bound on their variance).
+    """
+    mean = np.asarray(mean, dtype=float)
+    variance = np.maximum((high - mean) * (mean - low), 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.sqrt(variance / np.asarray(count, dtype=float))
+
+
+def bounded_mean(mean, count, low=0.0, high=1.0, z=Z):
+    """Returns the conservative intervals (low, high) of the means of count values in [low, high]."""
+    half = z * bounded_standard_error(mean, count, low, high)
+    return np.clip(mean - half, low, high), np.clip(mean + half, low, high)
+
+
+def _set(data, name, interval):
+    data[name + "_low"], data[name + "_high"] = interval
+
+
+def intervals(data, dim):
+    """Adds the intervals of the derived columns of data (of a dim-dimensional experiment)."""
+    if "cp" in data:
+        _set(data, "cp", wilson(data["nc"], data["rep"]))
+    if "density" in data:
+        # largest density of a realization (all its squares retained)
+        top = data["rep"] * (data["n"]**data["d"])**dim / data["max"]
+        _set(data, "density", bounded_mean(data["density"], data["rep"], 0.0, top))
+    if "dim" in data:
+        # dim = log(density * max) / log(max), so d dim = d density / (density * log(max))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            se = (bounded_standard_error(data["density"], data["rep"], 0.0, top) /
+                  (data["density"] * np.log(data["max"])))
+        _set(data, "dim", (data["dim"] - Z*se, data["dim"] + Z*se))
+    if "avg_interior" in data:
+        _set(data, "avg_interior", bounded_mean(data["avg_interior"], data["rep"]))
+    if "avg_dist" in data:
+        _set(data, "avg_dist", bounded_mean(data["avg_dist"], data["rep"], 0, np.sqrt(dim)/2))
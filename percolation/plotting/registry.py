@@ -0,0 +1,821 @@
+"""
+Registry of the figures of data_visualization/, by target: FIGURES[target] are the figures
+rendered by python -m percolation.plotting render target (the targets are named after the
+plotting scripts they replace). Adding a size or a depth to a figure is adding a series here.
+
+The figures of the averages of the crossing lengths, of the boundaries and of the steps of the
+blob have no bands (bands=False): these averages have no interval (see metrics.py).
+"""
+from dataclasses import replace
+
+from percolation.plotting.figures import Figure, Series, depths, sizes, single
+
+
+SIZES = (2, 3, 5, 7, 11, 13, 17, 20, 25, 50, 75, 100, 125, 150, 175, 200)
+# the blob needs a center square, so odd sizes
+ODD_SIZES = (3, 5, 7, 11, 13, 17, 25, 51, 75, 101, 125, 151, 175, 201)
+ODD_SIZES_3D = (3, 5, 7, 9, 11, 13, 15)
+# (n, d) of the angle figures, one figure each
+ANGLE_SWEEPS = ([(2, d) for d in range(1, 9)] + [(3, d) for d in range(1, 6)] + [(5, d) for d in range(1, 4)] +
+                [(n, d) for n in (7, 11, 13, 17) for d in (1, 2)] +
+                [(n, 1) for n in (20, 25, 50, 75, 100, 125, 150, 175, 200)])
+ANGLES = range(0, 45, 4)
+
+FIGURES = {}
+
+_figure = Figure("blob_2D_50000", "avg_boundary", bands=False,
+                title="Length of the boundary of the blob",
+                ylabel="Average blob boundary length")
+FIGURES["blob2D_avg_boundary"] = (
+    replace(_figure, series=depths(3, 5, 1, 0, 1) + depths(5, 2, 1, 1, 0),
+            output="data_visualization/blob_2D/blob_boundary_2D.png"),
+    replace(_figure, series=(depths(3, 2, 1, 0, 1) +
+                             depths(5, 2, 1, 1, 0) +
+                             depths(7, 2, 1, 0, 0) +
+                             depths(11, 2, 0, 1, 0) +
+                             depths(13, 2, 0, 0, 1) +
+                             depths(17, 2, 1, 1, 1)),
+            output="data_visualization/blob_2D/blob_boundary_2D_bis.png"),
+    replace(_figure, series=sizes(ODD_SIZES, 1),
+            output="data_visualization/blob_2D/blob_boundary_2D_ter.png"),
+)
+
+_figure = Figure("blob_2D_50000", "avg_dist",
+                title="Maximum center-border Euclidean distance of the blob",
+                ylabel="Average maximum center-border distance")
+FIGURES["blob2D_avg_dist"] = (
+    replace(_figure, series=depths(3, 5, 1, 0, 1) + depths(5, 2, 1, 1, 0),
+            ylim=(0, 0.5 * 2 ** 0.5),
+            output="data_visualization/blob_2D/blob_dist_2D.png"),
+    replace(_figure, series=(depths(3, 2, 1, 0, 1) +
+                             depths(5, 2, 1, 1, 0) +
+                             depths(7, 2, 1, 0, 0) +
+                             depths(11, 2, 0, 1, 0) +
+                             depths(13, 2, 0, 0, 1) +
+                             depths(17, 2, 1, 1, 1)),
+            ylim=(0, 0.5 * 2 ** 0.5),
+            output="data_visualization/blob_2D/blob_dist_2D_bis.png"),
+    replace(_figure, series=sizes(ODD_SIZES, 1),
+            output="data_visualization/blob_2D/blob_dist_2D_ter.png"),
+)
+
+_figure = Figure("blob_2D_50000", "avg_step", bands=False,
+                title="Maximum number of steps from center to border",
+                ylabel="Average maximum steps center-border")
+FIGURES["blob2D_avg_step"] = (
+    replace(_figure, series=depths(3, 5, 1, 0, 1) + depths(5, 2, 1, 1, 0),
+            output="data_visualization/blob_2D/blob_step_2D.png"),
+    replace(_figure, series=(depths(3, 2, 1, 0, 1) +
+                             depths(5, 2, 1, 1, 0) +
+                             depths(7, 2, 0, 1, 1) +
+                             depths(11, 2, 0, 1, 0) +
+                             depths(13, 2, 0, 0, 1) +
+                             depths(17, 2, 1, 0, 0)),
+            output="data_visualization/blob_2D/blob_step_2D_bis.png"),
+    replace(_figure, series=sizes(ODD_SIZES, 1),
+            output="data_visualization/blob_2D/blob_step_2D_ter.png"),
+)
+
+_figure = Figure("blob_2D_50000", "avg_interior",
+                title="Area of the blob",
+                ylabel="Average blob interior area",
+                ylim=(0, 1))
+FIGURES["blob2D_avg_vol"] = (
+    replace(_figure, series=depths(3, 5, 1, 0, 1) + depths(5, 2, 1, 1, 0),
+            output="data_visualization/blob_2D/blob_interior_2D.png"),
+    replace(_figure, series=(depths(3, 2, 1, 0, 1) +
+                             depths(5, 2, 1, 1, 0) +
+                             depths(7, 2, 1, 0, 0) +
+                             depths(11, 2, 0, 1, 0) +
+                             depths(13, 2, 0, 0, 1) +
+                             depths(17, 2, 1, 1, 1)),
+            output="data_visualization/blob_2D/blob_interior_2D_bis.png"),
+    replace(_figure, series=sizes(ODD_SIZES, 1),
+            output="data_visualization/blob_2D/blob_interior_2D_ter.png"),
+    replace(_figure, series=(single(5, 2, 0, 0.5, 0.5) +
+                             single(5 * 5, 1, 0, 1, 1) +
+                             single(7, 2, 0, 0, 0.5) +
+                             single(7 * 7, 1, 0, 0, 1) +
+                             single(11, 2, 0, 0.5, 0) +
+                             single(11 * 11, 1, 0, 1, 0) +
+                             single(13, 2, 0.5, 0, 0) +
+                             single(13 * 13, 1, 1, 0, 0) +
+                             single(17, 2, 0.4, 0.4, 0.4) +
+                             single(17 * 17, 1, 0.8, 0.8, 0.8)),
+            output="data_visualization/blob_2D/blob_interior_2D_qua.png"),
+)
+
+_figure = Figure("blob_3D_50000", "avg_boundary", bands=False,
+                title="boundary of the boundary of the blob",
+                ylabel="Average blob boundary area")
+FIGURES["blob3D_avg_boundary"] = (
+    replace(_figure, series=depths(3, 2, 1, 0, 1) + depths(5, 1, 1, 1, 0),
+            output="data_visualization/blob_3D/blob_boundary_3D.png"),
+    replace(_figure, series=sizes(ODD_SIZES_3D, 1),
+            output="data_visualization/blob_3D/blob_boundary_3D_bis.png"),
+)
+
+_figure = Figure("blob_3D_50000", "avg_dist",
+                title="Maximum center-border Euclidean distance of the blob",
+                ylabel="Average maximum center-border distance",
+                ylim=(0, 0.5 * 3 ** 0.5))
+FIGURES["blob3D_avg_dist"] = (
+    replace(_figure, series=depths(3, 3, 1, 0, 1) + depths(5, 2, 1, 1, 0),
+            output="data_visualization/blob_3D/blob_dist_3D.png"),
+    replace(_figure, series=sizes(ODD_SIZES_3D, 1),
+            output="data_visualization/blob_3D/blob_dist_3D_bis.png"),
+)
+
+_figure = Figure("blob_3D_50000", "avg_step", bands=False,
+                title="Maximum number of steps from center to border")
+FIGURES["blob3D_avg_step"] = (
+    replace(_figure, series=depths(3, 3, 1, 0, 1) + depths(5, 2, 1, 1, 0),
+            ylabel="Average maximum center-border distance",
+            output="data_visualization/blob_3D/blob_step_3D.png"),
+    replace(_figure, series=sizes(ODD_SIZES_3D, 1),
+            ylabel="Average maximum steps center-border",
+            output="data_visualization/blob_3D/blob_step_3D_bis.png"),
+)
+
+_figure = Figure("blob_3D_50000", "avg_interior",
+                title="Volume of the blob",
+                ylabel="Average blob interior volume",
+                ylim=(0, 1))
+FIGURES["blob3D_avg_vol"] = (
+    replace(_figure, series=depths(3, 3, 1, 0, 1) + depths(5, 2, 1, 1, 0),
+            output="data_visualization/blob_3D/blob_interior_3D.png"),
+    replace(_figure, series=sizes(ODD_SIZES_3D, 1),
+            output="data_visualization/blob_3D/blob_interior_3D_bis.png"),
+)
+
+_figure = Figure("complement_crossings_2D_50000", "ral", bands=False,
+                title="Length of non-straight crossing (when existing)",
+                ylabel="Average length of non-straight crossings",
+                ylim=(0.9, 2.25))
+FIGURES["complement_crossings_2D_avg_length"] = (
+    replace(_figure, series=(depths(2, 8, 0, 1, 1) +
+                             depths(3, 5, 1, 0, 1) +
+                             depths(5, 3, 1, 1, 0)),
+            output="data_visualization/crossing_2D/complement_crossing_length_2D.png"),
+    replace(_figure, series=(depths(2, 2, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 2, 1, 1, 0) +
+                             depths(7, 2, 1, 0, 0) +
+                             depths(11, 2, 0, 1, 0) +
+                             depths(13, 2, 0, 0, 1) +
+                             depths(17, 2, 1, 1, 1)),
+            output="data_visualization/crossing_2D/complement_crossing_length_2D_bis.png"),
+    replace(_figure, series=sizes(SIZES, 1),
+            output="data_visualization/crossing_2D/complement_crossing_length_2D_ter.png"),
+)
+
+_figure = Figure("complement_crossings_2D_50000", "cp",
+                title="Empirical Non-Straight Crossing Probability",
+                ylabel="Non-straight crossing probability")
+FIGURES["complement_crossings_2D_crossing_proba"] = (
+    replace(_figure, series=(depths(2, 8, 0, 1, 1) +
+                             depths(3, 5, 1, 0, 1) +
+                             depths(5, 3, 1, 1, 0)),
+            output="data_visualization/crossing_2D/complement_crossing_proba_2D.png"),
+    replace(_figure, series=(depths(2, 2, 1, 1, 0) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 2, 0, 1, 1) +
+                             depths(7, 2, 1, 1, 0) +
+                             depths(11, 2, 1, 0, 1) +
+                             depths(13, 2, 0, 1, 1) +
+                             depths(17, 2, 1, 1, 1)),
+            output="data_visualization/crossing_2D/complement_crossing_proba_2D_bis.png"),
+    replace(_figure, series=sizes(SIZES, 1),
+            output="data_visualization/crossing_2D/complement_crossing_proba_2D_ter.png"),
+)
+
+_figure = Figure("complement_crossings_2D_50000", "density",
+                title="Density",
+                ylabel="Average Density of Squares")
+FIGURES["complement_crossings_2D_density"] = (
+    replace(_figure, series=(depths(2, 8, 1, 0, 0) +
+                             depths(3, 5, 0, 1, 0) +
+                             depths(5, 3, 0, 0, 1)),
+            output="data_visualization/percolation/complement_observed_density_2D.png"),
+)
+
+_figure = Figure("complement_crossings_3D_50000", "ral", bands=False,
+                title="Length of non-straight crossing (when existing)",
+                ylabel="Average length of non-straight crossings",
+                ylim=(0.9, 2.5))
+FIGURES["complement_crossings_3D_avg_length"] = (
+    replace(_figure, series=(depths(2, 3, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0)),
+            output="data_visualization/crossing_3D/complement_crossing_length_3D.png"),
+    replace(_figure, series=(depths(2, 1, 0, 1, 1) +
+                             depths(3, 1, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0) +
+                             depths(6, 1, 1, 0, 0) +
+                             depths(7, 1, 0, 1, 0) +
+                             depths(8, 1, 0, 0, 1) +
+                             depths(9, 1, 1, 1, 1) +
+                             depths(10, 1, 0, 1, 1) +
+                             depths(11, 1, 1, 0, 1) +
+                             depths(12, 1, 1, 1, 0) +
+                             depths(13, 1, 1, 0, 0) +
+                             depths(14, 1, 0, 1, 0) +
+                             depths(15, 1, 0, 0, 1) +
+                             depths(20, 1, 1, 1, 1) +
+                             depths(25, 1, 0.5, 0.5, 0.5)),
+            output="data_visualization/crossing_3D/complement_crossing_length_3D_bis.png"),
+)
+
+_figure = Figure("complement_crossings_3D_50000", "cp",
+                title="Empirical Non-Straight Crossing Probability",
+                ylabel="Non-Straight Crossing probability")
+FIGURES["complement_crossings_3D_crossing_proba"] = (
+    replace(_figure, series=(depths(2, 3, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0)),
+            output="data_visualization/crossing_3D/complement_crossing_proba_3D.png"),
+    replace(_figure, series=(depths(2, 1, 0, 1, 1) +
+                             depths(3, 1, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0) +
+                             depths(6, 1, 1, 0, 0) +
+                             depths(7, 1, 0, 1, 0) +
+                             depths(8, 1, 0, 0, 1) +
+                             depths(9, 1, 1, 1, 1) +
+                             depths(10, 1, 0, 1, 1) +
+                             depths(11, 1, 1, 0, 1) +
+                             depths(12, 1, 1, 1, 0) +
+                             depths(13, 1, 1, 0, 0) +
+                             depths(14, 1, 0, 1, 0) +
+                             depths(15, 1, 0, 0, 1) +
+                             depths(20, 1, 1, 1, 1) +
+                             depths(25, 1, 0.5, 0.5, 0.5)),
+            output="data_visualization/crossing_3D/complement_crossing_proba_3D_bis.png"),
+)
+
+_figure = Figure("complement_crossings_3D_50000", "density",
+                title="Density",
+                ylabel="Average Density of Cubes")
+FIGURES["complement_crossings_3D_density"] = (
+    replace(_figure, series=(depths(2, 4, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0)),
+            output="data_visualization/percolation/complement_observed_density_3D.png"),
+)
+
+_figure = Figure("complement_crossings_semi_straight_2D_50000", "ral", bands=False,
+                title="Length of semi-straight crossing (when existing)",
+                ylabel="Average length of semi-straight crossings",
+                ylim=(0.9, 2.25))
+FIGURES["complement_semi_straight_crossings_2D_avg_length"] = (
+    replace(_figure, series=(depths(2, 8, 0, 1, 1) +
+                             depths(3, 5, 1, 0, 1) +
+                             depths(5, 3, 1, 1, 0)),
+            output="data_visualization/crossing_2D/complement_semi_straight_crossing_length_2D.png"),
+    replace(_figure, series=(depths(2, 2, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 2, 1, 1, 0) +
+                             depths(7, 2, 1, 0, 0) +
+                             depths(11, 2, 0, 1, 0) +
+                             depths(13, 2, 0, 0, 1) +
+                             depths(17, 2, 1, 1, 1)),
+            output="data_visualization/crossing_2D/complement_semi_straight_crossing_length_2D_bis.png"),
+    replace(_figure, series=sizes(SIZES, 1),
+            output="data_visualization/crossing_2D/complement_semi_straight_crossing_length_2D_ter.png"),
+)
+
+_figure = Figure("complement_crossings_semi_straight_2D_50000", "cp",
+                title="Empirical Semi-Straight Crossing Probability",
+                ylabel="Semi-straight crossing probability")
+FIGURES["complement_semi_straight_crossings_2D_crossing_proba"] = (
+    replace(_figure, series=(depths(2, 8, 0, 1, 1) +
+                             depths(3, 5, 1, 0, 1) +
+                             depths(5, 3, 1, 1, 0)),
+            output="data_visualization/crossing_2D/complement_semi_straight_crossing_proba_2D.png"),
+    replace(_figure, series=(depths(2, 2, 1, 1, 0) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 2, 0, 1, 1) +
+                             depths(7, 2, 1, 1, 0) +
+                             depths(11, 2, 1, 0, 1) +
+                             depths(13, 2, 0, 1, 1) +
+                             depths(17, 2, 1, 1, 1)),
+            output="data_visualization/crossing_2D/complement_semi_straight_crossing_proba_2D_bis.png"),
+    replace(_figure, series=sizes(SIZES, 1),
+            output="data_visualization/crossing_2D/complement_semi_straight_crossing_proba_2D_ter.png"),
+)
+
+_figure = Figure("complement_crossings_semi_straight_3D_50000", "ral", bands=False,
+                title="Length of semi-straight crossing (when existing)",
+                ylabel="Average length of semi-straight crossings",
+                ylim=(0.9, 2.5))
+FIGURES["complement_semi_straight_crossings_3D_avg_length"] = (
+    replace(_figure, series=(depths(2, 3, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0)),
+            output="data_visualization/crossing_3D/complement_semi_straight_crossing_length_3D.png"),
+    replace(_figure, series=(depths(2, 1, 0, 1, 1) +
+                             depths(3, 1, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0) +
+                             depths(6, 1, 1, 0, 0) +
+                             depths(7, 1, 0, 1, 0) +
+                             depths(8, 1, 0, 0, 1) +
+                             depths(9, 1, 1, 1, 1) +
+                             depths(10, 1, 0, 1, 1) +
+                             depths(11, 1, 1, 0, 1) +
+                             depths(12, 1, 1, 1, 0) +
+                             depths(13, 1, 1, 0, 0) +
+                             depths(14, 1, 0, 1, 0) +
+                             depths(15, 1, 0, 0, 1) +
+                             depths(20, 1, 1, 1, 1) +
+                             depths(25, 1, 0.5, 0.5, 0.5)),
+            output="data_visualization/crossing_3D/complement_semi_straight_crossing_length_3D_bis.png"),
+)
+
+_figure = Figure("complement_crossings_semi_straight_3D_50000", "cp",
+                title="Empirical Semi-Straight Crossing Probability",
+                ylabel="Semi-straight crossing probability")
+FIGURES["complement_semi_straight_crossings_3D_crossing_proba"] = (
+    replace(_figure, series=(depths(2, 3, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0)),
+            output="data_visualization/crossing_3D/complement_semi_straight_crossing_proba_3D.png"),
+    replace(_figure, series=(depths(2, 1, 0, 1, 1) +
+                             depths(3, 1, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0) +
+                             depths(6, 1, 1, 0, 0) +
+                             depths(7, 1, 0, 1, 0) +
+                             depths(8, 1, 0, 0, 1) +
+                             depths(9, 1, 1, 1, 1) +
+                             depths(10, 1, 0, 1, 1) +
+                             depths(11, 1, 1, 0, 1) +
+                             depths(12, 1, 1, 1, 0) +
+                             depths(13, 1, 1, 0, 0) +
+                             depths(14, 1, 0, 1, 0) +
+                             depths(15, 1, 0, 0, 1) +
+                             depths(20, 1, 1, 1, 1) +
+                             depths(25, 1, 0.5, 0.5, 0.5)),
+            output="data_visualization/crossing_3D/complement_semi_straight_crossing_proba_3D_bis.png"),
+)
+
+_figure = Figure("complement_crossings_straight_2D_50000", "ral", bands=False,
+                title="Length of straight crossing (when existing)",
+                xlabel="Percolation probability",
+                ylabel="Average length of straight crossings",
+                ylim=(0.9, 2.25))
+FIGURES["complement_straight_crossings_2D_avg_length"] = (
+    replace(_figure, series=(depths(2, 8, 0, 1, 1) +
+                             depths(3, 5, 1, 0, 1) +
+                             depths(5, 3, 1, 1, 0)),
+            output="data_visualization/crossing_2D/complement_straight_crossing_length_2D.png"),
+    replace(_figure, series=(depths(2, 2, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 2, 1, 1, 0) +
+                             depths(7, 2, 1, 0, 0) +
+                             depths(11, 2, 0, 1, 0) +
+                             depths(13, 2, 0, 0, 1) +
+                             depths(17, 2, 1, 1, 1)),
+            output="data_visualization/crossing_2D/complement_straight_crossing_length_2D_bis.png"),
+    replace(_figure, series=sizes(SIZES, 1),
+            output="data_visualization/crossing_2D/complement_straight_crossing_length_2D_ter.png"),
+)
+
+_figure = Figure("complement_crossings_straight_2D_50000", "cp",
+                title="Empirical Straight Crossing Probability",
+                ylabel="Straight Crossing Probability")
+FIGURES["complement_straight_crossings_2D_crossing_proba"] = (
+    replace(_figure, series=(depths(2, 6, 0, 1, 1) +
+                             depths(3, 4, 1, 0, 1) +
+                             depths(5, 2, 1, 1, 0)),
+            output="data_visualization/crossing_2D/complement_straight_crossing_proba_2D.png"),
+    replace(_figure, series=(depths(2, 2, 1, 1, 0) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 2, 0, 1, 1) +
+                             depths(7, 2, 0, 0, 1) +
+                             depths(11, 2, 0, 1, 0) +
+                             depths(13, 2, 1, 0, 0) +
+                             depths(17, 2, 1, 1, 1)),
+            output="data_visualization/crossing_2D/complement_straight_crossing_proba_2D_bis.png"),
+    replace(_figure, series=sizes(SIZES, 1),
+            output="data_visualization/crossing_2D/complement_straight_crossing_proba_2D_ter.png"),
+)
+
+_figure = Figure("complement_crossings_straight_3D_50000", "ral", bands=False,
+                title="Length of straight crossing (when existing)",
+                xlabel="Percolation probability",
+                ylabel="Average length of straight crossings",
+                ylim=(0.9, 2.5))
+FIGURES["complement_straight_crossings_3D_avg_length"] = (
+    replace(_figure, series=(depths(2, 4, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0)),
+            output="data_visualization/crossing_3D/complement_straight_crossing_length_3D.png"),
+    replace(_figure, series=(depths(2, 1, 0, 1, 1) +
+                             depths(3, 1, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0) +
+                             depths(6, 1, 1, 0, 0) +
+                             depths(7, 1, 0, 1, 0) +
+                             depths(8, 1, 0, 0, 1) +
+                             depths(9, 1, 1, 1, 1) +
+                             depths(10, 1, 0, 1, 1) +
+                             depths(11, 1, 1, 0, 1) +
+                             depths(12, 1, 1, 1, 0) +
+                             depths(13, 1, 1, 0, 0) +
+                             depths(14, 1, 0, 1, 0) +
+                             depths(15, 1, 0, 0, 1) +
+                             depths(20, 1, 1, 1, 1) +
+                             depths(25, 1, 0.5, 0.5, 0.5)),
+            legend="inside",
+            output="data_visualization/crossing_3D/complement_straight_crossing_length_3D_bis.png"),
+)
+
+_figure = Figure("complement_crossings_straight_3D_50000", "cp",
+                title="Empirical Straight Crossing Probability",
+                ylabel="Straight Crossing probability")
+FIGURES["complement_straight_crossings_3D_crossing_proba"] = (
+    replace(_figure, series=(depths(2, 4, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0)),
+            output="data_visualization/crossing_3D/complement_straight_crossing_proba_3D.png"),
+    replace(_figure, series=(depths(2, 1, 0, 1, 1) +
+                             depths(3, 1, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0) +
+                             depths(6, 1, 1, 0, 0) +
+                             depths(7, 1, 0, 1, 0) +
+                             depths(8, 1, 0, 0, 1) +
+                             depths(9, 1, 1, 1, 1) +
+                             depths(10, 1, 0, 1, 1) +
+                             depths(11, 1, 1, 0, 1) +
+                             depths(12, 1, 1, 1, 0) +
+                             depths(13, 1, 1, 0, 0) +
+                             depths(14, 1, 0, 1, 0) +
+                             depths(15, 1, 0, 0, 1) +
+                             depths(20, 1, 1, 1, 1) +
+                             depths(25, 1, 0.5, 0.5, 0.5)),
+            output="data_visualization/crossing_3D/complement_straight_crossing_proba_3D_bis.png"),
+)
+
+_figure = Figure("crossings_2D_50000", "ral", bands=False,
+                title="Length of non-straight crossing (when existing)",
+                ylabel="Average length of non-straight crossings",
+                ylim=(0.9, 2.25))
+FIGURES["crossings_2D_avg_length"] = (
+    replace(_figure, series=(depths(2, 8, 0, 1, 1) +
+                             depths(3, 5, 1, 0, 1) +
+                             depths(5, 3, 1, 1, 0)),
+            output="data_visualization/crossing_2D/crossing_length_2D.png"),
+    replace(_figure, series=(depths(2, 2, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 2, 1, 1, 0) +
+                             depths(7, 2, 1, 0, 0) +
+                             depths(11, 2, 0, 1, 0) +
+                             depths(13, 2, 0, 0, 1) +
+                             depths(17, 2, 1, 1, 1)),
+            output="data_visualization/crossing_2D/crossing_length_2D_bis.png"),
+    replace(_figure, series=sizes(SIZES, 1),
+            output="data_visualization/crossing_2D/crossing_length_2D_ter.png"),
+)
+
+_figure = Figure("crossings_2D_50000", "al", bands=False,
+                title="Non-Straight Crossing steps (when existing)",
+                ylabel="Average steps of crossings",
+                legend="inside",
+                figsize=None)
+FIGURES["crossings_2D_avg_steps"] = (
+    replace(_figure, series=(depths(2, 8, 0, 1, 1) +
+                             depths(3, 5, 1, 0, 1) +
+                             depths(5, 3, 1, 1, 0) +
+                             depths(7, 2, 1, 1, 0) +
+                             depths(11, 2, 1, 0, 1) +
+                             depths(13, 2, 0, 1, 1) +
+                             depths(17, 2, 1, 1, 1))),
+)
+
+_figure = Figure("crossings_2D_50000", "cp",
+                title="Empirical Non-Straight Crossing Probability",
+                ylabel="Non-straight crossing probability")
+FIGURES["crossings_2D_crossing_proba"] = (
+    replace(_figure, series=(depths(2, 8, 0, 1, 1) +
+                             depths(3, 5, 1, 0, 1) +
+                             depths(5, 3, 1, 1, 0)),
+            output="data_visualization/crossing_2D/crossing_proba_2D.png"),
+    replace(_figure, series=(depths(2, 2, 1, 1, 0) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 2, 0, 1, 1) +
+                             depths(7, 2, 1, 1, 0) +
+                             depths(11, 2, 1, 0, 1) +
+                             depths(13, 2, 0, 1, 1) +
+                             depths(17, 2, 1, 1, 1)),
+            output="data_visualization/crossing_2D/crossing_proba_2D_bis.png"),
+    replace(_figure, series=sizes(SIZES, 1),
+            output="data_visualization/crossing_2D/crossing_proba_2D_ter.png"),
+)
+
+_figure = Figure("crossings_2D_50000", "density",
+                title="Density",
+                ylabel="Average Density of Squares")
+FIGURES["crossings_2D_density"] = (
+    replace(_figure, series=(depths(2, 8, 1, 0, 0) +
+                             depths(3, 5, 0, 1, 0) +
+                             depths(5, 3, 0, 0, 1)),
+            output="data_visualization/percolation/observed_density_2D.png"),
+)
+
+_figure = Figure("crossings_3D_50000", "ral", bands=False,
+                title="Length of non-straight crossing (when existing)",
+                ylabel="Average length of non-straight crossings",
+                ylim=(0.9, 2.5))
+FIGURES["crossings_3D_avg_length"] = (
+    replace(_figure, series=(depths(2, 4, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0)),
+            output="data_visualization/crossing_3D/crossing_length_3D.png"),
+    replace(_figure, series=(depths(2, 1, 0, 1, 1) +
+                             depths(3, 1, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0) +
+                             depths(6, 1, 1, 0, 0) +
+                             depths(7, 1, 0, 1, 0) +
+                             depths(8, 1, 0, 0, 1) +
+                             depths(9, 1, 1, 1, 1) +
+                             depths(10, 1, 0, 1, 1) +
+                             depths(11, 1, 1, 0, 1) +
+                             depths(12, 1, 1, 1, 0) +
+                             depths(13, 1, 1, 0, 0) +
+                             depths(14, 1, 0, 1, 0) +
+                             depths(15, 1, 0, 0, 1) +
+                             depths(20, 1, 1, 1, 1) +
+                             depths(25, 1, 0.5, 0.5, 0.5)),
+            output="data_visualization/crossing_3D/crossing_length_3D_bis.png"),
+)
+
+_figure = Figure("crossings_3D_50000", "al", bands=False,
+                title="Crossing steps (when existing)",
+                ylabel="Average steps of crossings",
+                legend="inside",
+                figsize=None)
+FIGURES["crossings_3D_avg_steps"] = (
+    replace(_figure, series=(depths(2, 4, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0) +
+                             depths(6, 1, 1, 0, 0) +
+                             depths(7, 1, 0, 1, 0) +
+                             depths(8, 1, 0, 0, 1) +
+                             depths(9, 1, 1, 1, 1))),
+)
+
+_figure = Figure("crossings_3D_50000", "cp",
+                title="Empirical Non-Straight Crossing Probability",
+                ylabel="Non-Straight Crossing probability")
+FIGURES["crossings_3D_crossing_proba"] = (
+    replace(_figure, series=(depths(2, 4, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0)),
+            output="data_visualization/crossing_3D/crossing_proba_3D.png"),
+    replace(_figure, series=(depths(2, 1, 0, 1, 1) +
+                             depths(3, 1, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0) +
+                             depths(6, 1, 1, 0, 0) +
+                             depths(7, 1, 0, 1, 0) +
+                             depths(8, 1, 0, 0, 1) +
+                             depths(9, 1, 1, 1, 1) +
+                             depths(10, 1, 0, 1, 1) +
+                             depths(11, 1, 1, 0, 1) +
+                             depths(12, 1, 1, 1, 0) +
+                             depths(13, 1, 1, 0, 0) +
+                             depths(14, 1, 0, 1, 0) +
+                             depths(15, 1, 0, 0, 1) +
+                             depths(20, 1, 1, 1, 1) +
+                             depths(25, 1, 0.5, 0.5, 0.5)),
+            output="data_visualization/crossing_3D/crossing_proba_3D_bis.png"),
+)
+
+_figure = Figure("crossings_3D_50000", "density",
+                title="Density",
+                ylabel="Average Density of Cubes")
+FIGURES["crossings_3D_density"] = (
+    replace(_figure, series=(depths(2, 4, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0)),
+            output="data_visualization/percolation/observed_density_3D.png"),
+)
+
+_figure = Figure("crossings_semi_straight_2D_50000", "ral", bands=False,
+                title="Length of semi-straight crossing (when existing)",
+                ylabel="Average length of semi-straight crossings",
+                ylim=(0.9, 2.25))
+FIGURES["semi_straight_crossings_2D_avg_length"] = (
+    replace(_figure, series=(depths(2, 8, 0, 1, 1) +
+                             depths(3, 5, 1, 0, 1) +
+                             depths(5, 3, 1, 1, 0)),
+            output="data_visualization/crossing_2D/semi_straight_crossing_length_2D.png"),
+    replace(_figure, series=(depths(2, 2, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 2, 1, 1, 0) +
+                             depths(7, 2, 1, 0, 0) +
+                             depths(11, 2, 0, 1, 0) +
+                             depths(13, 2, 0, 0, 1) +
+                             depths(17, 2, 1, 1, 1)),
+            output="data_visualization/crossing_2D/semi_straight_crossing_length_2D_bis.png"),
+    replace(_figure, series=sizes(SIZES, 1),
+            output="data_visualization/crossing_2D/semi_straight_crossing_length_2D_ter.png"),
+)
+
+_figure = Figure("crossings_semi_straight_2D_50000", "cp",
+                title="Empirical Semi-Straight Crossing Probability",
+                ylabel="Semi-straight crossing probability")
+FIGURES["semi_straight_crossings_2D_crossing_proba"] = (
+    replace(_figure, series=(depths(2, 8, 0, 1, 1) +
+                             depths(3, 5, 1, 0, 1) +
+                             depths(5, 3, 1, 1, 0)),
+            output="data_visualization/crossing_2D/semi_straight_crossing_proba_2D.png"),
+    replace(_figure, series=(depths(2, 2, 1, 1, 0) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 2, 0, 1, 1) +
+                             depths(7, 2, 1, 1, 0) +
+                             depths(11, 2, 1, 0, 1) +
+                             depths(13, 2, 0, 1, 1) +
+                             depths(17, 2, 1, 1, 1)),
+            output="data_visualization/crossing_2D/semi_straight_crossing_proba_2D_bis.png"),
+    replace(_figure, series=sizes(SIZES, 1),
+            output="data_visualization/crossing_2D/semi_straight_crossing_proba_2D_ter.png"),
+)
+
+_figure = Figure("crossings_semi_straight_3D_50000", "ral", bands=False,
+                title="Length of semi-straight crossing (when existing)",
+                ylabel="Average length of semi-straight crossings",
+                ylim=(0.9, 2.5))
+FIGURES["semi_straight_crossings_3D_avg_length"] = (
+    replace(_figure, series=(depths(2, 4, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0)),
+            output="data_visualization/crossing_3D/semi_straight_crossing_length_3D.png"),
+    replace(_figure, series=(depths(2, 1, 0, 1, 1) +
+                             depths(3, 1, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0) +
+                             depths(6, 1, 1, 0, 0) +
+                             depths(7, 1, 0, 1, 0) +
+                             depths(8, 1, 0, 0, 1) +
+                             depths(9, 1, 1, 1, 1) +
+                             depths(10, 1, 0, 1, 1) +
+                             depths(11, 1, 1, 0, 1) +
+                             depths(12, 1, 1, 1, 0) +
+                             depths(13, 1, 1, 0, 0) +
+                             depths(14, 1, 0, 1, 0) +
+                             depths(15, 1, 0, 0, 1) +
+                             depths(20, 1, 1, 1, 1) +
+                             depths(25, 1, 0.5, 0.5, 0.5)),
+            output="data_visualization/crossing_3D/semi_straight_crossing_length_3D_bis.png"),
+)
+
+_figure = Figure("crossings_semi_straight_3D_50000", "cp",
+                title="Empirical Semi-Straight Crossing Probability",
+                ylabel="Semi-straight crossing probability")
+FIGURES["semi_straight_crossings_3D_crossing_proba"] = (
+    replace(_figure, series=(depths(2, 4, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0)),
+            output="data_visualization/crossing_3D/semi_straight_crossing_proba_3D.png"),
+    replace(_figure, series=(depths(2, 1, 0, 1, 1) +
+                             depths(3, 1, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0) +
+                             depths(6, 1, 1, 0, 0) +
+                             depths(7, 1, 0, 1, 0) +
+                             depths(8, 1, 0, 0, 1) +
+                             depths(9, 1, 1, 1, 1) +
+                             depths(10, 1, 0, 1, 1) +
+                             depths(11, 1, 1, 0, 1) +
+                             depths(12, 1, 1, 1, 0) +
+                             depths(13, 1, 1, 0, 0) +
+                             depths(14, 1, 0, 1, 0) +
+                             depths(15, 1, 0, 0, 1) +
+                             depths(20, 1, 1, 1, 1) +
+                             depths(25, 1, 0.5, 0.5, 0.5)),
+            output="data_visualization/crossing_3D/semi_straight_crossing_proba_3D_bis.png"),
+)
+
+_figure = Figure("crossings_straight_2D_50000", "ral", bands=False,
+                title="Length of straight crossing (when existing)",
+                xlabel="Percolation probability",
+                ylabel="Average length of straight crossings",
+                ylim=(0.9, 2.25))
+FIGURES["straight_crossings_2D_avg_length"] = (
+    replace(_figure, series=(depths(2, 8, 0, 1, 1) +
+                             depths(3, 5, 1, 0, 1) +
+                             depths(5, 3, 1, 1, 0)),
+            output="data_visualization/crossing_2D/straight_crossing_length_2D.png"),
+    replace(_figure, series=(depths(2, 2, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 2, 1, 1, 0) +
+                             depths(7, 2, 1, 0, 0) +
+                             depths(11, 2, 0, 1, 0) +
+                             depths(13, 2, 0, 0, 1) +
+                             depths(17, 2, 1, 1, 1)),
+            output="data_visualization/crossing_2D/straight_crossing_length_2D_bis.png"),
+    replace(_figure, series=sizes(SIZES, 1),
+            output="data_visualization/crossing_2D/straight_crossing_length_2D_ter.png"),
+)
+
+_figure = Figure("crossings_straight_2D_50000", "cp",
+                title="Empirical Straight Crossing Probability",
+                ylabel="Straight Crossing Probability")
+FIGURES["straight_crossings_2D_crossing_proba"] = (
+    replace(_figure, series=(depths(2, 6, 0, 1, 1) +
+                             depths(3, 4, 1, 0, 1) +
+                             depths(5, 2, 1, 1, 0)),
+            output="data_visualization/crossing_2D/straight_crossing_proba_2D.png"),
+    replace(_figure, series=(depths(2, 2, 1, 1, 0) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 2, 0, 1, 1) +
+                             depths(7, 2, 0, 0, 1) +
+                             depths(11, 2, 0, 1, 0) +
+                             depths(13, 2, 1, 0, 0) +
+                             depths(17, 2, 1, 1, 1)),
+            output="data_visualization/crossing_2D/straight_crossing_proba_2D_bis.png"),
+    replace(_figure, series=sizes(SIZES, 1),
+            output="data_visualization/crossing_2D/straight_crossing_proba_2D_ter.png"),
+)
+
+_figure = Figure("crossings_straight_3D_50000", "ral", bands=False,
+                title="Length of straight crossing (when existing)",
+                xlabel="Percolation probability",
+                ylabel="Average length of straight crossings",
+                ylim=(0.9, 2.5))
+FIGURES["straight_crossings_3D_avg_length"] = (
+    replace(_figure, series=(depths(2, 4, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0)),
+            output="data_visualization/crossing_3D/straight_crossing_length_3D.png"),
+    replace(_figure, series=(depths(2, 1, 0, 1, 1) +
+                             depths(3, 1, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0) +
+                             depths(6, 1, 1, 0, 0) +
+                             depths(7, 1, 0, 1, 0) +
+                             depths(8, 1, 0, 0, 1) +
+                             depths(9, 1, 1, 1, 1) +
+                             depths(10, 1, 0, 1, 1) +
+                             depths(11, 1, 1, 0, 1) +
+                             depths(12, 1, 1, 1, 0) +
+                             depths(13, 1, 1, 0, 0) +
+                             depths(14, 1, 0, 1, 0) +
+                             depths(15, 1, 0, 0, 1) +
+                             depths(20, 1, 1, 1, 1) +
+                             depths(25, 1, 0.5, 0.5, 0.5)),
+            legend="inside",
+            output="data_visualization/crossing_3D/straight_crossing_length_3D_bis.png"),
+)
+
+_figure = Figure("crossings_straight_3D_50000", "cp",
+                title="Empirical Straight Crossing Probability",
+                ylabel="Straight Crossing probability")
+FIGURES["straight_crossings_3D_crossing_proba"] = (
+    replace(_figure, series=(depths(2, 4, 0, 1, 1) +
+                             depths(3, 2, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0)),
+            output="data_visualization/crossing_3D/straight_crossing_proba_3D.png"),
+    replace(_figure, series=(depths(2, 1, 0, 1, 1) +
+                             depths(3, 1, 1, 0, 1) +
+                             depths(5, 1, 1, 1, 0) +
+                             depths(6, 1, 1, 0, 0) +
+                             depths(7, 1, 0, 1, 0) +
+                             depths(8, 1, 0, 0, 1) +
+                             depths(9, 1, 1, 1, 1) +
+                             depths(10, 1, 0, 1, 1) +
+                             depths(11, 1, 1, 0, 1) +
+                             depths(12, 1, 1, 1, 0) +
+                             depths(13, 1, 1, 0, 0) +
+                             depths(14, 1, 0, 1, 0) +
+                             depths(15, 1, 0, 0, 1) +
+                             depths(20, 1, 1, 1, 1) +
+                             depths(25, 1, 0.5, 0.5, 0.5)),
+            output="data_visualization/crossing_3D/straight_crossing_proba_3D_bis.png"),
+)
+
+for observable in ("intersection", "projection"):
+    name = observable.capitalize()
+    folder = "data_visualization/" + observable + "_2D/"
+    FIGURES[observable + "_2D_angle"] = tuple(
+        Figure(observable + "s_2D_50000",
+               series=tuple(Series(n, d, column="a=" + str(a), label="a=" + str(a)) for a in ANGLES),
+               title=name + " Length\nn^d=" + str(n) + "^" + str(d),
+               ylabel="Average " + name + " Length",
+               output=folder + observable + "_2D_n^d=" + str(n) + "^" + str(d) + ".png")
+        for n, d in ANGLE_SWEEPS)
+    FIGURES[observable + "_2D_angle_relative_to_max"] = tuple(
+        Figure(observable, "relative", long=True,
+               series=tuple(Series(n, d, angle=a, label="a=" + str(a)) for a in ANGLES),
+               title="Relative " + name + " Length\nn^d=" + str(n) + "^" + str(d),
+               ylabel="Average Relative " + name + " Length",
+               ylim=(0, 1) if observable == "intersection" else None,
+               output=folder + "relative_" + observable + "_2D_n^d=" + str(n) + "^" + str(d) + ".png")
+        for n, d in ANGLE_SWEEPS)
+
+# critical points against the depth (python -m percolation.critical data/*crossings*.csv)
+CROSSINGS = [prefix + "crossings" + kind + "_" + dim + "_50000"
+             for prefix in ("", "complement_") for kind in ("", "_semi_straight", "_straight") for dim in ("2D", "3D")]
+for metric, name in (("pc", "Critical Point"), ("width", "Transition Width")):
+    FIGURES["critical_" + metric] = tuple(
+        Figure("critical/" + experiment, metric,
+               series=sizes((2, 3, 5, 7, 11, 13, 17) if experiment.endswith("2D_50000") else (2, 3, 5), None),
+               title=name + "\n" + experiment.replace("_", " "),
+               x="d", xlabel="d", ylabel=name + " (logistic fit of the crossing probability)",
+               xlim=None, marker="o",
+               output="data_visualization/critical/" + metric + "_" + experiment + ".png")
+        for experiment in CROSSINGS)
@@ -0,0 +1,222 @@
+"""
+The targets are the figures of the registry (registry.py), by target, and the plotting
+scripts of data_visualization/ that draw theoretical curves (the *Data2D.py and *Data3D.py
+modules are the loaders of the data, for interactive use). They are listed without importing
+matplotlib or pandas, which are imported when the first figure is rendered.
+
+Each figure (or script) is a unit of the build. Its fingerprint (its spec, or the source of
+its script, and the contents of the data files it reads) is kept in a manifest, so that a
+render only redraws the units whose spec or data changed (or whose image is missing).
+
+Rendering runs with the Agg backend (plt.show closing the figures of the scripts). Parallel
+renders fork their workers after the parent has imported matplotlib and pandas and loaded
+the data of the units to render, so the workers start warm; the units are scheduled from the
+largest, one at a time, to balance the workers.
+"""
+import contextlib
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import time
+
+from percolation.plotting.registry import FIGURES
+
+
+SCRIPTS = "data_visualization"
+MANIFEST = os.path.join(SCRIPTS, "manifest.json")
+
+# loader module -> experiment (file name of data/ without extension)
+LOADERS = {
+    "crossingsData2D": "crossings_2D_50000",
+    "crossingsData3D": "crossings_3D_50000",
+    "complement_crossingsData2D": "complement_crossings_2D_50000",
+    "complement_crossingsData3D": "complement_crossings_3D_50000",
+    "semi_straight_crossingsData2D": "crossings_semi_straight_2D_50000",
+    "semi_straight_crossingsData3D": "crossings_semi_straight_3D_50000",
+    "complement_semi_straight_crossingsData2D": "complement_crossings_semi_straight_2D_50000",
+    "complement_semi_straight_crossingsData3D": "complement_crossings_semi_straight_3D_50000",
+    "straight_crossingsData2D": "crossings_straight_2D_50000",
+    "straight_crossingsData3D": "crossings_straight_3D_50000",
+    "complement_straight_crossingsData2D": "complement_crossings_straight_2D_50000",
+    "complement_straight_crossingsData3D": "complement_crossings_straight_3D_50000",
+    "blobData2D": "blob_2D_50000",
+    "blobData3D": "blob_3D_50000",
+    "intersectionData2D": "intersections_2D_50000",
+    "projectionData2D": "projections_2D_50000",
+}
+LONG = {"intersectionData2D": "intersection", "projectionData2D": "projection"}
+# digests of the files read, by (file name, modification time, size)
+_DIGESTS = {}
+
+
+def scripts():
+    """Returns the sorted names of the plotting scripts."""
+    return sorted(f[:-3] for f in os.listdir(SCRIPTS)
+                  if f.endswith(".py") and f[:-3] not in LOADERS)
+
+
+def targets():
+    """Returns the sorted names of the targets."""
+    return sorted(list(FIGURES) + scripts())
+
+
+def loaders(script):
+    """Returns the loader modules imported by script."""
+    with open(os.path.join(SCRIPTS, script + ".py")) as f:
+        return re.findall(r"^from (\w+) import \*", f.read(), re.MULTILINE)
+
+
+def units(names):
+    """
+    Returns the units of the targets names: (target, index of the figure) for the figures
+    saved to a file, (script, None) for the scripts.
+    """
+    return [(name, k) for name in names if name in FIGURES
+            for k, figure in enumerate(FIGURES[name]) if figure.output] + \
+           [(name, None) for name in names if name not in FIGURES]
+
+
+def inputs(unit):
+    """Returns the data files read by unit."""
+    name, k = unit
+    if k is not None:
+        return FIGURES[name][k].inputs()
+    return [os.path.join("data", LOADERS[loader] + ".csv") for loader in loaders(name) if loader in LOADERS]
+
+
+def _digest(file_name):
+    """Returns the digest of the contents of file_name, computed again whenever the file changes."""
+    status = os.stat(file_name)
+    stamp = (file_name, status.st_mtime_ns, status.st_size)
+    if stamp not in _DIGESTS:
+        with open(file_name, "rb") as f:
+            _DIGESTS[stamp] = hashlib.sha1(f.read()).hexdigest()
+    return _DIGESTS[stamp]
+
+
+def fingerprint(unit):
+    """Returns the fingerprint of unit: the digest of its spec (or script) and of its data files."""
+    name, k = unit
+    spec = repr(FIGURES[name][k]) if k is not None else _digest(os.path.join(SCRIPTS, name + ".py"))
+    return hashlib.sha1(json.dumps([spec] + [[f, _digest(f)] for f in inputs(unit)]).encode()).hexdigest()
+
+
+def read_manifest():
+    """Returns the manifest {unit key: fingerprint} of the last renders."""
+    if not os.path.exists(MANIFEST):
+        return {}
+    with open(MANIFEST) as f:
+        return json.load(f)
+
+
+def write_manifest(manifest):
+    tmp = MANIFEST + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, MANIFEST)
+
+
+def key(unit):
+    """Returns the key of unit in the manifest (the image of a figure, the file of a script)."""
+    name, k = unit
+    return FIGURES[name][k].output if k is not None else os.path.join(SCRIPTS, name + ".py")
+
+
+def stale(names, manifest):
+    """Returns the units of the targets names whose fingerprint changed or whose image is missing."""
+    return [u for u in units(names)
+            if manifest.get(key(u)) != fingerprint(u) or (u[1] is not None and not os.path.exists(key(u)))]
+
+
+def warm_up(todo):
+    """Imports matplotlib (Agg backend) and pandas, and loads the data of the units todo."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot
+    import pandas
+    from percolation.plotting.data import load, load_long
+    for name, k in todo:
+        if k is not None:
+            FIGURES[name][k].data()
+            continue
+        for loader in loaders(name):
+            if loader in LOADERS:
+                load(LOADERS[loader])
+            if loader in LONG:
+                load_long(LONG[loader])
+    if SCRIPTS not in sys.path:
+        sys.path.insert(0, SCRIPTS)
+
+
+def render(unit):
+    """Draws the figure of unit, or runs its script (its prints are discarded), and returns (unit, time)."""
+    import runpy
+    import matplotlib.pyplot as plt
+    from percolation.plotting.figures import draw
+    warm_up([unit])
+    start = time.perf_counter()
+    name, k = unit
+    show = plt.show
+    plt.show = lambda *args, **kwargs: plt.close("all")
+    try:
+        if k is not None:
+            draw(FIGURES[name][k])
+        else:
+            with contextlib.redirect_stdout(io.StringIO()):
+                runpy.run_path(os.path.join(SCRIPTS, name + ".py"), run_name="__main__")
+    finally:
+        plt.show = show
+        plt.close("all")
+    return unit, time.perf_counter() - start
+
+
+def _size(unit):
+    name, k = unit
+    return len(FIGURES[name][k].series) if k is not None else float("inf")
+
+
+def render_all(names, workers=1, force=False):
+    """
+    Renders the stale units of the targets names (all of them if force), in workers forked
+    processes if workers > 1, yielding (unit, time) as they are done; the manifest is
+    updated as they are.
+    """
+    manifest = read_manifest()
+    todo = units(names) if force else stale(names, manifest)
+    todo.sort(key=_size, reverse=True)
+    if not todo:
+        return
+    warm_up(todo)
+    if workers <= 1:
+        done = map(render, todo)
+    else:
+        import multiprocessing
+        pool = multiprocessing.get_context("fork").Pool(workers)
+        done = pool.imap_unordered(render, todo)
+    try:
+        for unit, seconds in done:
+            manifest[key(unit)] = fingerprint(unit)
+            write_manifest(manifest)
+            yield unit, seconds
+    finally:
+        if workers > 1:
+            pool.close()
+            pool.join()
+
+
+def show(name):
+    """Draws the figures of the target name (or runs its script) interactively."""
+    import runpy
+    import matplotlib.pyplot as plt
+    from percolation.plotting.figures import draw
+    if name not in FIGURES:
+        if SCRIPTS not in sys.path:
+            sys.path.insert(0, SCRIPTS)
+        runpy.run_path(os.path.join(SCRIPTS, name + ".py"), run_name="__main__")
+        return
+    for figure in FIGURES[name]:
+        draw(figure)
+        plt.show()
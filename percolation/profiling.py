@@ -0,0 +1,254 @@
+"""
+Opt-in profiling of the sweeps.
+
+When a trace is started, each (experiment, n, d, p) cell of a sweep writes one JSON line
+to the trace file with its wall time, its samples/s, the time (and optionally the peak
+allocated memory) of each stage (generation, pruning, crossing, blob, count, write...),
+the counters of its stages (breadth-first search steps, batches...) and the process that
+ran it. Stages nested in another stage (a crossing computed to prune, for example) are
+not counted in the time of the outer stage. When no trace is started, the hooks only
+check a global, so the sweeps are not slowed down.
+
+The workers of a parallel sweep (see parallel.py) trace each chunk they run and send its
+stages and counters back with it, to be merged into the cell of the parent: the times of
+the stages of a parallel cell are summed over its workers (so they may add up to more than
+its wall time), and the cell lists the chunks, time and maximum queue depth (chunks of the
+cell waiting to be run when one of them started) of each worker.
+
+The command lines take a --trace option, and the traces are summarized with:
+
+    python -m percolation.crossings 2 6 --rep 1000 --trace trace.jsonl
+    python -m percolation.trace_report trace.jsonl --top 10
+"""
+import collections
+import contextlib
+import functools
+import json
+import os
+import time
+import tracemalloc
+
+
+_trace = None
+
+
+class Trace:
+    """A trace file, with the cell being profiled and its stack of running stages."""
+
+    def __init__(self, file_name, allocations=False):
+        self.file_name = file_name
+        self.allocations = allocations
+        self.record = None
+        self.stack = []
+
+
+def start(file_name, allocations=False):
+    """Starts tracing the sweeps to file_name (peak allocated memory of the stages if allocations)."""
+    global _trace
+    stop()
+    _trace = Trace(file_name, allocations)
+    if allocations:
+        tracemalloc.start()
+
+
+def stop():
+    """Stops tracing."""
+    global _trace
+    if _trace is not None and _trace.allocations:
+        tracemalloc.stop()
+    _trace = None
+
+
+def enabled():
+    """Tells whether a trace is started."""
+    return _trace is not None
+
+
+def settings():
+    """Returns the arguments of start of the trace started (None if none), to start it in workers."""
+    return None if _trace is None else (_trace.file_name, _trace.allocations)
+
+
+def add_trace_arguments(parser):
+    """Adds the --trace and --trace-allocations options to the parser of a command line."""
+    parser.add_argument("--trace", default=None, help="append a JSONL profile of each (n, d, p) to this file")
+    parser.add_argument("--trace-allocations", action="store_true", help="also trace the peak memory of each stage")
+
+
+def start_from_arguments(args):
+    """Starts tracing if the command line asked for it."""
+    if args.trace:
+        start(args.trace, args.trace_allocations)
+
+
+@contextlib.contextmanager
+def cell(experiment, n, d, p, rep, **keys):
+    """Profiles the computation of one (experiment, n, d, p) cell of a sweep."""
+    if _trace is None:
+        yield
+        return
+    _trace.record = {
+        "experiment": experiment, "n": n, "d": d, "p": float(p), "rep": rep, **keys,
+        "worker": os.getpid(), "stages": {}, "counters": {},
+    }
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        record, _trace.record = _trace.record, None
+        record["time"] = time.perf_counter() - start_time
+        record["samples_per_s"] = rep/record["time"] if record["time"] else None
+        with open(_trace.file_name, "a") as f:
+            print(json.dumps(record), file=f)
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Profiles a stage of the current cell (its time excludes the stages nested in it)."""
+    if _trace is None or _trace.record is None:
+        yield
+        return
+    trace = _trace
+    now = time.perf_counter()
+    if trace.stack:
+        outer = trace.stack[-1]
+        outer["time"] += now - outer["start"]
+        if trace.allocations:
+            outer["peak"] = max(outer["peak"], tracemalloc.get_traced_memory()[1] - outer["base"])
+    frame = {"time": 0.0, "start": now, "peak": 0, "base": 0}
+    if trace.allocations:
+        tracemalloc.reset_peak()
+        frame["base"] = tracemalloc.get_traced_memory()[0]
+    trace.stack.append(frame)
+    try:
+        yield
+    finally:
+        trace.stack.pop()
+        now = time.perf_counter()
+        stats = trace.record["stages"].setdefault(name, {"time": 0.0, "calls": 0})
+        stats["time"] += frame["time"] + now - frame["start"]
+        stats["calls"] += 1
+        if trace.allocations:
+            peak = max(frame["peak"], tracemalloc.get_traced_memory()[1] - frame["base"])
+            stats["allocated"] = max(stats.get("allocated", 0), peak)
+            tracemalloc.reset_peak()
+        if trace.stack:
+            outer = trace.stack[-1]
+            outer["start"] = now
+            if trace.allocations:
+                outer["peak"] = max(outer["peak"], peak + frame["base"] - outer["base"])
+
+
+@contextlib.contextmanager
+def chunk(queued=0):
+    """
+    Profiles a chunk of a cell run by a worker process, queued chunks of the cell waiting to
+    be run when it started: yields the part of the record of the cell it fills (None if no
+    trace is started), to be sent back to the parent and merged into the cell (see merge).
+    """
+    if _trace is None:
+        yield None
+        return
+    part = _trace.record = {"worker": os.getpid(), "stages": {}, "counters": {}}
+    maximum("max_queue_depth", queued)
+    start_time = time.perf_counter()
+    try:
+        yield part
+    finally:
+        _trace.record = None
+        part["time"] = time.perf_counter() - start_time
+
+
+def merge(parts):
+    """Adds the stages and counters of the chunks run by workers (see chunk) to the current cell."""
+    if _trace is None or _trace.record is None:
+        return
+    record = _trace.record
+    workers = record.setdefault("workers", {})
+    for part in parts:
+        if part is None:
+            continue
+        for name, s in part["stages"].items():
+            stats = record["stages"].setdefault(name, {"time": 0.0, "calls": 0})
+            stats["time"] += s["time"]
+            stats["calls"] += s["calls"]
+            if "allocated" in s:
+                stats["allocated"] = max(stats.get("allocated", 0), s["allocated"])
+        for name, value in part["counters"].items():
+            (maximum if name.startswith("max_") else count)(name, value)
+        worker = workers.setdefault(str(part["worker"]), {"chunks": 0, "time": 0.0, "max_queue_depth": 0})
+        worker["chunks"] += 1
+        worker["time"] += part["time"]
+        worker["max_queue_depth"] = max(worker["max_queue_depth"], part["counters"].get("max_queue_depth", 0))
+
+
+def staged(name):
+    """Decorates a function so that each call is profiled as the stage name."""
+    def decorate(function):
+        @functools.wraps(function)
+        def profiled(*args, **kwargs):
+            if _trace is None:
+                return function(*args, **kwargs)
+            with stage(name):
+                return function(*args, **kwargs)
+        return profiled
+    return decorate
+
+
+def count(name, value=1):
+    """Adds value to the counter name of the current cell."""
+    if _trace is not None and _trace.record is not None:
+        counters = _trace.record["counters"]
+        counters[name] = counters.get(name, 0) + value
+
+
+def maximum(name, value):
+    """Keeps the maximum of value in the counter name of the current cell."""
+    if _trace is not None and _trace.record is not None:
+        counters = _trace.record["counters"]
+        counters[name] = max(counters.get(name, value), value)
+
+
+def read_trace(file_name):
+    """Returns the records of a trace file."""
+    with open(file_name) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def report(records, top=10):
+    """Returns the text ranking the hottest cells and stages of the records."""
+    lines = []
+    total = sum(r["time"] for r in records) or 1.0
+    lines.append("hottest cells (experiment,n,d,p): time, share, samples/s, slowest stage")
+    for r in sorted(records, key=lambda r: r["time"], reverse=True)[:top]:
+        slowest = max(r["stages"], key=lambda s: r["stages"][s]["time"]) if r["stages"] else "-"
+        lines.append("  " + ",".join(str(r[k]) for k in ("experiment", "n", "d", "p")) +
+                     ": {:.3f}s, {:.1%}, {:.1f}/s, {}".format(r["time"], r["time"]/total, r["samples_per_s"] or 0, slowest))
+    stages = collections.defaultdict(float)
+    allocated = collections.defaultdict(int)
+    for r in records:
+        for name, s in r["stages"].items():
+            stages[name] += s["time"]
+            allocated[name] = max(allocated[name], s.get("allocated", 0))
+    lines.append("hottest stages: time, share, peak allocated")
+    for name in sorted(stages, key=stages.get, reverse=True)[:top]:
+        lines.append("  {}: {:.3f}s, {:.1%}, {}".format(name, stages[name], stages[name]/total, allocated[name] or "-"))
+    counters = collections.defaultdict(int)
+    for r in records:
+        for name, value in r["counters"].items():
+            counters[name] = max(counters[name], value) if name.startswith("max_") else counters[name] + value
+    if counters:
+        lines.append("counters: " + ", ".join(name + "=" + str(counters[name]) for name in sorted(counters)))
+    cells = collections.Counter(r["worker"] for r in records)
+    lines.append("processes (cells): " + ", ".join(str(w) + " (" + str(cells[w]) + ")" for w in sorted(cells)))
+    chunks, busy, depth = collections.Counter(), collections.defaultdict(float), collections.Counter()
+    for r in records:
+        for w, s in r.get("workers", {}).items():
+            chunks[w] += s["chunks"]
+            busy[w] += s["time"]
+            depth[w] = max(depth[w], s["max_queue_depth"])
+    if chunks:
+        lines.append("workers (chunks, time, max queue depth): " + ", ".join(
+            "{} ({}, {:.3f}s, {})".format(w, chunks[w], busy[w], depth[w]) for w in sorted(chunks)))
+    return "\n".join(lines)
+
@@ -0,0 +1,43 @@
+import numpy as np
+
+from percolation.engine import compiled
+
+
+def projection_intervals_2d(n, d, a):
+    """
+    Calculates the projections on the line of angle a (in degrees) to horizontal of each square
+    of a n^d*n^d grid on the unit square. All the intervals have the same width, so they are
+    returned as (order, left ends sorted increasingly, width), where order gives the flat index
+    of the square corresponding to each left end.
+
+    >>> order, left, width = projection_intervals_2d(2, 1, 45)
+    >>> order, left.round(6), round(width, 6)
+    (array([0, 1, 2, 3]), array([0.      , 0.353553, 0.353553, 0.707107]), 0.707107)
+    """
+    m = n**d
+    c, s = np.cos(np.radians(a)), np.sin(np.radians(a))
+    i = np.arange(m)[:, None]
+    j = np.arange(m)[None, :]
+    left = ((i*c + j*s)/m).ravel()
+    order = np.argsort(left, kind="stable")
+    return order, left[order], float((c+s)/m)
+
+
+def projection(P, intervals):
+    """
+    Calculates the length of the union of the projections of the squares of each realization
+    of the batch P (shape (B, m, m)), using the intervals returned by projection_intervals_2d.
+
+    As the intervals are sorted and share the same width w, each retained square adds
+    min(w, gap to the left end of the previous retained square) to the union.
+    """
+    order, left, width = intervals
+    M = P.reshape(len(P), -1)[:, order]
+    kernels = compiled()
+    if kernels is not None:
+        return kernels.projection(M, left, width)
+    k = np.arange(M.shape[1])
+    previous = np.maximum.accumulate(np.where(M, k, -1), axis=1)
+    previous = np.concatenate([np.full((len(M), 1), -1), previous[:, :-1]], axis=1)
+    gap = np.where(previous >= 0, left - left[np.maximum(previous, 0)], width)
+    return np.where(M, np.minimum(gap, width), 0).sum(axis=1)
@@ -0,0 +1,73 @@
+"""
+Reports how much of the crossing sweeps is saved by the coarse-to-fine pruning.
+
+For each p, the crossing data (the crossing probability for the complement) is computed with
+and without pruning on realizations drawn from the same seed, and the rejection rate at each
+level (certification rate for the complement) and both times are printed:
+
+    python -m percolation.pruning 2 8 --rep 1000 --p-step 0.05
+"""
+import argparse
+import time
+
+import numpy as np
+
+from percolation.crossings import KINDS, CONNECTIVITIES, crossing_data, crossing_probability
+from percolation.save_utils import p_grid
+
+
+HEADER = "rep,n,d,p,rejected,certified,time_pruned,time_full,saved"
+
+
+def prune_report(n, p, d, rep, dim=2, kind="crossing", complement=False, connectivity="face", rng=None):
+    """
+    Returns a dictionary with the rates of realizations rejected and certified at each level
+    (indexed by level) and the times taken by the sweep of p with and without pruning, both
+    drawn from the same seed (drawn from rng). The complement times the crossing probability
+    both ways, as certified crossings have no length.
+    """
+    seed = int(np.random.default_rng(rng).integers(2**63))
+    stats = {}
+    times = []
+    for prune in (True, False):
+        rng = np.random.default_rng(seed)
+        start = time.perf_counter()
+        if complement:
+            crossing_probability(n, p, d, rep, dim, kind, complement, connectivity, rng,
+                                 stats=stats if prune else None, tree=False, prune=prune)
+        else:
+            crossing_data(n, p, d, rep, dim, kind, complement, connectivity, rng, prune=prune,
+                          stats=stats if prune else None)
+        times.append(time.perf_counter() - start)
+    time_pruned, time_full = times
+    return {
+        "rejected": stats.get("rejected", np.zeros(d, dtype=np.int64)) / rep,
+        "certified": stats.get("certified", np.zeros(d, dtype=np.int64)) / rep,
+        "time_pruned": time_pruned,
+        "time_full": time_full,
+        "saved": 1 - time_pruned/time_full,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("n", type=int)
+    parser.add_argument("d", type=int)
+    parser.add_argument("--dim", type=int, choices=(2, 3), default=2)
+    parser.add_argument("--kind", choices=KINDS, default="crossing")
+    parser.add_argument("--complement", action="store_true")
+    parser.add_argument("--connectivity", choices=CONNECTIVITIES, default="face")
+    parser.add_argument("--rep", type=int, default=1000)
+    parser.add_argument("--p-step", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+    print(HEADER)
+    for p in p_grid(args.p_step):
+        r = prune_report(args.n, p, args.d, args.rep, args.dim, args.kind, args.complement, args.connectivity, rng)
+        print(args.rep, args.n, args.d, p, round(r["rejected"].sum(), 4), round(r["certified"].sum(), 4),
+              round(r["time_pruned"], 3), round(r["time_full"], 3), round(r["saved"], 3), sep=",")
+
+
+if __name__ == "__main__":
+    main()
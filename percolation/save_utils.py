@@ -0,0 +1,28 @@
+import os
+
+import numpy as np
+
+
+def entitle_file(file_name, title):
+    """Writes the header title to file_name if the file does not exist or is empty."""
+    if not os.path.exists(file_name) or os.path.getsize(file_name) == 0:
+        with open(file_name, "a") as f:
+            print(title, file=f)
+
+
+def experiment_name(file_name):
+    """Returns the name of the experiment saved in file_name (its base name without extension)."""
+    return os.path.splitext(os.path.basename(file_name))[0]
+
+
+def p_grid(step=0.01):
+    """Returns the grid of probabilities 0, step, ..., 1, rounded to avoid float drift."""
+    return np.round(np.arange(0, 1+step/2, step), 10)
+
+
+def parse_size(text):
+    """Parses a memory size such as "512M" or "4G" into a number of bytes."""
+    units = {"K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40}
+    if text[-1].upper() in units:
+        return int(float(text[:-1]) * units[text[-1].upper()])
+    return int(text)
@@ -0,0 +1,126 @@
+"""
+Row sweeps for the semi-straight crossings in 2D.
+
+A semi-straight crossing only moves down, left or right, so the squares of row i+1 it
+reaches are the horizontal runs of open squares of row i+1 touching a reached square
+of row i. The sweep keeps the reached squares of the current row, for the whole batch:
+
+- as rows of bits packed in 64-bit words, each run being filled in O(log m) word
+  operations, to tell which realizations are crossed,
+- as shortest distances, each run being filled by two running minimums, to get the
+  length of the crossings.
+"""
+import numpy as np
+
+
+WORD = 64
+
+
+def pack_rows(P):
+    """
+    Returns the batch P (shape (B, m, m)) as rows of bits, an array of 64-bit words
+    of shape (B, m, ceil(m/64)); square j of a row is bit j%64 of word j//64.
+    """
+    B, m, _ = P.shape
+    words = -(-m // WORD)
+    packed = np.packbits(P, axis=2, bitorder="little")
+    packed = np.pad(packed, ((0, 0), (0, 0), (0, words*8 - packed.shape[2])))
+    return packed.view("<u8").reshape(B, m, words)
+
+
+def shift_rows(x, k):
+    """Returns the rows of bits x shifted by k squares (to the right if k>0, left otherwise)."""
+    q, r = divmod(abs(k), WORD)
+    y = np.zeros_like(x)
+    if q >= x.shape[-1]:
+        return y
+    if k > 0:
+        y[..., q:] = x[..., :x.shape[-1]-q]
+        z = y << np.uint64(r)
+        if r:
+            z[..., 1:] |= y[..., :-1] >> np.uint64(WORD-r)
+    else:
+        y[..., :x.shape[-1]-q] = x[..., q:]
+        z = y >> np.uint64(r)
+        if r:
+            z[..., :-1] |= y[..., 1:] << np.uint64(WORD-r)
+    return z
+
+
+def fill_runs(seeds, row, m):
+    """
+    Returns the squares of the runs of row (rows of bits) containing one of the seeds,
+    with a Kogge-Stone fill in each direction.
+    """
+    filled = seeds
+    for sign in (1, -1):
+        gen, pro = seeds, row
+        k = 1
+        while k < m:
+            gen = gen | (pro & shift_rows(gen, sign*k))
+            pro = pro & shift_rows(pro, sign*k)
+            k *= 2
+        filled = filled | gen
+    return filled
+
+
+def semi_straight_crossed_2d(P):
+    """
+    Tells which realizations of the batch P (shape (B, m, m)) have a semi-straight up/down crossing.
+
+    >>> P = np.array([[[0, 1, 0, 1, 1],
+    ...                [1, 1, 0, 0, 0],
+    ...                [0, 0, 1, 1, 0],
+    ...                [1, 1, 1, 0, 1],
+    ...                [1, 1, 1, 1, 1]]], dtype=bool)
+    >>> semi_straight_crossed_2d(P), semi_straight_crossed_2d(P[:, ::-1])
+    (array([False]), array([False]))
+    """
+    rows = pack_rows(P)
+    m = P.shape[1]
+    reach = rows[:, 0]
+    index = np.arange(len(P))
+    for i in range(1, m):
+        reach = fill_runs(reach & rows[index, i], rows[index, i], m)
+        alive = reach.any(axis=1)
+        if not alive.all():
+            reach, index = reach[alive], index[alive]
+    crossed = np.zeros(len(P), dtype=bool)
+    crossed[index] = True
+    return crossed
+
+
+def semi_straight_lengths_2d(P):
+    """
+    Calculates the length of the shortest semi-straight up/down crossing of each realization
+    of the batch P (shape (B, m, m)), or 0 when there is none.
+
+    In each row, the distance to square j is min(dist[k] + |j-k|) over the squares k of its run
+    reached from above; the running minimum of dist[k] - k (and + k backwards) is kept inside
+    runs by offsetting each run by a multiple of a large constant (decreasing in the direction
+    of the running minimum, so that the squares of the current run always win).
+
+    >>> P = np.array([[[1, 0, 0, 0],
+    ...                [1, 1, 1, 0],
+    ...                [0, 0, 1, 0],
+    ...                [0, 0, 1, 1]]], dtype=bool)
+    >>> semi_straight_lengths_2d(P)
+    array([6])
+    """
+    B, m, _ = P.shape
+    j = np.arange(m)
+    big = 4*m*m
+    inf = np.iinfo(np.int64).max // 4
+    dist = np.where(P[:, 0], 1, inf)
+    for i in range(1, m):
+        row = P[:, i]
+        start = row & ~np.concatenate([np.zeros((B, 1), dtype=bool), row[:, :-1]], axis=1)
+        run = np.cumsum(start, axis=1) * big
+        seed = np.where(row & (dist < inf), dist + 1, inf)
+        forward = np.minimum.accumulate(np.where(seed < inf, seed - j - run, inf), axis=1) + j + run
+        backward = np.minimum.accumulate(np.where(seed < inf, seed + j + run, inf)[:, ::-1], axis=1)[:, ::-1] - j - run
+        forward = np.where((forward > 0) & (forward < big), forward, inf)
+        backward = np.where((backward > 0) & (backward < big), backward, inf)
+        dist = np.where(row, np.minimum(forward, backward), inf)
+    length = dist.min(axis=1)
+    return np.where(length < inf, length, 0)
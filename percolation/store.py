@@ -0,0 +1,301 @@
+"""
+Binary store of the results of the sweeps, alongside the CSV files.
+
+Each experiment (named as its CSV file, e.g. crossings_2D_50000) has a typed schema, and its
+rows are kept in a directory of chunk files (NumPy structured arrays). The probability is
+stored as an integer key p_key = round(p * 10^P_DIGITS), so that rows of the same p always
+share the same key, whatever float formatting they were written with.
+
+- appends are atomic: each append writes a new chunk to a temporary file and renames it,
+  so readers only ever see complete chunks,
+- a sidecar index maps each (n, d, p_key) to the (chunk, offset, count) of its rows, so
+  that a sweep is read without loading the other chunks (chunks are memory-mapped),
+- the store is exported back to the CSV format of the Julia scripts.
+
+For example:
+
+    python -m percolation.store import data/crossings_2D_50000.csv
+    python -m percolation.store export crossings_2D_50000 /tmp/crossings_2D_50000.csv
+"""
+import argparse
+import contextlib
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from percolation.save_utils import experiment_name
+
+
+P_DIGITS = 6
+ROOT = "store"
+ANGLES = np.arange(0, 91, 2)
+
+KEYS = [("rep", "i8"), ("n", "i8"), ("d", "i8"), ("p_key", "i8")]
+SCHEMAS = {
+    "crossings": np.dtype(KEYS + [("nc", "i8"), ("lc", "i8"), ("sq", "i8")]),
+    "blob": np.dtype(KEYS + [("sq", "i8"), ("interior", "i8"), ("boundary", "i8"), ("dist", "f8"), ("step", "i8")]),
+    "angles": np.dtype(KEYS + [("angle", "f8"), ("value", "f8")]),
+    "wide": np.dtype(KEYS + [("values", "f8", (len(ANGLES),))]),
+}
+
+
+def schema_name(experiment):
+    """
+    Returns the name of the schema of experiment.
+
+    >>> schema_name("complement_crossings_straight_3D_50000"), schema_name("projections_2D_angles")
+    ('crossings', 'angles')
+    """
+    if experiment.endswith("_angles"):
+        return "angles"
+    if experiment.startswith(("crossings", "complement_crossings")):
+        return "crossings"
+    if experiment.startswith("blob"):
+        return "blob"
+    if experiment.startswith(("intersections", "projections")):
+        return "wide"
+    raise ValueError("no schema for the experiment " + repr(experiment))
+
+
+def p_key(p):
+    """
+    Returns the integer key of the probabilities p.
+
+    >>> p_key(0.30000000000000004), p_key([0, 0.1, 1])
+    (300000, array([      0,  100000, 1000000]))
+    """
+    key = np.round(np.asarray(p, dtype=float) * 10**P_DIGITS).astype(np.int64)
+    return int(key) if key.ndim == 0 else key
+
+
+def p_value(key):
+    """Returns the probability of the key (the float closest to its decimal value)."""
+    return round(int(key) / 10**P_DIGITS, P_DIGITS)
+
+
+def header(name):
+    """Returns the CSV header of the schema name."""
+    if name == "wide":
+        return "rep,n,d,p," + ",".join("a=" + str(a) for a in ANGLES)
+    fields = SCHEMAS[name].names
+    return ",".join("p" if f == "p_key" else f for f in fields)
+
+
+def csv_line(row):
+    """Returns the CSV line of a row of a store."""
+    values = []
+    for field in row.dtype.names:
+        x = row[field]
+        if field == "p_key":
+            values.append(repr(p_value(x)))
+        elif field == "values":
+            values.append(", ".join(repr(float(v)) for v in x))
+        elif row.dtype[field].kind == "f":
+            values.append(repr(float(x)))
+        else:
+            values.append(str(int(x)))
+    return ",".join(values)
+
+
+def parse_csv_line(line, dtype):
+    """Returns the row of type dtype written in a CSV line."""
+    fields = [f.strip() for f in line.strip().split(",")]
+    row = np.zeros((), dtype=dtype)
+    names = dtype.names
+    if "values" in names:
+        for name, x in zip(names[:4], fields[:4]):
+            row[name] = p_key(float(x)) if name == "p_key" else int(float(x))
+        row["values"] = [float(x) for x in fields[4:]]
+        return row
+    for name, x in zip(names, fields):
+        if name == "p_key":
+            row[name] = p_key(float(x))
+        elif dtype[name].kind == "f":
+            row[name] = float(x)
+        else:
+            row[name] = int(float(x))
+    return row
+
+
+class ResultsStore:
+    """
+    The chunks and the index of the results of one experiment, in root/experiment
+    (its schema is found from its name unless given).
+    """
+
+    def __init__(self, experiment, root=ROOT, schema=None):
+        self.experiment = experiment
+        self.schema = schema or schema_name(experiment)
+        self.dtype = SCHEMAS[self.schema]
+        self.path = os.path.join(root, experiment)
+        self.index_file = os.path.join(self.path, "index.json")
+
+    def chunks(self):
+        """Returns the names of the chunk files, in the order they were appended."""
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(f for f in os.listdir(self.path) if f.startswith("chunk-") and f.endswith(".npy"))
+
+    def _write_atomic(self, name, write):
+        os.makedirs(self.path, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, os.path.join(self.path, name))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def append(self, rows):
+        """Appends rows (array of the schema of the experiment, or tuples) as a new chunk, in their order."""
+        rows = np.asarray(rows, dtype=self.dtype) if not isinstance(rows, np.ndarray) else rows.astype(self.dtype)
+        rows = np.atleast_1d(rows)
+        if not len(rows):
+            return
+        index = self.index()
+        name = "chunk-" + str(time.time_ns()) + "-" + str(os.getpid()) + ".npy"
+        self._write_atomic(name, lambda f: np.save(f, rows))
+        index["chunks"].append(name)
+        index["entries"] += self._entries(rows, len(index["chunks"])-1)
+        self._write_index(index)
+
+    @staticmethod
+    def _entries(rows, chunk):
+        keys = np.stack([rows["n"], rows["d"], rows["p_key"]], axis=1)
+        starts = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]).any(axis=1)])
+        counts = np.diff(np.r_[starts, len(rows)])
+        return [[int(k) for k in keys[s]] + [chunk, int(s), int(c)] for s, c in zip(starts, counts)]
+
+    def _write_index(self, index):
+        self._write_atomic("index.json", lambda f: f.write(json.dumps(index).encode()))
+
+    def index(self):
+        """
+        Returns the index {"chunks": names, "entries": [[n, d, p_key, chunk, offset, count]...]},
+        rebuilt from the chunks if it misses some of them (concurrent appends).
+        """
+        index = {"chunks": [], "entries": []}
+        if os.path.exists(self.index_file):
+            with open(self.index_file) as f:
+                index = json.load(f)
+        chunks = self.chunks()
+        if set(chunks) != set(index["chunks"]):
+            index = {"chunks": chunks, "entries": []}
+            for k, name in enumerate(chunks):
+                index["entries"] += self._entries(self._load(name), k)
+        return index
+
+    def rebuild_index(self):
+        """Rewrites the index from the chunks."""
+        if os.path.exists(self.index_file):
+            os.unlink(self.index_file)
+        self._write_index(self.index())
+
+    def _load(self, name):
+        return np.load(os.path.join(self.path, name), mmap_mode="r")
+
+    def read(self, n=None, d=None, p=None):
+        """Returns the rows of the experiment (of n, d and p when given), in the order they were appended."""
+        index = self.index()
+        key = None if p is None else p_key(p)
+        parts = []
+        loaded = {}
+        for en, ed, ek, chunk, offset, count in index["entries"]:
+            if (n is None or en == n) and (d is None or ed == d) and (key is None or ek == key):
+                if chunk not in loaded:
+                    loaded[chunk] = self._load(index["chunks"][chunk])
+                parts.append(np.array(loaded[chunk][offset:offset+count]))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=self.dtype)
+
+    def sweeps(self):
+        """Returns the sorted (n, d) of the experiment."""
+        return sorted({(e[0], e[1]) for e in self.index()["entries"]})
+
+    def export_csv(self, file_name):
+        """Writes the rows of the store to file_name in the CSV format of the Julia scripts."""
+        with open(file_name, "w") as f:
+            print(header(self.schema), file=f)
+            for row in self.read():
+                print(csv_line(row), file=f)
+
+
+def import_csv(file_name, root=ROOT, experiment=None, schema=None):
+    """Appends the rows of a CSV data file to the store of its experiment (as one chunk)."""
+    store = ResultsStore(experiment or experiment_name(file_name), root, schema)
+    with open(file_name) as f:
+        next(f)
+        rows = [parse_csv_line(line, store.dtype) for line in f if line.strip()]
+    store.append(np.array(rows, dtype=store.dtype))
+    return store
+
+
+class StoreWriter:
+    """
+    Buffers the rows of a sweep and appends them to a store every flush rows (and when closed),
+    for the save_* functions: used as a context, writer(row) takes the tuple of a row.
+    """
+
+    def __init__(self, experiment, root=ROOT, schema=None, flush=100):
+        self.store = ResultsStore(experiment, root, schema)
+        self.flush = flush
+        self.rows = []
+
+    def __call__(self, *row):
+        self.rows.append(tuple(p_key(x) if name == "p_key" else x for name, x in zip(self.store.dtype.names, row)))
+        if len(self.rows) >= self.flush:
+            self.close()
+
+    def close(self):
+        self.store.append(self.rows)
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def store_writer(file_name, root=None, schema=None):
+    """Returns a StoreWriter for the experiment of file_name if root, otherwise a context giving None."""
+    return StoreWriter(experiment_name(file_name), root, schema) if root else contextlib.nullcontext()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=ROOT)
+    parser.add_argument("--schema", choices=sorted(SCHEMAS), default=None,
+                        help="schema of the experiments (default: found from their names)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    imported = commands.add_parser("import", help="append CSV data files to their stores")
+    imported.add_argument("files", nargs="+")
+    exported = commands.add_parser("export", help="write the store of an experiment as a CSV file")
+    exported.add_argument("experiment")
+    exported.add_argument("file")
+    shown = commands.add_parser("show", help="list the sweeps of an experiment")
+    shown.add_argument("experiment")
+    commands.add_parser("reindex", help="rebuild the indexes of all experiments")
+    args = parser.parse_args()
+    if args.command == "import":
+        for file_name in args.files:
+            store = import_csv(file_name, args.root, schema=args.schema)
+            print(file_name, "->", store.path)
+    elif args.command == "export":
+        ResultsStore(args.experiment, args.root, args.schema).export_csv(args.file)
+    elif args.command == "show":
+        store = ResultsStore(args.experiment, args.root, args.schema)
+        for n, d in store.sweeps():
+            print("n=", n, " d=", d, " rows=", len(store.read(n, d)), sep="")
+    else:
+        for experiment in sorted(os.listdir(args.root)):
+            ResultsStore(experiment, args.root, args.schema).rebuild_index()
+
+
+if __name__ == "__main__":
+    main()
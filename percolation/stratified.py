@@ -0,0 +1,290 @@
+"""
+Stratified sampling of the level 1 of the trees: much of the variance of the crossings and of
+the blob comes from which of the N = n^dim level 1 squares survive.
+
+The realizations are split into strata of level 1 survival patterns of known probabilities:
+
+- when there are at most MAX_STRATA patterns (2^N: n = 2 or 3 in 2D, n = 2 in 3D), every
+  pattern with K retained squares is a stratum of weight p^K (1-p)^(N-K),
+- otherwise the strata are the numbers K of retained squares, of weights
+  C(N, K) p^K (1-p)^(N-K), the K retained squares of the realizations of a stratum being the K
+  smallest coordinates of randomly shifted quasi-Monte-Carlo points (the Kronecker sequence of
+  the generalized golden ratio), which spread the patterns of the stratum evenly.
+
+Each stratum gets 2 realizations and its share of the others (largest remainders), and the
+deeper levels are drawn as usual. The mean of each observable is the sum of the means of the
+strata weighted by their probabilities, with the variance sum w_s^2 V_s, V_s being the
+variance of the mean of the stratum s:
+
+- Var_s / rep_s for the strata of patterns, whose realizations are independent,
+- for the strata of numbers, whose points are not independent, the realizations are split
+  into up to SHIFTS sets, each with its own independent random shift (randomized
+  quasi-Monte-Carlo): the mean of the stratum is the mean of the means of the sets, and V_s
+  the variance of the means of the sets divided by their number.
+
+The factor is the ratio of the variance of the mean of rep independent realizations,
+estimated from the strata, to that variance.
+
+The realizations only hold the level 1 patterns of their strata: any range of them is drawn
+from the seed of the sweep, so that workers share the strata. The means are appended to the
+table of the experiment in the directory stratified/ of its data file (the realizations are
+not independent realizations of p, so the data file is left as is), for example:
+
+    python -m percolation.stratified crossings 3 5 --rep 20000
+"""
+import argparse
+import functools
+import math
+import os
+
+import numpy as np
+
+from percolation.fractal_percolation import batches
+from percolation.crossings import data_file_name, KINDS, CONNECTIVITIES, BYTES_PER_CELL as CROSSING_BYTES_PER_CELL
+from percolation.blob import BYTES_PER_CELL as BLOB_BYTES_PER_CELL
+from percolation.control import crossing_samples, blob_samples, EXPERIMENTS, OBSERVABLES
+from percolation.engine import set_engine, add_engine_argument
+from percolation.parallel import worker_pool
+from percolation.profiling import stage, count, cell, add_trace_arguments, start_from_arguments
+from percolation.save_utils import entitle_file, experiment_name, p_grid, parse_size
+
+
+HEADER = "rep,n,d,p,strata,observable,mean,se,plain_se,factor"
+MAX_MEMORY = 2**30
+# maximum number of level 1 patterns that are strata themselves
+MAX_STRATA = 2**9
+# independently shifted point sets of each stratum of numbers of retained squares
+SHIFTS = 8
+
+
+def strata(N, p, max_strata=MAX_STRATA):
+    """
+    Returns (retained, weights, enumerated): the numbers of retained squares of the strata of
+    N level 1 squares, their probabilities, and whether the strata are the 2^N patterns (the
+    stratum s being the pattern of the bits of s) rather than the numbers of retained squares.
+
+    >>> retained, weights, enumerated = strata(2, 0.5)
+    >>> retained.tolist(), weights.tolist(), enumerated
+    ([0, 1, 1, 2], [0.25, 0.25, 0.25, 0.25], True)
+    >>> strata(2, 0.5, max_strata=2)[1].tolist()
+    [0.25, 0.5, 0.25]
+    """
+    enumerated = 2**N <= max_strata
+    if enumerated:
+        retained = np.array([bin(s).count("1") for s in range(2**N)])
+        multiplicity = np.ones(2**N)
+    else:
+        retained = np.arange(N + 1)
+        multiplicity = np.array([float(math.comb(N, K)) for K in retained])
+    return retained, multiplicity * p**retained * (1 - p)**(N - retained), enumerated
+
+
+def allocation(weights, rep):
+    """
+    Returns the numbers of realizations of the strata of weights: 2 each, the others shared
+    in proportion to the weights (largest remainders).
+
+    >>> allocation(np.array([0.25, 0.5, 0.25]), 16).tolist()
+    [5, 7, 4]
+    """
+    if rep < 2 * len(weights):
+        raise ValueError("rep must be at least twice the number of strata ({})".format(len(weights)))
+    share = (rep - 2*len(weights)) * weights / weights.sum()
+    sizes = np.floor(share).astype(np.int64)
+    remainders = np.argsort(sizes - share, kind="stable")[:rep - 2*len(weights) - sizes.sum()]
+    sizes[remainders] += 1
+    return sizes + 2
+
+
+def kronecker(size, dims, rng=None):
+    """
+    Returns size randomly shifted points of the Kronecker sequence of [0, 1)^dims whose steps
+    are the powers of the inverse of the generalized golden ratio (the root of x^(dims+1) = x + 1).
+
+    >>> X = kronecker(1000, 3, np.random.default_rng(0))
+    >>> X.shape, bool((0 <= X).all() and (X < 1).all()), bool(abs(X.mean() - 0.5) < 0.01)
+    ((1000, 3), True, True)
+    """
+    rng = np.random.default_rng(rng)
+    phi = 2.0
+    for _ in range(64):
+        phi = (1 + phi)**(1 / (dims + 1))
+    steps = (1 / phi)**np.arange(1, dims + 1) % 1
+    return (rng.random(dims) + np.arange(1, size + 1)[:, None] * steps) % 1
+
+
+def level_one(n, p, dim, sizes, retained, enumerated, rng=None):
+    """
+    Returns (top, labels, sets): the level 1 patterns (shape (rep, n, ..., n)) of the
+    realizations of the strata (sizes of each), in the order of the strata, their strata, and
+    their independently shifted point sets within their strata (0 for the strata of patterns).
+    """
+    rng = np.random.default_rng(rng)
+    N = n**dim
+    labels = np.repeat(np.arange(len(sizes)), sizes)
+    sets = np.zeros(len(labels), dtype=np.int64)
+    if enumerated:
+        top = (labels[:, None] >> np.arange(N)) & 1 == 1
+    else:
+        top = np.zeros((len(labels), N), dtype=bool)
+        start = 0
+        for K, size in zip(retained, sizes):
+            for j, part in enumerate(np.array_split(np.arange(start, start + size), min(SHIFTS, size))):
+                sets[part] = j
+                if K:
+                    smallest = np.argsort(kronecker(len(part), N, rng), axis=1)[:, :K]
+                    np.put_along_axis(top[part[0]:part[-1] + 1], smallest, True, axis=1)
+            start += size
+    return top.reshape((len(labels),) + (n,)*dim), labels, sets
+
+
+def stratified_totals(experiment, n, p, d, start, stop, rep, dim=2, kind="crossing", complement=False,
+                      connectivity="face", seed=0, max_strata=MAX_STRATA, max_memory=MAX_MEMORY):
+    """
+    Returns the totals (realizations, sums of the observables and of their squares) of each
+    point set of each stratum (flat array of shape (strata, sets, 1 + 2m), sets being 1 for
+    the strata of patterns and SHIFTS otherwise) of the realizations start..stop-1 of the rep
+    realizations of the stratified sweep seed.
+    """
+    retained, weights, enumerated = strata(n**dim, p, max_strata)
+    top, labels, sets = level_one(n, p, dim, allocation(weights, rep), retained, enumerated, seed)
+    shifts = 1 if enumerated else SHIFTS
+    # the point set of each realization among those of all the strata
+    top, labels = top[start:stop], labels[start:stop] * shifts + sets[start:stop]
+    rng = np.random.default_rng([seed, start + 1])
+    m = len(OBSERVABLES[experiment])
+    groups = len(weights) * shifts
+    totals = np.zeros((groups, 1 + 2*m))
+    per_cell = CROSSING_BYTES_PER_CELL if experiment == "crossings" else BLOB_BYTES_PER_CELL
+    first = 0
+    for size in batches(stop - start, n**(dim*d), max_memory // per_cell):
+        count("batches")
+        T, L = top[first:first + size], labels[first:first + size]
+        first += size
+        if experiment == "crossings":
+            Y, _ = crossing_samples(n, p, d, size, dim, kind, complement, connectivity, rng, T)
+        else:
+            Y, _ = blob_samples(n, p, d, size, dim, rng, T)
+        with stage("count"):
+            Y = np.asarray(Y, dtype=np.float64)
+            totals[:, 0] += np.bincount(L, minlength=groups)
+            for j in range(m):
+                totals[:, 1 + j] += np.bincount(L, Y[:, j], minlength=groups)
+                totals[:, 1 + m + j] += np.bincount(L, Y[:, j]**2, minlength=groups)
+    return totals.ravel()
+
+
+def stratified(totals, weights, m, shifts=1):
+    """
+    Returns (mean, se, plain_se, factor) of each of the m observables of the totals of the
+    strata of weights (see stratified_totals, shifts being their number of point sets): the
+    stratified mean, its standard error, the standard error of the mean of as many independent
+    realizations, and the variance reduction factor.
+
+    >>> totals = np.array([[2, 0, 0], [2, 2, 2]])
+    >>> [x.tolist() for x in stratified(totals, np.array([0.5, 0.5]), 1)]
+    [[0.5], [0.0], [0.25], [inf]]
+    >>> totals = np.array([[[1, 0, 0], [1, 1, 1]], [[1, 1, 1], [1, 1, 1]]])
+    >>> [x.tolist() for x in stratified(totals, np.array([0.5, 0.5]), 1, shifts=2)]
+    [[0.75], [0.25], [0.2795084971874737], [1.2500000000000002]]
+    """
+    totals = np.asarray(totals, dtype=np.float64).reshape(len(weights), shifts, 1 + 2*m)
+    sets = totals[:, :, 0]
+    size = sets.sum(1)[:, None]
+    pooled = totals[:, :, 1:1+m].sum(1) / size
+    # unbiased variances of the realizations of the strata
+    variances = np.maximum(totals[:, :, 1+m:].sum(1) / size - pooled**2, 0) * size / (size - 1)
+    if shifts == 1:
+        means = pooled
+        errors = variances / size
+    else:
+        # the point sets of a stratum are independent, not its realizations
+        filled = sets > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            set_means = totals[:, :, 1:1+m] / sets[:, :, None]
+        count = filled.sum(1)[:, None]
+        means = np.where(filled[:, :, None], set_means, 0).sum(1) / count
+        errors = np.where(filled[:, :, None], (set_means - means[:, None])**2, 0).sum(1) / (count * (count - 1))
+    mean = weights @ means
+    se = np.sqrt(weights**2 @ errors)
+    plain = weights @ variances + weights @ (means - mean)**2
+    plain_se = np.sqrt(plain / size.sum())
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = plain_se**2 / se**2
+    return mean, se, plain_se, factor
+
+
+def save_stratified(experiment, n, d, rep, dim=2, kind="crossing", complement=False, connectivity="face",
+                    file_name=None, ps=None, rng=None, max_strata=MAX_STRATA, max_memory=MAX_MEMORY, workers=1):
+    """
+    Appends the stratified means of the observables of experiment ("crossings" or "blob")
+    for each probability of ps (default p_grid()) to the stratified table of the data file
+    file_name (default the file of the experiment), simulating rep realizations of each.
+    """
+    if experiment == "crossings":
+        file_name = file_name or data_file_name(kind, complement, dim, rep)
+    else:
+        file_name = file_name or "data/blob_" + str(dim) + "D_" + str(rep) + ".csv"
+    table = os.path.join(os.path.dirname(file_name), "stratified", experiment_name(file_name) + ".csv")
+    os.makedirs(os.path.dirname(table), exist_ok=True)
+    entitle_file(table, HEADER)
+    ps = p_grid() if ps is None else ps
+    rng = np.random.default_rng(rng)
+    print("n=", n, " d=", d, " rep=", rep, sep="")
+    names = OBSERVABLES[experiment]
+    m = len(names)
+    budget = max_memory // workers
+    per_cell = CROSSING_BYTES_PER_CELL if experiment == "crossings" else BLOB_BYTES_PER_CELL
+    batch = batches(rep, n**(dim*d), budget // per_cell)[0]
+    retained, _, enumerated = strata(n**dim, 0.5, max_strata)
+    shifts = 1 if enumerated else SHIFTS
+    with open(table, "a") as f, worker_pool(workers, len(retained) * shifts * (1 + 2*m)) as pool:
+        for p in ps:
+            _, weights, _ = strata(n**dim, p, max_strata)
+            seed = int(rng.integers(2**63))
+            function = functools.partial(stratified_totals, experiment, n, p, d, rep=rep, dim=dim, kind=kind,
+                                         complement=complement, connectivity=connectivity, seed=seed,
+                                         max_strata=max_strata)
+            with cell(experiment_name(table), n, d, p, rep):
+                if pool is None:
+                    totals = function(start=0, stop=rep, max_memory=max_memory)
+                else:
+                    totals = pool.addressed(functools.partial(function, max_memory=budget), rep, batch)
+                mean, se, plain_se, factor = stratified(totals, weights, m, shifts)
+                with stage("write"):
+                    for k, name in enumerate(names):
+                        print(rep, n, d, repr(float(p)), len(weights), name,
+                              *(repr(float(x[k])) for x in (mean, se, plain_se, factor)), sep=",", file=f)
+            print("  p={:.4f}: {} = {:.6f} +- {:.6f} (factor {:.3g})".format(p, names[0], mean[0], se[0], factor[0]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("experiment", choices=EXPERIMENTS)
+    parser.add_argument("n", type=int)
+    parser.add_argument("d", type=int)
+    parser.add_argument("--rep", type=int, default=50000)
+    parser.add_argument("--dim", type=int, choices=(2, 3), default=2)
+    parser.add_argument("--kind", choices=KINDS, default="crossing")
+    parser.add_argument("--complement", action="store_true")
+    parser.add_argument("--connectivity", choices=CONNECTIVITIES, default="face")
+    parser.add_argument("--p-step", type=float, default=0.01)
+    parser.add_argument("--max-strata", type=int, default=MAX_STRATA,
+                        help="maximum number of level 1 patterns used as strata (numbers of squares otherwise)")
+    parser.add_argument("--max-memory", type=parse_size, default=MAX_MEMORY)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--file", default=None, help="data file, next to which the table is written")
+    parser.add_argument("--seed", type=int, default=None)
+    add_engine_argument(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    if args.engine:
+        set_engine(args.engine)
+    start_from_arguments(args)
+    save_stratified(args.experiment, args.n, args.d, args.rep, args.dim, args.kind, args.complement,
+                    args.connectivity, args.file, p_grid(args.p_step), args.seed, args.max_strata, args.max_memory,
+                    args.workers)
+
+
+if __name__ == "__main__":
+    main()
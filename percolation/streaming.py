@@ -0,0 +1,140 @@
+"""
+Crossings of giant single 2D realizations, streamed row by row.
+
+A depth d realization of side m = n^d is never held in memory: its rows are built from the
+tree one at a time, top to bottom (the row of level k squares containing the current row is
+refined into n rows of level k+1 squares when it is reached, each square being drawn once),
+so only one row of each level is alive. The crossing (face connectivity, top to bottom) is
+found by a Hoshen-Kopelman scan: the open squares of each row get the labels of their
+clusters, merged with the labels of the previous row, and each label remembers whether its
+cluster reaches the first row. Memory is proportional to one row (O(m) labels).
+
+Once no square of a row is connected to the first row, there is no crossing and the rows
+are only counted. The realizations are not those of fractal_percolation for the same rng
+(the draws are made in another order). For example:
+
+    python -m percolation.streaming 2 14 0.8 --rep 4
+"""
+import argparse
+import time
+
+import numpy as np
+
+from percolation.complement import components
+from percolation.engine import compiled, set_engine, add_engine_argument
+from percolation.profiling import stage, count, cell, add_trace_arguments, start_from_arguments
+
+
+def rows(n, p, d, rng=None):
+    """
+    Yields the rows of a depth d percolation of an n*n grid with probability p, top to bottom.
+
+    >>> [row.astype(int).tolist() for row in rows(2, 1.0, 2)]
+    [[1, 1, 1, 1], [1, 1, 1, 1], [1, 1, 1, 1], [1, 1, 1, 1]]
+    """
+    rng = np.random.default_rng(rng)
+
+    def refined(parents, k):
+        for parent in parents:
+            wide = parent.repeat(n)
+            for _ in range(n):
+                yield wide & (rng.random(n**k, dtype=np.float32) < p)
+
+    level = iter([np.ones(1, dtype=bool)])
+    for k in range(1, d+1):
+        level = refined(level, k)
+    return level
+
+
+def merge_row(previous, top, row):
+    """
+    Hoshen-Kopelman step: returns the labels of the open squares of row (-1 for the closed
+    ones) and whether each label is connected to the first row, previous being the labels of
+    the previous row and top their flags.
+
+    >>> merge_row(np.array([0, -1, 1, 1]), np.array([True, False]), np.array([1, 1, 1, 0], dtype=bool))
+    (array([ 0,  0,  0, -1]), array([ True]))
+    """
+    kernels = compiled()
+    if kernels is not None:
+        return kernels.merge_row(previous, top, row)
+    labels = len(top)
+    starts = row & ~np.r_[False, row[:-1]]
+    runs = labels + np.cumsum(starts) - 1
+    both = row & (previous >= 0)
+    root = components(labels + int(starts.sum()), previous[both], runs[both])
+    flags = np.zeros(len(root), dtype=bool)
+    flags[root[:labels][top]] = True
+    roots, compact = np.unique(root[runs[row]], return_inverse=True)
+    merged = np.full(len(row), -1, dtype=np.int64)
+    merged[row] = compact.ravel()
+    return merged, flags[roots]
+
+
+def streamed_crossing(n, p, d, rng=None):
+    """
+    Tells whether a depth d percolation of an n*n grid with probability p has a crossing
+    (top to bottom, face connectivity), and returns (crossed, sq), sq being its number of
+    retained squares.
+    """
+    sq = 0
+    alive = True
+    labels, top = None, None
+    generated = rows(n, p, d, rng)
+    while True:
+        with stage("generation"):
+            row = next(generated, None)
+        if row is None:
+            break
+        with stage("count"):
+            sq += int(np.count_nonzero(row))
+        if not alive:
+            continue
+        with stage("crossing"):
+            if labels is None:
+                labels, _ = merge_row(np.full(len(row), -1, dtype=np.int64), np.zeros(0, dtype=bool), row)
+                top = np.ones(labels.max(initial=-1) + 1, dtype=bool)
+            else:
+                labels, top = merge_row(labels, top, row)
+            alive = bool(top.any())
+    count("cells", n**(2*d))
+    return alive, sq
+
+
+def streamed_crossing_data(n, p, d, rep, rng=None):
+    """Calculates (nc, sq): the number of crossings and the total number of retained squares of rep realizations."""
+    rng = np.random.default_rng(rng)
+    nc = sq = 0
+    for _ in range(rep):
+        crossed, s = streamed_crossing(n, p, d, rng)
+        nc += crossed
+        sq += s
+    return nc, sq
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("n", type=int)
+    parser.add_argument("d", type=int)
+    parser.add_argument("p", type=float, nargs="+")
+    parser.add_argument("--rep", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    add_engine_argument(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    if args.engine:
+        set_engine(args.engine)
+    start_from_arguments(args)
+    rng = np.random.default_rng(args.seed)
+    for p in args.p:
+        start = time.perf_counter()
+        with cell("streamed_crossings_2D", args.n, args.d, p, args.rep):
+            nc, sq = streamed_crossing_data(args.n, p, args.d, args.rep, rng)
+        seconds = time.perf_counter() - start
+        cells = args.rep * args.n**(2*args.d)
+        print("p={}: cp={:.4f} density={:.6f} ({} crossings of {}), {:.3g} cells/s".format(
+            p, nc/args.rep, sq/cells, nc, args.rep, cells/seconds))
+
+
+if __name__ == "__main__":
+    main()
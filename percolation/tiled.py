@@ -0,0 +1,243 @@
+"""
+Out-of-core tiled realizations, for single realizations too large for the memory (3D
+realizations of side 3^7, say).
+
+A depth d realization is stored as the tiles of its level k blocks (side n^(d-k)): the first
+k levels of the tree tell which blocks are retained, and each retained block is a depth d-k
+realization, stored bit-packed as a row of a memory-mapped .npy file. Removed blocks are not
+stored (their slot in the index of the tiles is -1), so they are empty sentinels.
+
+The kernels read one tile at a time (or one column of tiles):
+
+- the number of retained squares (density),
+- the straight crossings along the first axis, a column of tiles at a time,
+- the blob of the center (vol, area, dist, as in blob.py, without the number of steps): the
+  blob is grown in a tile until it stops, and the squares it reached on the faces of the
+  tile are handed to the neighbouring tiles as seeds, until no tile grows. The squares
+  reached are kept bit-packed in a memory-mapped file as well.
+
+For example:
+
+    python -m percolation.tiled generate big 3 7 0.95 --dim 3 --tile-level 3 --seed 1
+    python -m percolation.tiled analyse big
+"""
+import argparse
+import collections
+import json
+import os
+import time
+
+import numpy as np
+
+from percolation.fractal_percolation import fractal_percolation, batches
+from percolation.crossings import dilate
+from percolation.blob import center
+from percolation.profiling import stage
+
+
+class Tiles:
+    """
+    A tiled realization stored in directory: index.npy (the slot of each tile, -1 if removed),
+    tiles.npy (the bit-packed retained tiles, one per slot) and meta.json (n, p, d, k, dim).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        self.n, self.p, self.d, self.k, self.dim = meta["n"], meta["p"], meta["d"], meta["k"], meta["dim"]
+        self.side = self.n**(self.d - self.k)
+        self.cells = self.side**self.dim
+        self.index = np.load(os.path.join(directory, "index.npy"))
+        self.data = np.load(os.path.join(directory, "tiles.npy"), mmap_mode="r")
+
+    def tile(self, position):
+        """Returns the grid of the tile at position (a tuple of tile coordinates), empty if removed."""
+        slot = self.index[position]
+        if slot < 0:
+            return np.zeros((self.side,)*self.dim, dtype=bool)
+        return np.unpackbits(self.data[slot], count=self.cells).view(bool).reshape((self.side,)*self.dim)
+
+    def retained(self):
+        """Returns the positions of the retained tiles."""
+        return [tuple(x) for x in np.argwhere(self.index >= 0)]
+
+
+def generate_tiles(directory, n, p, d, k, dim=2, rng=None, max_cells=2**24):
+    """
+    Writes a depth d percolation of an n^dim grid with probability p to directory, as the
+    tiles of its level k blocks, and returns its Tiles. The tiles are generated in batches
+    of at most max_cells squares.
+    """
+    rng = np.random.default_rng(rng)
+    os.makedirs(directory, exist_ok=True)
+    with stage("generation"):
+        blocks = fractal_percolation(n, p, k, dim, 1, rng)[0]
+    index = np.full(blocks.shape, -1, dtype=np.int64)
+    index[blocks] = np.arange(np.count_nonzero(blocks))
+    side = n**(d - k)
+    cells = side**dim
+    np.save(os.path.join(directory, "index.npy"), index)
+    tiles = np.lib.format.open_memmap(os.path.join(directory, "tiles.npy"), mode="w+", dtype=np.uint8,
+                                      shape=(int(blocks.sum()), -(-cells // 8)))
+    start = 0
+    for size in batches(len(tiles), cells, max_cells) if len(tiles) else []:
+        with stage("generation"):
+            P = fractal_percolation(n, p, d - k, dim, size, rng)
+        with stage("write"):
+            tiles[start:start+size] = np.packbits(P.reshape(size, cells), axis=1)
+        start += size
+    tiles.flush()
+    del tiles
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump({"n": n, "p": p, "d": d, "k": k, "dim": dim}, f)
+    return Tiles(directory)
+
+
+def retained_squares(tiles):
+    """Returns the number of retained squares of the tiled realization."""
+    with stage("count"):
+        return sum(int(np.unpackbits(tiles.data[slot], count=tiles.cells).sum()) for slot in range(len(tiles.data)))
+
+
+def straight_crossed(tiles):
+    """Tells whether the tiled realization has a straight crossing along its first axis."""
+    with stage("crossing"):
+        for column in np.ndindex(tiles.index.shape[1:]):
+            lines = np.ones((tiles.side,)*(tiles.dim-1), dtype=bool)
+            for i in range(tiles.index.shape[0]):
+                if tiles.index[(i,) + column] < 0:
+                    break
+                lines &= tiles.tile((i,) + column).all(axis=0)
+                if not lines.any():
+                    break
+            else:
+                return True
+        return False
+
+
+def _faces(tiles, position, axis, step):
+    """Returns the face of the tile at position on its side step (+1 or -1) along axis."""
+    end = tiles.side - 1 if step > 0 else 0
+    return tiles.tile(position).take(end, axis=axis)
+
+
+def tiled_blob(tiles, seen_file=None):
+    """
+    Calculates the blob data (vol, area, dist) of the tiled realization: the number of
+    squares of the blob of the center, its number of boundary faces and the largest
+    distance of its squares (beyond the center squares) to the center, in squares.
+    The squares reached are kept in seen_file (default seen.npy in the directory of tiles).
+    """
+    seen_file = seen_file or os.path.join(tiles.directory, "seen.npy")
+    seen = np.lib.format.open_memmap(seen_file, mode="w+", dtype=np.uint8, shape=tiles.data.shape)
+    seen[:] = 0
+    shape = (tiles.side,)*tiles.dim
+    m = tiles.side * tiles.index.shape[0]
+    pending = collections.defaultdict(lambda: np.zeros(shape, dtype=bool))
+    centers = np.argwhere(center(m, tiles.dim))
+    for x in centers:
+        pending[tuple(x // tiles.side)][tuple(x % tiles.side)] = True
+    queue = collections.deque(pending)
+    with stage("blob"):
+        while queue:
+            position = queue.popleft()
+            seeds = pending.pop(position)
+            slot = tiles.index[position]
+            if slot < 0:
+                continue
+            tile = tiles.tile(position)
+            reached = np.unpackbits(seen[slot], count=tiles.cells).view(bool).reshape(shape)
+            front = seeds & tile & ~reached
+            added = np.zeros(shape, dtype=bool)
+            while front.any():
+                added |= front
+                front = dilate(front[None])[0] & tile & ~reached & ~added
+            if not added.any():
+                continue
+            seen[slot] = np.packbits((reached | added).ravel())
+            # hand the squares reached on the faces over to the neighbouring tiles
+            for axis in range(tiles.dim):
+                for step in (1, -1):
+                    neighbour = list(position)
+                    neighbour[axis] += step
+                    if not 0 <= neighbour[axis] < tiles.index.shape[axis]:
+                        continue
+                    face = added.take(tiles.side - 1 if step > 0 else 0, axis=axis)
+                    if not face.any():
+                        continue
+                    neighbour = tuple(neighbour)
+                    if neighbour not in pending:
+                        queue.append(neighbour)
+                    target = [slice(None)]*tiles.dim
+                    target[axis] = 0 if step > 0 else tiles.side - 1
+                    pending[neighbour][tuple(target)] |= face
+    with stage("count"):
+        vol = area = 0
+        dist = 0.0
+        mid = (m - 1)/2
+        is_center = center(m, tiles.dim)
+        for position in tiles.retained():
+            slot = tiles.index[position]
+            reached = np.unpackbits(seen[slot], count=tiles.cells).view(bool).reshape(shape)
+            if not reached.any():
+                continue
+            vol += int(reached.sum())
+            tile = tiles.tile(position)
+            for axis in range(tiles.dim):
+                for step in (1, -1):
+                    # open neighbours along axis, the last slice looking into the neighbouring tile
+                    neighbour = list(position)
+                    neighbour[axis] += step
+                    inside = 0 <= neighbour[axis] < tiles.index.shape[axis]
+                    beyond = _faces(tiles, tuple(neighbour), axis, -step) if inside else np.zeros(shape[1:], dtype=bool)
+                    near = np.roll(tile, -step, axis=axis)
+                    end = [slice(None)]*tiles.dim
+                    end[axis] = tiles.side - 1 if step > 0 else 0
+                    near[tuple(end)] = beyond
+                    area += int((reached & ~near).sum())
+            origin = np.array(position) * tiles.side
+            axes = np.meshgrid(*[np.arange(tiles.side) + o - mid for o in origin], indexing="ij")
+            D = np.sqrt(sum(x**2 for x in axes))
+            D[is_center[tuple(slice(o, o + tiles.side) for o in origin)]] = 0
+            dist = max(dist, float(D[reached].max()))
+    del seen
+    os.remove(seen_file)
+    return vol, area, dist
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    generated = commands.add_parser("generate", help="write a tiled realization")
+    generated.add_argument("directory")
+    generated.add_argument("n", type=int)
+    generated.add_argument("d", type=int)
+    generated.add_argument("p", type=float)
+    generated.add_argument("--dim", type=int, choices=(2, 3), default=2)
+    generated.add_argument("--tile-level", type=int, default=None,
+                           help="level k of the blocks of the tiles (default: tiles of at most 2^21 squares)")
+    generated.add_argument("--seed", type=int, default=None)
+    analysed = commands.add_parser("analyse", help="measure a tiled realization")
+    analysed.add_argument("directory")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    if args.command == "generate":
+        k = args.tile_level
+        if k is None:
+            k = next(k for k in range(args.d + 1) if args.n**(args.dim*(args.d - k)) <= 2**21)
+        tiles = generate_tiles(args.directory, args.n, args.p, args.d, k, args.dim, args.seed)
+        print(len(tiles.data), "tiles of", tiles.cells, "squares ({} removed), {:.2f}s".format(
+            int((tiles.index < 0).sum()), time.perf_counter() - start))
+        return
+    tiles = Tiles(args.directory)
+    sq = retained_squares(tiles)
+    print("density:", sq / (tiles.side**tiles.dim * tiles.index.size))
+    print("straight crossing:", straight_crossed(tiles))
+    vol, area, dist = tiled_blob(tiles)
+    print("blob: vol={} area={} dist={!r}".format(vol, area, dist))
+    print("{:.2f}s".format(time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
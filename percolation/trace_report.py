@@ -0,0 +1,21 @@
+"""
+Ranks the hottest (experiment, n, d, p) cells and stages of a trace written with --trace
+(see profiling.py), for example:
+
+    python -m percolation.trace_report trace.jsonl --top 10
+"""
+import argparse
+
+from percolation.profiling import read_trace, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    print(report(read_trace(args.trace), args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Tests of the sweeps with addressable draws (see percolation/philox.py)."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SWEEPS = {
+    "blob": ["percolation.blob", "3", "3", "--rep", "300", "--max-memory", "1M"],
+    "blob_all_depths": ["percolation.blob", "2", "3", "--rep", "300", "--all-depths"],
+    "crossings": ["percolation.crossings", "3", "3", "--rep", "300"],
+    "angles": ["percolation.angles", "intersection", "3", "3", "--rep", "200", "--angles", "10,30"],
+}
+
+
+def addressed_rows(directory, sweep, workers):
+    """Runs a small addressed sweep with workers processes, and returns the rows of its data file."""
+    file_name = os.path.join(directory, sweep + str(workers) + ".csv")
+    subprocess.run([sys.executable, "-m"] + SWEEPS[sweep] + ["--p-step", "0.25", "--seed", "5", "--addressed",
+                                                             "--workers", str(workers), "--file", file_name],
+                   cwd=ROOT, check=True, capture_output=True)
+    with open(file_name) as f:
+        return f.read().splitlines()
+
+
+@pytest.mark.parametrize("sweep", sorted(SWEEPS))
+def test_addressed_data_does_not_depend_on_the_workers(tmp_path, sweep):
+    serial = addressed_rows(str(tmp_path), sweep, 1)
+    assert len(serial) > 1
+    assert addressed_rows(str(tmp_path), sweep, 3) == serial
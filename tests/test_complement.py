@@ -0,0 +1,17 @@
+"""Tests of the complement crossings found on the tree (see percolation/complement.py)."""
+import numpy as np
+import pytest
+
+from percolation.complement import percolation_tree, densify, complement_crossed
+from percolation.crossings import crossing
+
+
+@pytest.mark.parametrize("connectivity", ["face", "full"])
+@pytest.mark.parametrize("n, d, dim", [(2, 4, 2), (3, 3, 2), (2, 3, 3)])
+def test_tree_crossings_are_the_dense_crossings(n, d, dim, connectivity):
+    rng = np.random.default_rng(1)
+    for p in (0.3, 0.5, 0.7, 0.9):
+        blocks, retained = percolation_tree(n, p, d, dim, 200, rng)
+        P = densify(n, d, dim, 200, retained)
+        expected = crossing(P, complement=True, connectivity=connectivity) != 0
+        assert (complement_crossed(n, d, dim, 200, blocks, connectivity) == expected).all()
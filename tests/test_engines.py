@@ -0,0 +1,46 @@
+"""Tests that the numpy and numba engines (see percolation/engine.py) give the same seeded data."""
+import pytest
+
+from percolation import engine
+from percolation.angles import angle_sweep
+from percolation.blob import blob_data
+from percolation.crossings import crossing_data
+
+
+pytestmark = pytest.mark.skipif(not engine.available("numba"), reason="the numba engine is not installed")
+
+
+def both_engines(function):
+    """Returns the results of function() with the numpy and the numba engines."""
+    previous = engine.get_engine()
+    try:
+        results = []
+        for name in ("numpy", "numba"):
+            engine.set_engine(name)
+            results.append(function())
+        return results
+    finally:
+        engine.set_engine(previous)
+
+
+@pytest.mark.parametrize("complement", [False, True])
+@pytest.mark.parametrize("kind", ["crossing", "semi_straight", "straight"])
+@pytest.mark.parametrize("n, d, dim", [(3, 3, 2), (2, 3, 3)])
+def test_crossing_data(n, d, dim, kind, complement):
+    for p in (0.6, 0.8, 0.95):
+        numpy, numba = both_engines(lambda: crossing_data(n, p, d, 300, dim, kind, complement, rng=7))
+        assert numpy == numba
+
+
+@pytest.mark.parametrize("n, d, dim", [(3, 3, 2), (2, 3, 3)])
+def test_blob_data(n, d, dim):
+    for p in (0.6, 0.8, 0.95):
+        numpy, numba = both_engines(lambda: blob_data(n, p, d, 300, dim, rng=7))
+        assert numpy[:2] + numpy[3:] == numba[:2] + numba[3:]
+        assert numpy[2] == pytest.approx(numba[2])
+
+
+@pytest.mark.parametrize("observable", ["intersection", "projection"])
+def test_angle_sweep(observable):
+    numpy, numba = both_engines(lambda: angle_sweep(observable, 3, 3, 0.8, [0, 10, 30, 45], 300, rng=7))
+    assert numpy == pytest.approx(numba)
@@ -0,0 +1,43 @@
+"""Tests of the profiling of the sweeps (see percolation/profiling.py)."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from percolation.engine import ENGINES, available
+from percolation.profiling import read_trace
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def traced_sweep(directory, name, workers, experiment="crossings", engine=None):
+    """Runs a small sweep of experiment with workers processes, and returns the records of its trace."""
+    trace = os.path.join(directory, name + ".jsonl")
+    subprocess.run([sys.executable, "-m", "percolation." + experiment, "2", "4", "--rep", "400", "--p-step", "0.5",
+                    "--seed", "0", "--workers", str(workers), "--trace", trace,
+                    "--file", os.path.join(directory, name + ".csv")] + (["--engine", engine] if engine else []),
+                   cwd=ROOT, check=True, capture_output=True)
+    return read_trace(trace)
+
+
+def test_parallel_trace_has_the_stages_of_a_serial_one(tmp_path):
+    serial = traced_sweep(str(tmp_path), "serial", 1)
+    parallel = traced_sweep(str(tmp_path), "parallel", 2)
+    assert [r["p"] for r in parallel] == [r["p"] for r in serial]
+    for s, r in zip(serial, parallel):
+        assert set(r["stages"]) == set(s["stages"])
+        assert {"generation", "crossing", "count", "write"} <= set(r["stages"])
+        assert r["counters"]["batches"] >= s["counters"]["batches"]
+        assert sum(w["chunks"] for w in r["workers"].values()) > 1
+        assert "max_queue_depth" in r["counters"]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("experiment", ["crossings", "blob"])
+def test_trace_counts_the_bfs_steps_of_both_engines(tmp_path, experiment, engine):
+    if not available(engine):
+        pytest.skip("the " + engine + " engine is not installed")
+    records = traced_sweep(str(tmp_path), engine, 1, experiment, engine)
+    assert all(r["counters"]["bfs_steps"] > 0 for r in records if r["p"] > 0)
@@ -0,0 +1,28 @@
+"""Tests of the crossings of streamed realizations (see percolation/streaming.py)."""
+import numpy as np
+import pytest
+
+from percolation import engine
+from percolation.crossings import crossing
+from percolation.streaming import rows, streamed_crossing
+
+
+@pytest.fixture(params=engine.ENGINES)
+def selected(request):
+    """Runs a test with each installed engine, restoring the engine afterwards."""
+    if not engine.available(request.param):
+        pytest.skip("the " + request.param + " engine is not installed")
+    previous = engine.get_engine()
+    engine.set_engine(request.param)
+    yield request.param
+    engine.set_engine(previous)
+
+
+@pytest.mark.parametrize("n, d", [(2, 6), (3, 4)])
+def test_streamed_crossings_are_the_dense_crossings(selected, n, d):
+    for seed in range(40):
+        p = (0.6, 0.75, 0.9)[seed % 3]
+        P = np.array(list(rows(n, p, d, seed)))
+        crossed, sq = streamed_crossing(n, p, d, seed)
+        assert crossed == bool(crossing(P[None])[0])
+        assert sq == int(P.sum())
@@ -0,0 +1,27 @@
+"""Tests of the tiled realizations (see percolation/tiled.py) against the in-memory engines."""
+import numpy as np
+import pytest
+
+from percolation.blob import blob_info, distance_to_center
+from percolation.crossings import crossing
+from percolation.tiled import generate_tiles, retained_squares, straight_crossed, tiled_blob
+
+
+def assembled(tiles):
+    """Returns the grid (shape (m, ..., m)) of the tiled realization."""
+    blocks = tiles.index.shape[0]
+    P = np.zeros((tiles.side * blocks,)*tiles.dim, dtype=bool)
+    for position in np.ndindex(tiles.index.shape):
+        P[tuple(slice(x * tiles.side, (x + 1) * tiles.side) for x in position)] = tiles.tile(position)
+    return P
+
+
+@pytest.mark.parametrize("n, d, k, dim", [(2, 5, 2, 2), (3, 3, 1, 2), (2, 4, 2, 3)])
+def test_tiled_measures_are_the_in_memory_ones(tmp_path, n, d, k, dim):
+    for seed, p in enumerate((0.7, 0.85, 0.95, 1.0)):
+        tiles = generate_tiles(str(tmp_path / str(seed)), n, p, d, k, dim, seed)
+        P = assembled(tiles)
+        assert retained_squares(tiles) == int(P.sum())
+        assert straight_crossed(tiles) == bool(crossing(P[None], "straight")[0])
+        vol, area, dist, _ = blob_info(P[None], distance_to_center(n, d, dim))
+        assert tiled_blob(tiles) == pytest.approx((int(vol[0]), int(area[0]), float(dist[0])))